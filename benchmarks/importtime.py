@@ -0,0 +1,86 @@
+"""
+Import time of the modules loaded on a cold start, measured with
+`python -X importtime` in fresh interpreters.
+
+    python -m benchmarks.importtime --module frazer.lambda --save
+
+The median cumulative import time of each module over the runs is written to
+`benchmarks/results/importtime.json` with `--save`, so that startup regressions
+show up in review. `--max-ms` makes the script fail above a threshold.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import click
+
+RESULTS_PATH = Path(__file__).parent / "results" / "importtime.json"
+
+
+def measure_import(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of each module, in one run."""
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"__import__({module!r})",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings: dict[str, int] = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def median_timings(runs: list[dict[str, int]]) -> dict[str, float]:
+    modules = set().union(*runs)
+    return {
+        module: statistics.median(run.get(module, 0) for run in runs) / 1000
+        for module in modules
+    }
+
+
+@click.command()
+@click.option(
+    "--module", default="frazer.lambda", show_default=True, help="Module imported."
+)
+@click.option("--runs", default=7, show_default=True, help="Number of runs.")
+@click.option("--top", default=15, show_default=True, help="Modules reported.")
+@click.option("--save", is_flag=True, help="Store the results in benchmarks/results.")
+@click.option(
+    "--max-ms", type=float, default=None, help="Fail above this total import time."
+)
+def main(module: str, runs: int, top: int, save: bool, max_ms: float | None) -> None:
+    timings = median_timings([measure_import(module) for _ in range(runs)])
+    total = timings[module]
+    slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:top]
+    click.echo(f"{module}: {total:.1f} ms (median of {runs} runs)")
+    for name, milliseconds in slowest:
+        click.echo(f"  {milliseconds:8.1f} ms  {name}")
+    if save:
+        RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        results = json.loads(RESULTS_PATH.read_text()) if RESULTS_PATH.exists() else {}
+        results[module] = {
+            "python": sys.version.split()[0],
+            "runs": runs,
+            "total_ms": round(total, 1),
+            "slowest_ms": {name: round(ms, 1) for name, ms in slowest},
+        }
+        RESULTS_PATH.write_text(json.dumps(results, indent=2) + "\n")
+    if max_ms is not None and total > max_ms:
+        raise click.ClickException(f"Import time {total:.1f} ms above {max_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Evaluation metrics and diff of `evaluation.tools.metrics` against the previous
+implementation (a scikit-learn `classification_report` per dimension and a
+cell by cell diff, each reading both CSV files), over a synthetic evaluation of
+`--rows` words.
+
+    python -m benchmarks.metrics --rows 1000000 --save
+
+The words are the ones of `evaluation/output/baseline.csv`, repeated; the new
+dataset replaces `--error-rate` of the cells of each dimension with another
+label of the dimension. Both implementations must give the same metrics.
+"""
+
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import click
+import numpy as np
+import pandas as pd
+from sklearn.metrics import classification_report
+
+from evaluation.tools.metrics import (
+    EVALUTION_DIMENSIONS,
+    compare_datasets,
+    diff_dataframes,
+    read_dataset,
+)
+
+EVALUATION_DIR = Path(__file__).parent.parent / "evaluation"
+RESULTS_PATH = Path(__file__).parent / "results" / "metrics.json"
+
+
+def legacy_calculate_metrics(baseline_path: Path, new_path: Path) -> dict[str, dict]:
+    baseline = pd.read_csv(baseline_path)
+    new = pd.read_csv(new_path)
+    results = {}
+    for column in EVALUTION_DIMENSIONS:
+        baseline[column] = baseline[column].fillna("N/A")
+        new[column] = new[column].fillna("N/A")
+        report = classification_report(
+            baseline[column], new[column], output_dict=True, zero_division=0
+        )
+        results[column] = {
+            "precision": report["weighted avg"]["precision"],
+            "recall": report["weighted avg"]["recall"],
+            "f1": report["weighted avg"]["f1-score"],
+            "support": report["weighted avg"]["support"],
+        }
+    return results
+
+
+def legacy_diff_datasets(baseline_path: Path, new_path: Path) -> pd.DataFrame:
+    baseline = pd.read_csv(baseline_path)
+    new = pd.read_csv(new_path)
+    diff = new.copy()
+    for col in EVALUTION_DIMENSIONS:
+        diff[col] = [
+            None if baseline.at[i, col] == new.at[i, col] else new.at[i, col]
+            for i in range(len(baseline))
+        ]
+    return diff
+
+
+def synthetic_datasets(
+    rows: int, error_rate: float, seed: int
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    words = pd.read_csv(EVALUATION_DIR / "output" / "baseline.csv")
+    repeats = -(-rows // len(words))
+    baseline = pd.concat([words] * repeats, ignore_index=True).iloc[:rows]
+    rng = np.random.default_rng(seed)
+    new = baseline.copy()
+    for column in EVALUTION_DIMENSIONS:
+        labels = words[column].dropna().unique()
+        if not len(labels):
+            continue
+        errors = rng.random(rows) < error_rate
+        new.loc[errors, column] = rng.choice(labels, errors.sum())
+    return baseline, new
+
+
+def timed(func: Any) -> tuple[float, Any]:
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+@click.command()
+@click.option("--rows", default=1_000_000, show_default=True)
+@click.option("--error-rate", default=0.1, show_default=True)
+@click.option("--seed", default=0, show_default=True)
+@click.option("--save", is_flag=True, help="Store the results in benchmarks/results.")
+def main(rows: int, error_rate: float, seed: int, save: bool) -> None:
+    baseline, new = synthetic_datasets(rows, error_rate, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_path = Path(tmp) / "baseline.csv"
+        new_path = Path(tmp) / "new.csv"
+        baseline.to_csv(baseline_path, index=False)
+        new.to_csv(new_path, index=False)
+
+        legacy_metrics_s, legacy = timed(
+            lambda: legacy_calculate_metrics(baseline_path, new_path)
+        )
+        legacy_diff_s, _ = timed(lambda: legacy_diff_datasets(baseline_path, new_path))
+        read_s, (baseline_df, new_df) = timed(
+            lambda: (read_dataset(baseline_path), read_dataset(new_path))
+        )
+        metrics_s, metrics = timed(lambda: compare_datasets(baseline_df, new_df))
+        diff_s, _ = timed(lambda: diff_dataframes(baseline_df, new_df))
+
+    for column in EVALUTION_DIMENSIONS:
+        for key, value in legacy[column].items():
+            assert np.isclose(value, metrics[column][key]), (column, key)
+    legacy_s = legacy_metrics_s + legacy_diff_s
+    total_s = read_s + metrics_s + diff_s
+    results = {
+        "rows": rows,
+        "error_rate": error_rate,
+        "legacy": {
+            "metrics_s": round(legacy_metrics_s, 3),
+            "diff_s": round(legacy_diff_s, 3),
+            "total_s": round(legacy_s, 3),
+        },
+        "vectorized": {
+            "read_s": round(read_s, 3),
+            "metrics_s": round(metrics_s, 3),
+            "diff_s": round(diff_s, 3),
+            "total_s": round(total_s, 3),
+        },
+        "speedup": round(legacy_s / total_s, 1),
+    }
+    click.echo(
+        f"legacy: metrics {legacy_metrics_s:.2f} s, diff {legacy_diff_s:.2f} s\n"
+        f"vectorized: read {read_s:.2f} s, metrics {metrics_s:.2f} s, "
+        f"diff {diff_s:.2f} s\n"
+        f"{results['speedup']}x faster over {rows} rows"
+    )
+    if save:
+        RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        RESULTS_PATH.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
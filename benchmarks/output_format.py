@@ -0,0 +1,84 @@
+"""
+Evaluation outputs written as CSV against Parquet files: time to save the
+analysed words of `batch-analyse`, to read them and compute the metrics against
+a baseline in the same format, and the size of the files, over `--words`
+words.
+
+    python -m benchmarks.output_format --words 1000000 --save
+
+The sentences are the baseline analyses of `evaluation/input_sentences.csv`,
+repeated.
+"""
+
+import json
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import click
+
+from benchmarks.wire_schema import EVALUATION_DIR, read_baseline
+from evaluation.tools.batch_analyse import OUTPUT_FORMATS, save_analysed_sentences
+from evaluation.tools.metrics import compare_datasets, read_dataset
+from evaluation.tools.records import AnalysedSentenceRecord
+
+RESULTS_PATH = Path(__file__).parent / "results" / "output_format.json"
+
+
+def timed(func: Callable[[], Any]) -> tuple[float, Any]:
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def repeated_records(words: int) -> list[AnalysedSentenceRecord]:
+    baseline = read_baseline(
+        EVALUATION_DIR / "input_sentences.csv",
+        EVALUATION_DIR / "output" / "baseline.csv",
+    )
+    records = []
+    total = 0
+    while total < words:
+        for _, sentence in baseline:
+            records.append(AnalysedSentenceRecord(len(records), sentence))
+            total += len(sentence.words)
+    return records
+
+
+@click.command()
+@click.option("--words", default=1_000_000, show_default=True)
+@click.option("--save", is_flag=True, help="Store the results in benchmarks/results.")
+def main(words: int, save: bool) -> None:
+    records = repeated_records(words)
+    results: dict[str, Any] = {"words": sum(len(r[1].words) for r in records)}
+    with tempfile.TemporaryDirectory() as tmp:
+        for format in OUTPUT_FORMATS:
+            baseline_path = Path(tmp) / f"baseline.{format}"
+            new_path = Path(tmp) / f"new.{format}"
+            save_analysed_sentences(records, baseline_path, format=format)
+            write_s, _ = timed(
+                lambda: save_analysed_sentences(records, new_path, format=format)
+            )
+            read_s, (baseline, new) = timed(
+                lambda: (read_dataset(baseline_path), read_dataset(new_path))
+            )
+            metrics_s, _ = timed(lambda: compare_datasets(baseline, new))
+            results[format] = {
+                "write_s": round(write_s, 3),
+                "read_s": round(read_s, 3),
+                "metrics_s": round(metrics_s, 3),
+                "size_mb": round(new_path.stat().st_size / 1e6, 2),
+            }
+            click.echo(
+                f"{format}: write {write_s:.2f} s, read both {read_s:.2f} s, "
+                f"metrics {metrics_s:.2f} s, {results[format]['size_mb']} MB"
+            )
+    if save:
+        RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        RESULTS_PATH.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
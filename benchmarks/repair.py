@@ -0,0 +1,123 @@
+"""
+Validation of model responses deviating from the schema, without and with the
+local repair of `frazer.repair`, over the baseline analyses of
+`evaluation/input_sentences.csv`.
+
+    python -m benchmarks.repair --rate 0.1 --save
+
+Each word of the baseline gets, with probability `--rate`, one of the common
+deviations seen in model responses. A response failing validation costs a
+re-ask of the whole request; a verb or noun validated as another category
+silently loses its analysis.
+"""
+
+import json
+import random
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import click
+
+from benchmarks.wire_schema import EVALUATION_DIR, read_baseline
+from frazer.analyser import AnalysedSentence
+from frazer.repair import repair_json
+
+RESULTS_PATH = Path(__file__).parent / "results" / "repair.json"
+
+
+def capitalize_category(word: dict) -> dict:
+    return word | {"syntatic_category": word["syntatic_category"].capitalize()}
+
+
+def rename_category(word: dict) -> dict:
+    word = dict(word)
+    word["syntactic_category"] = word.pop("syntatic_category")
+    return word
+
+
+def upper_case_enums(word: dict) -> dict:
+    return word | {
+        key: value.upper()
+        for key, value in word.items()
+        if key in ("gender", "number", "aspect") and isinstance(value, str)
+    }
+
+
+def flatten_conjugation(word: dict) -> dict:
+    if "conjugation" not in word:
+        return word
+    word = dict(word)
+    return word | word.pop("conjugation")
+
+
+def person_as_text(word: dict) -> dict:
+    if not word.get("conjugation", {}).get("person"):
+        return word
+    person = word["conjugation"]["person"]
+    return word | {"conjugation": word["conjugation"] | {"person": f"{person}rd"}}
+
+
+DEVIATIONS: list[Callable[[dict], dict]] = [
+    capitalize_category,
+    rename_category,
+    upper_case_enums,
+    flatten_conjugation,
+    person_as_text,
+]
+
+
+def deviate(analysis: AnalysedSentence, rate: float, rng: random.Random) -> str:
+    data = analysis.model_dump(mode="json")
+    data["words"] = [
+        rng.choice(DEVIATIONS)(word) if rng.random() < rate else word
+        for word in data["words"]
+    ]
+    return json.dumps(data, ensure_ascii=False)
+
+
+def validate(arguments: str, expected: AnalysedSentence) -> str:
+    """`retry` if the arguments fail validation, `lost` if a word lost data."""
+    try:
+        sentence = AnalysedSentence.model_validate_json(arguments, strict=True)
+    except ValueError:
+        return "retry"
+    for word, expected_word in zip(sentence.words, expected.words):
+        if type(word) is not type(expected_word):
+            return "lost"
+    return "valid"
+
+
+@click.command()
+@click.option("--rate", default=0.1, show_default=True, help="Words deviating.")
+@click.option("--seed", default=0, show_default=True)
+@click.option("--save", is_flag=True, help="Store the results in benchmarks/results.")
+def main(rate: float, seed: int, save: bool) -> None:
+    analyses = read_baseline(
+        EVALUATION_DIR / "input_sentences.csv",
+        EVALUATION_DIR / "output" / "baseline.csv",
+    )
+    rng = random.Random(seed)
+    results: dict[str, Any] = {"rate": rate, "sentences": len(analyses)}
+    outcomes: dict[str, dict[str, int]] = {
+        "without_repair": {"valid": 0, "retry": 0, "lost": 0},
+        "with_repair": {"valid": 0, "retry": 0, "lost": 0},
+    }
+    for _, analysis in analyses:
+        arguments = deviate(analysis, rate, rng)
+        outcomes["without_repair"][validate(arguments, analysis)] += 1
+        repaired = repair_json(arguments) or arguments
+        outcomes["with_repair"][validate(repaired, analysis)] += 1
+    results.update(outcomes)
+    for name, counts in outcomes.items():
+        click.echo(
+            f"{name}: {counts['retry']} re-asked, {counts['lost']} with words lost, "
+            f"out of {len(analyses)}"
+        )
+    if save:
+        RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        RESULTS_PATH.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
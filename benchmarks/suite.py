@@ -0,0 +1,263 @@
+"""
+End-to-end benchmarks of frazer, run fully offline against the fake backend
+with a simulated model latency:
+
+- `analyse_sentence`: sequential analyses.
+- `api_sentence`: concurrent `POST /sentence` requests to the FastAPI app.
+- `batch_analyse`: an evaluation run over a CSV of sentences.
+- `calculate_metrics`: metrics of an evaluation output against the baseline.
+
+    python -m benchmarks.suite --latency 0.05 --save
+
+Each benchmark reports p50/p95/p99 latency, throughput and peak memory (as
+traced by tracemalloc during a separate run). With `--save` the results are
+appended to `benchmarks/results/suite.json` with the commit they were measured
+on, and compared with the previous results stored.
+"""
+
+import asyncio
+import csv
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import click
+
+from frazer import analyser
+from frazer.backends import FakeBackend
+
+EVALUATION_DIR = Path(__file__).parent.parent / "evaluation"
+RESULTS_PATH = Path(__file__).parent / "results" / "suite.json"
+
+
+def read_sentences() -> list[str]:
+    with (EVALUATION_DIR / "input_sentences.csv").open(encoding="utf-8") as file:
+        return [row["sentence"] for row in csv.DictReader(file)]
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """Peak of the memory allocated while running a function, in bytes."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(latencies: list[float], elapsed: float, items: int, peak: int) -> dict:
+    """Percentiles in milliseconds, throughput in items per second."""
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0]
+    return {
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "throughput_per_s": round(items / elapsed, 2),
+        "peak_memory_kb": round(peak / 1024),
+    }
+
+
+def timed(func: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def bench_analyse_sentence(sentences: list[str], repeat: int) -> dict:
+    def run() -> list[float]:
+        return [
+            timed(lambda: analyser.analyse_sentence(sentence)) for sentence in sentences
+        ]
+
+    peak = peak_memory(run)
+    started = time.perf_counter()
+    latencies = [latency for _ in range(repeat) for latency in run()]
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, len(latencies), peak)
+
+
+def bench_api_sentence(sentences: list[str], repeat: int, concurrency: int) -> dict:
+    import httpx
+
+    from frazer.api import app
+
+    async def request(client: httpx.AsyncClient, sentence: str) -> float:
+        started = time.perf_counter()
+        response = await client.post("/sentence", json={"sentence": sentence})
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    async def run_async(run: str) -> list[float]:
+        transport = httpx.ASGITransport(app=app)
+        limit = asyncio.Semaphore(concurrency)
+        # Distinct sentences, so that requests are neither coalesced nor cached
+        payloads = [
+            f"{sentence} {run}{round_}"
+            for round_ in range(repeat)
+            for sentence in sentences
+        ]
+
+        async def limited(client: httpx.AsyncClient, sentence: str) -> float:
+            async with limit:
+                return await request(client, sentence)
+
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://b"
+        ) as client:
+            return list(await asyncio.gather(*(limited(client, p) for p in payloads)))
+
+    peak = peak_memory(lambda: asyncio.run(run_async("a")))
+    started = time.perf_counter()
+    latencies = asyncio.run(run_async("b"))
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, len(latencies), peak)
+
+
+def bench_batch_analyse(
+    sentences: list[str], repeat: int, concurrency: int, backend: FakeBackend
+) -> dict:
+    from evaluation.tools.batch_analyse import batch_analyse
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = Path(tmp) / "input.csv"
+        with input_path.open("w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["id", "sentence"])
+            for round_ in range(repeat):
+                for pos, sentence in enumerate(sentences):
+                    writer.writerow([round_ * len(sentences) + pos, sentence])
+        items = repeat * len(sentences)
+
+        def run() -> None:
+            batch_analyse(
+                input_path,
+                Path(tmp) / "output.csv",
+                max_concurrency=concurrency,
+                backend=backend,
+            )
+
+        peak = peak_memory(run)
+        latencies = [timed(run) for _ in range(3)]
+    # Latencies are the ones of whole runs
+    return summarize(latencies, sum(latencies), items * len(latencies), peak)
+
+
+def bench_calculate_metrics(repeat: int) -> dict:
+    from evaluation.tools.metrics import calculate_metrics
+
+    baseline = EVALUATION_DIR / "output" / "baseline.csv"
+    new = sorted((EVALUATION_DIR / "output").glob("*/analysed.*"))[-1]
+
+    def run() -> None:
+        calculate_metrics(baseline, new)
+
+    peak = peak_memory(run)
+    latencies = [timed(run) for _ in range(repeat)]
+    return summarize(latencies, sum(latencies), len(latencies), peak)
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(previous: dict, current: dict) -> None:
+    """Print the change of p50 latency and throughput since the previous run."""
+    for name, result in current["benchmarks"].items():
+        before = previous["benchmarks"].get(name)
+        if before is None:
+            continue
+        p50 = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        throughput = result["throughput_per_s"] / before["throughput_per_s"] - 1
+        click.echo(
+            f"{name}: p50 {p50:+.0%}, throughput {throughput:+.0%} "
+            f"since {previous['commit']}"
+        )
+
+
+@click.command()
+@click.option(
+    "--latency",
+    default=0.05,
+    show_default=True,
+    help="Simulated latency of the model, in seconds.",
+)
+@click.option(
+    "--repeat", default=3, show_default=True, help="Rounds over the sentences."
+)
+@click.option(
+    "--concurrency",
+    default=8,
+    show_default=True,
+    help="Concurrent requests of the API and batch benchmarks.",
+)
+@click.option("--save", is_flag=True, help="Store the results in benchmarks/results.")
+def main(latency: float, repeat: int, concurrency: int, save: bool) -> None:
+    import frazer.api  # noqa: F401
+
+    # Importing the API configures logging, which would log every request
+    logging.getLogger().setLevel(logging.WARNING)
+    backend = FakeBackend(latency=latency)
+    analyser.use_backend(backend)
+    sentences = read_sentences()
+    benchmarks = {
+        "analyse_sentence": lambda: bench_analyse_sentence(sentences, repeat),
+        "api_sentence": lambda: bench_api_sentence(sentences, repeat, concurrency),
+        "batch_analyse": lambda: bench_batch_analyse(
+            sentences, repeat, concurrency, backend
+        ),
+        "calculate_metrics": lambda: bench_calculate_metrics(repeat * 5),
+    }
+    current: dict[str, Any] = {
+        "commit": current_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "latency_s": latency,
+        "repeat": repeat,
+        "concurrency": concurrency,
+        "benchmarks": {},
+    }
+    for name, bench in benchmarks.items():
+        result = bench()
+        current["benchmarks"][name] = result
+        click.echo(
+            f"{name}: p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+            f"p99 {result['p99_ms']} ms, {result['throughput_per_s']}/s, "
+            f"peak {result['peak_memory_kb']} KiB"
+        )
+    history = json.loads(RESULTS_PATH.read_text()) if RESULTS_PATH.exists() else []
+    comparable = [
+        run
+        for run in history
+        if (run["latency_s"], run["repeat"], run["concurrency"])
+        == (latency, repeat, concurrency)
+    ]
+    if comparable:
+        compare(comparable[-1], current)
+    if save:
+        RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        RESULTS_PATH.write_text(json.dumps([*history, current], indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Tokens of an analysis request with the public `AnalysedSentence` schema against
+the compact schema of `frazer.wire`, over `evaluation/input_sentences.csv`.
+
+    python -m benchmarks.wire_schema --save
+    python -m benchmarks.wire_schema --live   # also time requests to the backend
+
+Without `--live`, prompt tokens count the messages and the tool definition
+sent, and completion tokens the tool call arguments of the baseline analyses
+written in each schema, with tiktoken. With `--live`, both are the usage
+reported by the backend for the requests timed instead.
+"""
+
+import csv
+import json
+import os
+import re
+import statistics
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+
+import click
+import instructor
+from instructor.process_response import handle_response_model
+
+from frazer.analyser import (
+    AnalysedSentence,
+    build_messages,
+    get_backend,
+    request_analysis,
+    usage_stats,
+    word_adapter,
+)
+from frazer.wire import CompactSentence, to_compact
+
+EVALUATION_DIR = Path(__file__).parent.parent / "evaluation"
+RESULTS_PATH = Path(__file__).parent / "results" / "wire_schema.json"
+
+CONJUGATION_PATTERN = re.compile(
+    r"^(?:(?P<person>\d)person_(?P<number>singular|plural)_)?"
+    r"(?:(?P<gender>masculine|feminine|neuter)_)?"
+    r"(?:(?P<tense>present|past|future)_)?(?P<mood>.+)$"
+)
+
+
+def token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+    except ImportError as e:
+        raise click.UsageError(
+            "Counting tokens needs tiktoken, install it or run with --live"
+        ) from e
+    encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text))
+
+
+def read_baseline(
+    input_path: Path, baseline_path: Path
+) -> list[tuple[str, AnalysedSentence]]:
+    """Input sentences with their analysis in the baseline CSV."""
+    with input_path.open(encoding="utf-8") as file:
+        sentences = {int(row["id"]): row["sentence"] for row in csv.DictReader(file)}
+    words: dict[int, list[Any]] = defaultdict(list)
+    with baseline_path.open(encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            values = {key: value or None for key, value in row.items()}
+            data: dict[str, Any] = {
+                "original_value": row["original_value"],
+                "root": row["root"],
+                "original_value_translation": row["original_value_translation"],
+                "syntatic_category": row["syntactic_category"],
+                "other_syntatic_category": values["other_syntactic_category"],
+                "aspect": values["aspect"],
+                "object": values["object"],
+                "declension_case": values["declension_case"],
+                "word_causing_declension": values["word_causing_declension"],
+                "gender": values["gender"],
+                "number": values["number"],
+                "subtype": values["subtype"],
+            }
+            if values["conjugation"]:
+                match = CONJUGATION_PATTERN.match(row["conjugation"])
+                assert match is not None
+                data["conjugation"] = match.groupdict()
+            words[int(row["sentence_id"])].append(word_adapter.validate_python(data))
+    return [
+        (
+            sentence,
+            AnalysedSentence(
+                text=sentence,
+                translation="",
+                words=words[sentence_id],
+                grammatically_correct=True,
+            ),
+        )
+        for sentence_id, sentence in sentences.items()
+    ]
+
+
+def public_arguments(analysis: AnalysedSentence) -> str:
+    return analysis.model_dump_json()
+
+
+def compact_arguments(analysis: AnalysedSentence) -> str:
+    return to_compact(analysis).model_dump_json(exclude_none=True)
+
+
+def prompt_text(sentence: str, schema: type) -> str:
+    messages = build_messages(sentence, indexed=schema is CompactSentence)
+    _, kwargs = handle_response_model(
+        schema, mode=instructor.Mode.TOOLS, messages=messages
+    )
+    return json.dumps([kwargs["messages"], kwargs["tools"]], ensure_ascii=False)
+
+
+def estimated_tokens(
+    analyses: list[tuple[str, AnalysedSentence]],
+    schema: type,
+    arguments: Callable[[AnalysedSentence], str],
+) -> dict[str, int]:
+    count = token_counter()
+    return {
+        "prompt_tokens": sum(
+            count(prompt_text(sentence, schema)) for sentence, _ in analyses
+        ),
+        "completion_tokens": sum(
+            count(arguments(analysis)) for _, analysis in analyses
+        ),
+    }
+
+
+def measured_requests(sentences: list[str], compact: bool) -> dict[str, Any]:
+    """
+    Tokens reported by the backend and median latency of the analysis
+    requests, without the caches.
+    """
+    os.environ["FRAZER_COMPACT_SCHEMA"] = "1" if compact else ""
+    before = replace(usage_stats)
+    latencies = []
+    for sentence in sentences:
+        started = time.perf_counter()
+        request_analysis(build_messages(sentence), sentence)
+        latencies.append(time.perf_counter() - started)
+    return {
+        "prompt_tokens": usage_stats.prompt_tokens - before.prompt_tokens,
+        "completion_tokens": usage_stats.completion_tokens - before.completion_tokens,
+        "requests": usage_stats.requests - before.requests,
+        "latency_p50_s": round(statistics.median(latencies), 3),
+    }
+
+
+@click.command()
+@click.option(
+    "--input",
+    "input_path",
+    type=click.Path(exists=True, path_type=Path),
+    default=EVALUATION_DIR / "input_sentences.csv",
+)
+@click.option(
+    "--baseline",
+    "baseline_path",
+    type=click.Path(exists=True, path_type=Path),
+    default=EVALUATION_DIR / "output" / "baseline.csv",
+)
+@click.option("--live", is_flag=True, help="Also time requests to the backend.")
+@click.option("--save", is_flag=True, help="Store the results in benchmarks/results.")
+def main(input_path: Path, baseline_path: Path, live: bool, save: bool) -> None:
+    analyses = read_baseline(input_path, baseline_path)
+    results: dict[str, Any] = {
+        "tokens": "usage" if live else "tiktoken",
+        "sentences": len(analyses),
+    }
+    if live:
+        results["backend"] = repr(get_backend())
+    for name, schema, arguments in [
+        ("public", AnalysedSentence, public_arguments),
+        ("compact", CompactSentence, compact_arguments),
+    ]:
+        if live:
+            sentences = [sentence for sentence, _ in analyses]
+            results[name] = measured_requests(sentences, name == "compact")
+        else:
+            results[name] = estimated_tokens(analyses, schema, arguments)
+    for kind in ["prompt_tokens", "completion_tokens"]:
+        saving = 1 - results["compact"][kind] / results["public"][kind]
+        results[f"{kind}_saving"] = round(saving, 3)
+        click.echo(
+            f"{kind}: public {results['public'][kind]}, "
+            f"compact {results['compact'][kind]} ({saving:.0%} fewer)"
+        )
+    if live:
+        click.echo(
+            f"latency p50: public {results['public']['latency_p50_s']} s, "
+            f"compact {results['compact']['latency_p50_s']} s"
+        )
+    if save:
+        RESULTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        RESULTS_PATH.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
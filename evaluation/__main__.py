@@ -2,6 +2,7 @@ import click
 
 from evaluation.tools.batch_analyse import main as batch_analyse_main
 from evaluation.tools.evaluate import generate_report_cli
+from frazer import configure
 
 
 @click.group()
@@ -17,4 +18,5 @@ cli.add_command(batch_analyse_main, name="batch-analyse")
 
 
 if __name__ == "__main__":
+    configure()
     cli()
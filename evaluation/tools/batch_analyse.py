@@ -1,149 +1,493 @@
 import csv
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
-from typing import NamedTuple
+from typing import TYPE_CHECKING, TypeVar
 
 import click
 
-from frazer.analyser import AnalysedSentence, analyse_sentence
-
-PARALLEL_REQUESTS = 8
+from evaluation.tools.checkpoint import CheckpointJournal
+from evaluation.tools.offline_batch import (
+    LocalBatchClient,
+    analyse_input_records_offline,
+)
+from evaluation.tools.records import AnalysedSentenceRecord, InputRecord
+from evaluation.tools.scheduler import AdaptiveScheduler, estimate_prompt_tokens
+from frazer import analyser, configure
+from frazer.analyser import (
+    AnalysedSentence,
+    AnalysedWord,
+    analyse_sentence,
+    clean_sentence,
+)
+from frazer.backends import Backend, backend_from_env
+from frazer.batching import (
+    DEFAULT_TOKEN_BUDGET,
+    analyse_batch,
+    estimate_tokens,
+    plan_batches,
+)
+from frazer.cascade import parse_models
+from frazer.lexicon import Lexicon, default_lexicon
+from frazer.memo import WordMemo
 
+if TYPE_CHECKING:
+    import pyarrow as pa
 
-class InputRecord(NamedTuple):
-    id: int
-    sentence: str
+PARALLEL_REQUESTS = 8
 
+# Tasks submitted per worker ahead of the oldest one still running.
+IN_FLIGHT_PER_WORKER = 4
 
-class AnalysedSentenceRecord(NamedTuple):
-    id: int
-    analysed_sentence: AnalysedSentence
+T = TypeVar("T")
+R = TypeVar("R")
 
 
-def read_input_sentences(input_path: Path) -> list[InputRecord]:
+def read_input_sentences(input_path: Path) -> Iterator[InputRecord]:
     """
-    Reads input sentences from a CSV file and returns a list of InputRecord objects.
+    Lazily reads input sentences from a CSV file.
 
     Args:
         input_path (Path): The path to the input CSV file. The file is expected to have
             columns "id" (integer) and "sentence" (string).
 
     Returns:
-        list[InputRecord]: A list of InputRecord objects, each containing an
+        Iterator[InputRecord]: InputRecord objects, each containing an
         "id" and a "sentence".
     """
-    input_records = []
     with input_path.open("r", encoding="utf-8") as file:
         reader = csv.DictReader(file)
         for row in reader:
-            input_record = InputRecord(id=int(row["id"]), sentence=row["sentence"])
-            input_records.append(input_record)
-    return input_records
+            yield InputRecord(id=int(row["id"]), sentence=row["sentence"])
+
+
+def map_bounded(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = PARALLEL_REQUESTS,
+    window: int | None = None,
+) -> Iterator[R]:
+    """
+    Apply a function to items in parallel, yielding results in input order.
+    At most `window` items are consumed ahead of the results yielded.
+    """
+    window = window or IN_FLIGHT_PER_WORKER * max_workers
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight: deque[Future[R]] = deque()
+        for item in items:
+            if len(in_flight) >= window:
+                yield in_flight.popleft().result()
+            in_flight.append(executor.submit(func, item))
+        while in_flight:
+            yield in_flight.popleft().result()
 
 
 def analyse_input_records(
-    input_records: list[InputRecord],
-) -> list[AnalysedSentenceRecord]:
+    input_records: Iterable[InputRecord],
+    word_memo: WordMemo | None = None,
+    lexicon: Lexicon | None = None,
+    journal: CheckpointJournal | None = None,
+    scheduler: AdaptiveScheduler | None = None,
+) -> Iterator[AnalysedSentenceRecord]:
     """
-    Batch analyse a list of input records by processing their sentences in parallel.
+    Batch analyse input records by processing their sentences in parallel.
 
     Args:
-        input_records (list[InputRecord]): A list of input records.
+        input_records (Iterable[InputRecord]): Input records.
+        word_memo (WordMemo | None): Memo of word analyses shared across sentences.
+        lexicon (Lexicon | None): Lexicon of the words tagged without the model.
+        journal (CheckpointJournal | None): Journal recording each analysis,
+            from which the analyses of a resumed run are taken.
+        scheduler (AdaptiveScheduler | None): Scheduler pacing and retrying the
+            requests, by default up to PARALLEL_REQUESTS concurrent ones.
 
     Returns:
-        list[AnalysedSentenceRecord]: A list of analysed sentence records.
+        Iterator[AnalysedSentenceRecord]: Analysed sentence records, in input order.
     """
 
     def analyse_sentence_wrapper(
         input_record: InputRecord,
     ) -> AnalysedSentenceRecord | None:
+        if journal is not None:
+            journaled = journal.get(input_record)
+            if journaled is not None:
+                return journaled
         try:
-            return AnalysedSentenceRecord(
-                id=input_record.id,
-                analysed_sentence=analyse_sentence(input_record.sentence),
+            analysed_sentence = scheduler.run(
+                lambda: analyse_sentence(
+                    input_record.sentence, word_memo=word_memo, lexicon=lexicon
+                ),
+                tokens=prompt_tokens + estimate_tokens(input_record.sentence),
+            )
+            analysed_record = AnalysedSentenceRecord(
+                id=input_record.id, analysed_sentence=analysed_sentence
             )
         except Exception as e:
             click.echo(f"Error analyzing input sentence '{input_record.sentence}': {e}")
             return None
+        if journal is not None:
+            journal.append(input_record, analysed_record)
+        return analysed_record
 
+    scheduler = scheduler or AdaptiveScheduler(PARALLEL_REQUESTS)
+    prompt_tokens = estimate_prompt_tokens()
     # Run analyses in parallel
-    with ThreadPoolExecutor(max_workers=PARALLEL_REQUESTS) as executor:
-        analyzed_sentences = list(
-            filter(None, executor.map(analyse_sentence_wrapper, input_records))
-        )
+    yield from filter(
+        None,
+        map_bounded(
+            analyse_sentence_wrapper,
+            input_records,
+            max_workers=scheduler.max_concurrency,
+        ),
+    )
 
-    return analyzed_sentences
+
+def analyse_input_records_batched(
+    input_records: Iterable[InputRecord],
+    token_budget: int,
+    journal: CheckpointJournal | None = None,
+    scheduler: AdaptiveScheduler | None = None,
+) -> Iterator[AnalysedSentenceRecord]:
+    """
+    Batch analyse input records packing several sentences in each request,
+    with the batches processed in parallel.
+
+    Args:
+        input_records (Iterable[InputRecord]): Input records.
+        token_budget (int): Estimated output tokens allowed per request.
+        journal (CheckpointJournal | None): Journal recording each analysis,
+            from which the analyses of a resumed run are taken.
+        scheduler (AdaptiveScheduler | None): Scheduler pacing and retrying the
+            requests, by default up to PARALLEL_REQUESTS concurrent ones.
+
+    Returns:
+        Iterator[AnalysedSentenceRecord]: Analysed sentence records, in input order.
+    """
+
+    def analyse_batch_wrapper(
+        record_batch: list[InputRecord],
+    ) -> list[AnalysedSentenceRecord]:
+        analysed = {}
+        if journal is not None:
+            for record in record_batch:
+                journaled = journal.get(record)
+                if journaled is not None:
+                    analysed[record.id] = journaled
+        pending = [record for record in record_batch if record.id not in analysed]
+        input_cleans = [clean_sentence(record.sentence) for record in pending]
+        tokens = prompt_tokens + sum(map(estimate_tokens, input_cleans))
+        try:
+            sentences = (
+                scheduler.run(lambda: analyse_batch(input_cleans), tokens=tokens)
+                if pending
+                else []
+            )
+        except Exception as e:
+            ids = [record.id for record in pending]
+            click.echo(f"Error analyzing batch of input sentences {ids}: {e}")
+            sentences = []
+        for record, sentence in zip(pending, sentences):
+            analysed[record.id] = AnalysedSentenceRecord(
+                id=record.id, analysed_sentence=sentence
+            )
+            if journal is not None:
+                journal.append(record, analysed[record.id])
+        return [analysed[record.id] for record in record_batch if record.id in analysed]
+
+    scheduler = scheduler or AdaptiveScheduler(PARALLEL_REQUESTS)
+    prompt_tokens = estimate_prompt_tokens()
+    record_batches = plan_batches(
+        input_records, token_budget, key=lambda record: record.sentence
+    )
+    for batch in map_bounded(
+        analyse_batch_wrapper, record_batches, max_workers=scheduler.max_concurrency
+    ):
+        yield from batch
+
+
+OUTPUT_COLUMNS = [
+    "sentence_id",
+    "word_pos",
+    "original_value",
+    "root",
+    "original_value_translation",
+    "syntactic_category",
+    "other_syntactic_category",
+    "aspect",
+    "conjugation",
+    "object",
+    "declension_case",
+    "word_causing_declension",
+    "gender",
+    "number",
+    "subtype",
+]
+# Columns of a few distinct labels, dictionary-encoded in Parquet files and
+# read back as categoricals.
+CATEGORICAL_COLUMNS = {
+    "syntactic_category",
+    "aspect",
+    "conjugation",
+    "declension_case",
+    "gender",
+    "number",
+    "subtype",
+}
+OUTPUT_FORMATS = ["csv", "parquet"]
+# Words written to a Parquet file at once.
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+
+def word_rows(sentence_id: int, analysed_sentence: AnalysedSentence) -> Iterator[tuple]:
+    """
+    The words of an analysed sentence as rows of the OUTPUT_COLUMNS. The
+    enumerations are str enums, written as their value by both formats.
+    """
+    for pos, word in enumerate(analysed_sentence.words):
+        fields = vars(word)
+        conjugation = fields.get("conjugation")
+        yield (
+            sentence_id,
+            pos,
+            word.original_value,
+            word.root,
+            word.original_value_translation,
+            word.syntatic_category,
+            word.other_syntatic_category,
+            fields.get("aspect"),
+            None if conjugation is None else str(conjugation),
+            fields.get("object"),
+            fields.get("declension_case"),
+            fields.get("word_causing_declension"),
+            fields.get("gender"),
+            fields.get("number"),
+            fields.get("subtype"),
+        )
 
 
 def save_analysed_sentences(
-    analysed_records: list[AnalysedSentenceRecord], output_file: Path
+    analysed_records: Iterable[AnalysedSentenceRecord],
+    output_file: Path,
+    format: str = "csv",
 ) -> None:
     """
-    Save a list of analysed sentences in a CSV file.
+    Save analysed sentences, one row per word, as they come: a CSV file is
+    flushed after each sentence and a Parquet file after each row group, so that
+    the progress survives an interrupted run.
 
     Args:
-        analyzed_records (list[AnalysedSentenceRecord]): List of analyzed sentences.
-        output_file (Path): Path to the output CSV file.
-    """
-    header = [
-        "sentence_id",
-        "word_pos",
-        "original_value",
-        "root",
-        "original_value_translation",
-        "syntactic_category",
-        "other_syntactic_category",
-        "aspect",
-        "conjugation",
-        "object",
-        "declension_case",
-        "word_causing_declension",
-        "gender",
-        "number",
-        "subtype",
-    ]
-
+        analyzed_records (Iterable[AnalysedSentenceRecord]): Analyzed sentences.
+        output_file (Path): Path to the output file.
+        format (str): "csv" or "parquet", a columnar file whose enumerations
+            are dictionary-encoded. Parquet requires pyarrow.
+    """
+    if format == "parquet":
+        save_analysed_sentences_parquet(analysed_records, output_file)
+        return
     with open(output_file, mode="w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=header)
-        writer.writeheader()
+        writer = csv.writer(csvfile)
+        writer.writerow(OUTPUT_COLUMNS)
+        for sentence_id, analysed_sentence in analysed_records:
+            writer.writerows(word_rows(sentence_id, analysed_sentence))
+            csvfile.flush()
+
+
+def parquet_schema() -> "pa.Schema":
+    import pyarrow as pa
+
+    types = {"sentence_id": pa.int64(), "word_pos": pa.int32()}
+    return pa.schema(
+        [
+            (
+                column,
+                types.get(column)
+                or (
+                    pa.dictionary(pa.int32(), pa.string())
+                    if column in CATEGORICAL_COLUMNS
+                    else pa.string()
+                ),
+            )
+            for column in OUTPUT_COLUMNS
+        ]
+    )
+
+
+def word_columns(
+    words: list[tuple[int, int, AnalysedWord]],
+) -> dict[str, list]:
+    """
+    Same values as `word_rows`, as the OUTPUT_COLUMNS of the words given with
+    their sentence id and position, built a column at a time.
+    """
+    fields = [vars(word) for _, _, word in words]
+    conjugations = [field.get("conjugation") for field in fields]
+    columns: dict[str, list] = {
+        "sentence_id": [sentence_id for sentence_id, _, _ in words],
+        "word_pos": [pos for _, pos, _ in words],
+        "conjugation": [None if c is None else str(c) for c in conjugations],
+    }
+    renamed = {
+        "syntactic_category": "syntatic_category",
+        "other_syntactic_category": "other_syntatic_category",
+    }
+    for column in OUTPUT_COLUMNS:
+        if column not in columns:
+            key = renamed.get(column, column)
+            columns[column] = [field.get(key) for field in fields]
+    return columns
+
+
+def save_analysed_sentences_parquet(
+    analysed_records: Iterable[AnalysedSentenceRecord], output_file: Path
+) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema()
+
+    def write(writer: pq.ParquetWriter, words: list) -> None:
+        columns = word_columns(words)
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+
+    with pq.ParquetWriter(output_file, schema) as writer:
+        words: list[tuple[int, int, AnalysedWord]] = []
         for sentence_id, analysed_sentence in analysed_records:
-            for pos, word in enumerate(analysed_sentence.words):
-                writer.writerow(
-                    {
-                        "sentence_id": sentence_id,
-                        "word_pos": pos,
-                        "original_value": word.original_value,
-                        "root": word.root,
-                        "original_value_translation": (word.original_value_translation),
-                        "syntactic_category": word.syntatic_category,
-                        "other_syntactic_category": getattr(
-                            word, "other_syntatic_category", None
-                        ),
-                        "aspect": getattr(word, "aspect", None),
-                        "conjugation": getattr(word, "conjugation", None),
-                        "object": getattr(word, "object", None),
-                        "declension_case": getattr(word, "declension_case", None),
-                        "word_causing_declension": getattr(
-                            word, "word_causing_declension", None
-                        ),
-                        "gender": getattr(word, "gender", None),
-                        "number": getattr(word, "number", None),
-                        "subtype": getattr(word, "subtype", None),
-                    }
-                )
-
-
-def batch_analyse(input: Path, output: Path) -> None:
-    """
-    Analyze sentences from an input CSV file and save results to an output CSV file.
+            words.extend(
+                (sentence_id, pos, word)
+                for pos, word in enumerate(analysed_sentence.words)
+            )
+            if len(words) >= PARQUET_ROW_GROUP_SIZE:
+                write(writer, words)
+                words = []
+        if words:
+            write(writer, words)
+
+
+def batch_analyse(
+    input: Path,
+    output: Path,
+    word_memo: bool = False,
+    lexicon: bool = False,
+    token_budget: int | None = None,
+    mode: str = "online",
+    work_dir: Path | None = None,
+    poll_interval: float = 60.0,
+    checkpoint: Path | None = None,
+    resume: bool = False,
+    max_concurrency: int = PARALLEL_REQUESTS,
+    tpm_limit: int | None = None,
+    backend: Backend | None = None,
+    cascade: list[str] | None = None,
+    format: str = "csv",
+) -> None:
+    """
+    Analyze sentences from an input CSV file and save results to an output file.
 
     Args:
         input (Path): Path to the input CSV file.
         output (Path): Path to the output CSV file.
+        word_memo (bool): Reuse word analyses across sentences of the run.
+        lexicon (bool): Tag closed-class words with the bundled lexicon instead
+            of requesting them.
+        token_budget (int | None): If given, pack several sentences per request
+            within this budget of estimated output tokens.
+        mode (str): "online" to request analyses in real time, "offline" to
+            submit them through the Batch API.
+        work_dir (Path | None): Directory keeping the state of offline batches,
+            by default next to the output file.
+        poll_interval (float): Seconds between checks of offline batches.
+        checkpoint (Path | None): Journal of the completed analyses of an online
+            run, by default next to the output file.
+        resume (bool): Take the analyses already in the journal instead of
+            requesting them again.
+        max_concurrency (int): Upper bound of concurrent online requests.
+        tpm_limit (int | None): Tokens per minute quota online requests stay in.
+        backend (Backend | None): Backend serving the analyses, by default the
+            one configured by the environment.
+        cascade (list[str] | None): Models of the backend analysing each
+            sentence in turn, cheapest first, until one's analysis passes the
+            consistency checks. Online runs analysing a sentence per request
+            only.
+        format (str): Format of the output file, "csv" or "parquet".
     """
+    if mode == "offline":
+        online_options = {
+            "--word-memo": word_memo,
+            "--lexicon": lexicon,
+            "--token-budget": token_budget is not None,
+            "--cascade": cascade,
+            "--checkpoint": checkpoint is not None,
+            "--resume": resume,
+        }
+        used = [option for option, value in online_options.items() if value]
+        if used:
+            raise click.UsageError(
+                f"Offline runs don't support {', '.join(used)}, "
+                "their batches are resumed from --work-dir"
+            )
+    # Keep a connection alive for each concurrent request
+    settings = analyser.client_settings.sized_for(max_concurrency)
+    if mode == "online":
+        # The scheduler retries and backs off on rate limits and transient
+        # errors, retries of the clients would hide them from it.
+        settings = replace(settings, max_retries=0)
+    analyser.configure_clients(settings, new_backend=backend)
+    if cascade:
+        analyser.use_cascade(cascade)
     input_records = read_input_sentences(input_path=input)
-    analysed_records = analyse_input_records(input_records=input_records)
-    save_analysed_sentences(analysed_records=analysed_records, output_file=output)
+    if mode == "offline":
+        analysed_records = analyse_input_records_offline(
+            input_records=input_records,
+            work_dir=work_dir or output.with_suffix(".batch"),
+            # Servers other than OpenAI's don't implement the Batch API
+            client=None
+            if analyser.get_backend().supports_batches
+            else LocalBatchClient(),
+            poll_interval=poll_interval,
+        )
+        save_analysed_sentences(
+            analysed_records=analysed_records, output_file=output, format=format
+        )
+        return
+
+    journal = CheckpointJournal(
+        checkpoint or output.with_suffix(".journal.jsonl"), resume=resume
+    )
+    scheduler = AdaptiveScheduler(max_concurrency, tpm_limit=tpm_limit)
+    try:
+        if token_budget is not None:
+            analysed_records = analyse_input_records_batched(
+                input_records=input_records,
+                token_budget=token_budget,
+                journal=journal,
+                scheduler=scheduler,
+            )
+        else:
+            analysed_records = analyse_input_records(
+                input_records=input_records,
+                word_memo=WordMemo() if word_memo else None,
+                lexicon=default_lexicon() if lexicon else None,
+                journal=journal,
+                scheduler=scheduler,
+            )
+        save_analysed_sentences(
+            analysed_records=analysed_records, output_file=output, format=format
+        )
+    finally:
+        journal.close()
+    usage = analyser.usage_stats
+    click.echo(
+        f"Prompt tokens: {usage.prompt_tokens}, "
+        f"{usage.cached_ratio:.0%} served from the prompt cache"
+    )
+    stats = analyser.get_cascade().stats
+    for tier, model in enumerate(analyser.get_cascade().models[: len(stats.requests)]):
+        click.echo(
+            f"Cascade tier {tier} ({model}): {stats.requests[tier]} analyses, "
+            f"{stats.hit_rate(tier):.0%} of the sentences answered"
+        )
 
 
 @click.command()
@@ -157,14 +501,153 @@ def batch_analyse(input: Path, output: Path) -> None:
     "--output",
     type=click.Path(path_type=Path),
     required=True,
-    help="Path to the output CSV file.",
+    help="Path to the output file.",
+)
+@click.option(
+    "--format",
+    "format",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="csv",
+    show_default=True,
+    help="Format of the output file; parquet is columnar and much smaller.",
+)
+@click.option(
+    "--word-memo",
+    is_flag=True,
+    default=False,
+    help="Reuse analyses of words already seen in the same context.",
+)
+@click.option(
+    "--lexicon",
+    is_flag=True,
+    default=False,
+    help="Tag prepositions, conjunctions, particles and pronouns locally.",
 )
-def main(input: Path, output: Path) -> None:
+@click.option(
+    "--token-budget",
+    type=int,
+    default=None,
+    help=(
+        "Pack several sentences per request, within this estimate of output "
+        f"tokens (e.g. {DEFAULT_TOKEN_BUDGET})."
+    ),
+)
+@click.option(
+    "--mode",
+    type=click.Choice(["online", "offline"]),
+    default="online",
+    help="Analyse in real time or through the Batch API.",
+)
+@click.option(
+    "--work-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Directory of the offline batches state, reused to resume a run.",
+)
+@click.option(
+    "--poll-interval",
+    type=float,
+    default=60.0,
+    help="Seconds between checks of the offline batches status.",
+)
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Journal of completed analyses (default: next to the output file).",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Skip the sentences already analysed in the checkpoint journal.",
+)
+@click.option(
+    "--max-concurrency",
+    type=int,
+    default=PARALLEL_REQUESTS,
+    show_default=True,
+    help="Upper bound of concurrent requests, lowered on rate limits.",
+)
+@click.option(
+    "--tpm-limit",
+    type=int,
+    default=None,
+    help="Tokens per minute quota to stay within.",
+)
+@click.option(
+    "--backend",
+    "backend_name",
+    type=click.Choice(["openai", "local", "fake"]),
+    default=None,
+    help="Backend serving the analyses, by default set by FRAZER_BACKEND.",
+)
+@click.option(
+    "--model", default=None, help="Model of the backend, by default FRAZER_MODEL."
+)
+@click.option(
+    "--cascade",
+    default=None,
+    help=(
+        "Comma-separated models analysing each sentence in turn, cheapest "
+        "first, escalating when the consistency checks fail."
+    ),
+)
+@click.option(
+    "--base-url",
+    default=None,
+    help="URL of the OpenAI-compatible server of the local backend.",
+)
+def main(
+    input: Path,
+    output: Path,
+    format: str,
+    word_memo: bool,
+    lexicon: bool,
+    token_budget: int | None,
+    mode: str,
+    work_dir: Path | None,
+    poll_interval: float,
+    checkpoint: Path | None,
+    resume: bool,
+    max_concurrency: int,
+    tpm_limit: int | None,
+    backend_name: str | None,
+    model: str | None,
+    cascade: str | None,
+    base_url: str | None,
+) -> None:
     """
-    Analyze sentences from an input CSV file and save results to an output CSV file.
+    Analyze sentences from an input CSV file and save results to an output file.
     """
-    batch_analyse(input=input, output=output)
+    backend = None
+    if backend_name or model or base_url:
+        # The options override the backend configured by the environment
+        try:
+            backend = backend_from_env(backend_name, model=model, base_url=base_url)
+        except ValueError as e:
+            raise click.UsageError(str(e)) from e
+        if base_url and backend.name != "local":
+            raise click.UsageError("--base-url is only used by the local backend")
+    batch_analyse(
+        input=input,
+        output=output,
+        word_memo=word_memo,
+        lexicon=lexicon,
+        token_budget=token_budget,
+        mode=mode,
+        work_dir=work_dir,
+        poll_interval=poll_interval,
+        checkpoint=checkpoint,
+        resume=resume,
+        max_concurrency=max_concurrency,
+        tpm_limit=tpm_limit,
+        backend=backend,
+        cascade=parse_models(cascade) if cascade else None,
+        format=format,
+    )
 
 
 if __name__ == "__main__":
+    configure()
     main()
@@ -0,0 +1,84 @@
+import json
+import threading
+from pathlib import Path
+
+from evaluation.tools.records import AnalysedSentenceRecord, InputRecord
+from frazer.analyser import AnalysedSentence, clean_sentence, sentence_cache_key
+
+
+def record_hash(input_record: InputRecord) -> str:
+    """
+    Hash of a record's sentence together with the model and prompt, so that
+    journal entries are only reused while the analysis would be the same.
+    """
+    return sentence_cache_key(clean_sentence(input_record.sentence))
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal of the analyses completed by a run. Only the
+    position of each entry is kept in memory: analyses are read back from the
+    file when a resumed run needs them. Later entries for an id win.
+    """
+
+    def __init__(self, path: Path, resume: bool = False) -> None:
+        self.path = path
+        self.index: dict[int, tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and path.exists():
+            self._load_index()
+        self._file = path.open("ab" if resume else "wb")
+
+    def _load_index(self) -> None:
+        offset = 0
+        with self.path.open("rb+") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                entry = json.loads(line)
+                self.index[entry["id"]] = (entry["hash"], offset)
+                offset += len(line)
+            # Drop the partially written entry of an interrupted run
+            file.truncate(offset)
+
+    def get(self, input_record: InputRecord) -> AnalysedSentenceRecord | None:
+        """The journaled analysis of a record, None if missing or outdated."""
+        entry = self.index.get(input_record.id)
+        if entry is None:
+            return None
+        sentence_hash, offset = entry
+        try:
+            if sentence_hash != record_hash(input_record):
+                return None
+        except ValueError:
+            return None
+        with self.path.open("rb") as file:
+            file.seek(offset)
+            line = file.readline()
+        return AnalysedSentenceRecord(
+            id=input_record.id,
+            analysed_sentence=AnalysedSentence.model_validate(
+                json.loads(line)["analysed_sentence"]
+            ),
+        )
+
+    def append(
+        self, input_record: InputRecord, analysed_record: AnalysedSentenceRecord
+    ) -> None:
+        entry = {
+            "id": input_record.id,
+            "hash": record_hash(input_record),
+            "analysed_sentence": analysed_record.analysed_sentence.model_dump(
+                mode="json"
+            ),
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            self.index[input_record.id] = (entry["hash"], offset)
+
+    def close(self) -> None:
+        self._file.close()
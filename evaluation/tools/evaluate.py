@@ -1,17 +1,41 @@
+import shutil
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
 import click
 import pandas as pd
 
-from evaluation.tools.batch_analyse import batch_analyse
-from evaluation.tools.metrics import calculate_metrics, diff_datasets
+from evaluation.tools.batch_analyse import OUTPUT_FORMATS, batch_analyse
+from evaluation.tools.metrics import (
+    compare_datasets,
+    diff_dataframes,
+    read_dataset,
+    save_dataset,
+)
+from frazer import analyser, configure
+from frazer.cascade import parse_models
+
+JOURNAL_NAME = "analysed.journal.jsonl"
+
+
+def find_previous_journal(output_root: Path, current_dir: Path) -> Path | None:
+    """Journal of the most recent run under the output folder, if any."""
+    journals = sorted(
+        journal
+        for journal in output_root.glob(f"*/{JOURNAL_NAME}")
+        if journal.parent != current_dir
+    )
+    return journals[-1] if journals else None
 
 
 def generate_report(
     input_sentences: Path,
     baseline: Path,
     run_name: str = "",
+    reuse: bool = False,
+    cascade: list[str] | None = None,
+    format: str = "csv",
 ) -> None:
     """
     Generate a CSV report by analyzing input sentences, calculating metrics,
@@ -21,24 +45,62 @@ def generate_report(
         input_sentences (Path): Path to the input CSV file.
         run_name (str): Name of the run to create a subfolder under output.
         baseline (Path): Path to the baseline CSV file.
+        reuse (bool): Reuse the analyses of the previous run for sentences
+            whose input, model and prompt haven't changed.
+        cascade (list[str] | None): Models analysing each sentence in turn,
+            cheapest first, escalating when the consistency checks fail.
+        format (str): Format of the analysed words and their diff, "csv" or
+            "parquet".
     """
     timestamp = datetime.now(tz=timezone.utc).strftime("%Y%m%d_%H%M%S")
     suffix = f"_{run_name}" if run_name else ""
-    output_dir = Path(f"evaluation/output/{timestamp}{suffix}")
+    output_root = Path("evaluation/output")
+    output_dir = output_root / f"{timestamp}{suffix}"
     output_dir.mkdir(parents=True, exist_ok=True)
-    output_analysed = output_dir / "analysed.csv"
+    output_analysed = output_dir / f"analysed.{format}"
+    output_journal = output_dir / JOURNAL_NAME
     output_metrics = output_dir / "words_metrics.csv"
-    output_diff = output_dir / "diff.csv"
+    output_diff = output_dir / f"diff.{format}"
+    output_run = output_dir / "run.csv"
 
-    batch_analyse(input=input_sentences, output=output_analysed)
+    previous_journal = find_previous_journal(output_root, output_dir)
+    if reuse and previous_journal is not None:
+        shutil.copyfile(previous_journal, output_journal)
 
-    metrics = calculate_metrics(baseline, output_analysed)
+    started = time.perf_counter()
+    batch_analyse(
+        input=input_sentences,
+        output=output_analysed,
+        checkpoint=output_journal,
+        resume=reuse,
+        cascade=cascade,
+        format=format,
+    )
+    elapsed = time.perf_counter() - started
+
+    baseline_df = read_dataset(baseline)
+    analysed_df = read_dataset(output_analysed)
+    metrics = compare_datasets(baseline_df, analysed_df)
     metrics_df = pd.DataFrame.from_dict(metrics, orient="index")
     metrics_df.to_csv(output_metrics, index_label="dimension")
 
     # Save the diff between baseline and analysed
-    diff_df = diff_datasets(baseline, output_analysed)
-    diff_df.to_csv(output_diff, index=False)
+    diff_df = diff_dataframes(baseline_df, analysed_df)
+    save_dataset(diff_df, output_diff)
+
+    # Save the latency and cost of the run, to weigh them against the metrics
+    sentences = analysed_df["sentence_id"].nunique()
+    usage = analyser.usage_stats
+    run = {
+        "models": analyser.get_cascade().name(analyser.get_backend().model),
+        "sentences": sentences,
+        "elapsed_s": round(elapsed, 3),
+        "s_per_sentence": round(elapsed / sentences, 3) if sentences else None,
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        **analyser.get_cascade().stats.as_dict(),
+    }
+    pd.DataFrame([run]).to_csv(output_run, index=False)
 
 
 @click.command()
@@ -60,7 +122,36 @@ def generate_report(
     default="evaluation/output/baseline.csv",
     help="Path to the baseline CSV file.",
 )
-def generate_report_cli(input_sentences: Path, run_name: str, baseline: Path) -> None:
+@click.option(
+    "--reuse",
+    is_flag=True,
+    default=False,
+    help="Reuse unchanged analyses from the previous run.",
+)
+@click.option(
+    "--cascade",
+    default=None,
+    help=(
+        "Comma-separated models analysing each sentence in turn, cheapest "
+        "first, escalating when the consistency checks fail."
+    ),
+)
+@click.option(
+    "--format",
+    "format",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="csv",
+    show_default=True,
+    help="Format of the analysed words and their diff.",
+)
+def generate_report_cli(
+    input_sentences: Path,
+    run_name: str,
+    baseline: Path,
+    reuse: bool,
+    cascade: str | None,
+    format: str,
+) -> None:
     """
     CLI command to generate a CSV report by analyzing input
     sentences, calculating metrics, and saving the results.
@@ -69,8 +160,12 @@ def generate_report_cli(input_sentences: Path, run_name: str, baseline: Path) ->
         input_sentences=input_sentences,
         run_name=run_name,
         baseline=baseline,
+        reuse=reuse,
+        cascade=parse_models(cascade) if cascade else None,
+        format=format,
     )
 
 
 if __name__ == "__main__":
+    configure()
     generate_report_cli()
@@ -1,7 +1,8 @@
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from sklearn.metrics import classification_report
+from pandas.api.types import union_categoricals
 
 EVALUTION_DIMENSIONS = [
     "root",
@@ -18,6 +19,149 @@ EVALUTION_DIMENSIONS = [
     "subtype",
 ]
 
+MISSING_LABEL = "N/A"
+
+
+def read_dataset(path: Path) -> pd.DataFrame:
+    """
+    Read an analysed words CSV or Parquet file, told apart by their suffix. The
+    enumerations of a Parquet file are read as categoricals.
+
+    Args:
+        path (Path): Path to the CSV or Parquet file.
+
+    Returns:
+        pd.DataFrame: The words, one per row.
+    """
+    if Path(path).suffix == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def save_dataset(df: pd.DataFrame, path: Path) -> None:
+    """
+    Save words in a CSV or Parquet file, told apart by their suffix.
+
+    Args:
+        df (pd.DataFrame): The words, one per row.
+        path (Path): Path to the CSV or Parquet file.
+    """
+    if Path(path).suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def labels(column: pd.Series) -> pd.Series:
+    """The labels of a column, categoricals decoded to compare them with any."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.astype(object)
+    return column
+
+
+def check_datasets(baseline: pd.DataFrame, new: pd.DataFrame) -> None:
+    assert set(baseline.columns) == set(new.columns), "CSV column mismatch"
+    assert len(baseline) == len(new), "CSV row count mismatch"
+
+
+def concat_labels(baseline: pd.Series, new: pd.Series) -> pd.Series:
+    """
+    The labels of a dimension in both datasets, one after the other, missing
+    ones replaced by MISSING_LABEL. Categoricals, as read from Parquet files,
+    are concatenated without decoding them.
+    """
+    if all(isinstance(column.dtype, pd.CategoricalDtype) for column in (baseline, new)):
+        values = pd.Series(union_categoricals([baseline, new], ignore_order=True))
+        if MISSING_LABEL not in values.cat.categories:
+            values = values.cat.add_categories(MISSING_LABEL)
+        return values.fillna(MISSING_LABEL)
+    values = pd.concat([labels(baseline), labels(new)], ignore_index=True)
+    return values.astype(object).fillna(MISSING_LABEL)
+
+
+def encode_labels(
+    baseline: pd.DataFrame, new: pd.DataFrame
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Encode the labels of every dimension as integers unique across dimensions,
+    so that all of them can be counted at once.
+
+    Args:
+        baseline (pd.DataFrame): Baseline words.
+        new (pd.DataFrame): New words, in the same order.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The baseline and new label
+            codes of all the dimensions, one after the other, and the dimension
+            of each code.
+    """
+    rows = len(baseline)
+    true_codes = np.empty(rows * len(EVALUTION_DIMENSIONS), dtype=np.int64)
+    pred_codes = np.empty_like(true_codes)
+    dimensions = []
+    offset = 0
+    for pos, column in enumerate(EVALUTION_DIMENSIONS):
+        codes, uniques = pd.factorize(
+            concat_labels(baseline[column], new[column]), use_na_sentinel=False
+        )
+        true_codes[pos * rows : (pos + 1) * rows] = codes[:rows] + offset
+        pred_codes[pos * rows : (pos + 1) * rows] = codes[rows:] + offset
+        dimensions.append(np.full(len(uniques), pos))
+        offset += len(uniques)
+    return true_codes, pred_codes, np.concatenate(dimensions)
+
+
+def compare_datasets(baseline: pd.DataFrame, new: pd.DataFrame) -> dict[str, dict]:
+    """
+    Calculate the metrics of every evaluation dimension in a single pass: the
+    precision, recall and F1-score of each label, averaged weighted by the
+    support of the labels, as `classification_report` of scikit-learn does.
+
+    Args:
+        baseline (pd.DataFrame): Baseline words.
+        new (pd.DataFrame): New words, in the same order.
+
+    Returns:
+        dict[str, dict]: Precision, recall, F1-score and support by dimension.
+    """
+    check_datasets(baseline, new)
+    true_codes, pred_codes, label_dimensions = encode_labels(baseline, new)
+    n_labels = len(label_dimensions)
+    support = np.bincount(true_codes, minlength=n_labels).astype(float)
+    predicted = np.bincount(pred_codes, minlength=n_labels).astype(float)
+    matches = np.bincount(
+        true_codes[true_codes == pred_codes], minlength=n_labels
+    ).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, matches / predicted, 0.0)
+        recall = np.where(support > 0, matches / support, 0.0)
+        f1 = np.where(
+            precision + recall > 0,
+            2 * precision * recall / (precision + recall),
+            0.0,
+        )
+
+    def weighted(values: np.ndarray) -> np.ndarray:
+        return np.bincount(
+            label_dimensions,
+            weights=values * support,
+            minlength=len(EVALUTION_DIMENSIONS),
+        )
+
+    total = weighted(np.ones(n_labels))
+    precisions = weighted(precision) / total
+    recalls = weighted(recall) / total
+    f1s = weighted(f1) / total
+    return {
+        column: {
+            "precision": float(precisions[pos]),
+            "recall": float(recalls[pos]),
+            "f1": float(f1s[pos]),
+            "support": float(total[pos]),
+        }
+        for pos, column in enumerate(EVALUTION_DIMENSIONS)
+    }
+
 
 def calculate_metrics(baseline_path: Path, new_path: Path) -> dict[str, dict]:
     """
@@ -25,32 +169,31 @@ def calculate_metrics(baseline_path: Path, new_path: Path) -> dict[str, dict]:
     is consists of precision, recall, F1-score and support.
 
     Args:
-        baseline_path (Path): Path to the baseline CSV file.
-        new_path (Path): Path to the new CSV file.
+        baseline_path (Path): Path to the baseline CSV or Parquet file.
+        new_path (Path): Path to the new CSV or Parquet file.
 
     Returns:
         dict[str, dict]: A dictionary where each key corresponds to an evaluation
     """
-    baseline = pd.read_csv(baseline_path)
-    new = pd.read_csv(new_path)
+    return compare_datasets(read_dataset(baseline_path), read_dataset(new_path))
 
-    assert set(baseline.columns) == set(new.columns), "CSV column mismatch"
-    results = {}
-    for column in EVALUTION_DIMENSIONS:
-        baseline[column] = baseline[column].fillna("N/A")
-        new[column] = new[column].fillna("N/A")
-        report = classification_report(
-            baseline[column], new[column], output_dict=True, zero_division=0
-        )
 
-        results[column] = {
-            "precision": report["weighted avg"]["precision"],
-            "recall": report["weighted avg"]["recall"],
-            "f1": report["weighted avg"]["f1-score"],
-            "support": report["weighted avg"]["support"],
-        }
+def diff_dataframes(baseline: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """
+    Same as `diff_datasets`, for datasets already read.
 
-    return results
+    Args:
+        baseline (pd.DataFrame): Baseline words.
+        new (pd.DataFrame): New words, in the same order.
+
+    Returns:
+        pd.DataFrame: DataFrame with empty matches and new value for differences.
+    """
+    check_datasets(baseline, new)
+    diff = new.copy()
+    for col in EVALUTION_DIMENSIONS:
+        diff[col] = new[col].where(labels(new[col]) != labels(baseline[col]))
+    return diff
 
 
 def diff_datasets(baseline_path: Path, new_path: Path) -> pd.DataFrame:
@@ -59,20 +202,10 @@ def diff_datasets(baseline_path: Path, new_path: Path) -> pd.DataFrame:
     For each cell, output only values that don't match.
 
     Args:
-        baseline_path (Path): Path to the baseline CSV file.
-        new_path (Path): Path to the new CSV file.
+        baseline_path (Path): Path to the baseline CSV or Parquet file.
+        new_path (Path): Path to the new CSV or Parquet file.
 
     Returns:
         pd.DataFrame: DataFrame with '-' for matches and new value for differences.
     """
-    baseline = pd.read_csv(baseline_path)
-    new = pd.read_csv(new_path)
-    assert set(baseline.columns) == set(new.columns), "CSV column mismatch"
-    assert len(baseline) == len(new), "CSV row count mismatch"
-    diff = new.copy()
-    for col in EVALUTION_DIMENSIONS:
-        diff[col] = [
-            None if baseline.at[i, col] == new.at[i, col] else new.at[i, col]
-            for i in range(len(baseline))
-        ]
-    return diff
+    return diff_dataframes(read_dataset(baseline_path), read_dataset(new_path))
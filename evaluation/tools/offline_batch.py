@@ -0,0 +1,372 @@
+"""
+Offline analysis of large inputs through the OpenAI Batch API.
+
+Requests are written as JSONL files of at most MAX_REQUESTS_PER_BATCH lines and
+MAX_BYTES_PER_BATCH bytes, submitted as batches, polled until they finish and
+their results parsed back into analysed sentences. The state of the submitted
+batches is kept in a work directory, so an interrupted run can be resumed
+without submitting again the sentences already requested. Sentences whose
+request failed are reported, and requested again by the next run.
+"""
+
+import json
+import logging
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from instructor.exceptions import IncompleteOutputException
+from instructor.function_calls import openai_schema
+from instructor.process_response import handle_response_model
+from openai.types.chat import ChatCompletion
+
+from evaluation.tools.records import AnalysedSentenceRecord, InputRecord
+from frazer import analyser
+from frazer.analyser import AnalysedSentence, build_messages, clean_sentence
+from frazer.repair import repair_completion
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUESTS_PER_BATCH = 50_000
+# The Batch API rejects input files over 200 MB.
+MAX_BYTES_PER_BATCH = 180_000_000
+COMPLETION_WINDOW = "24h"
+ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_request(input_record: InputRecord) -> dict[str, Any]:
+    """Batch API request line equivalent to the request of `analyse_sentence`."""
+    _, body = handle_response_model(
+        AnalysedSentence,
+        mode=analyser.get_backend().instructor_mode(),
+        model=analyser.get_backend().model,
+        temperature=0.0,
+        top_p=1,
+        messages=build_messages(clean_sentence(input_record.sentence), indexed=False),
+    )
+    return {
+        "custom_id": str(input_record.id),
+        "method": "POST",
+        "url": ENDPOINT,
+        "body": body,
+    }
+
+
+def parse_batch_result(line: str) -> AnalysedSentenceRecord | None:
+    """
+    Parse a line of a batch output file, None if it has no valid analysis. The
+    response is repaired and parsed like the ones of online requests, in the
+    mode of the backend.
+    """
+    data = json.loads(line)
+    try:
+        completion = ChatCompletion.model_validate(data["response"]["body"])
+        repair_completion(completion)
+        analysed_sentence = openai_schema(AnalysedSentence).from_response(
+            completion, mode=analyser.get_backend().instructor_mode()
+        )
+        return AnalysedSentenceRecord(
+            id=int(data["custom_id"]), analysed_sentence=analysed_sentence
+        )
+    except (
+        AssertionError,
+        IncompleteOutputException,
+        IndexError,
+        KeyError,
+        TypeError,
+        ValueError,
+    ) as e:
+        logger.warning(f"Invalid batch result for {data.get('custom_id')}: {e}")
+        return None
+
+
+class BatchState:
+    """Batches submitted for a run, persisted in `state.json` of the work dir."""
+
+    def __init__(self, work_dir: Path) -> None:
+        self.work_dir = work_dir
+        self.path = work_dir / "state.json"
+        self.batches: list[dict[str, Any]] = []
+        if self.path.exists():
+            self.batches = json.loads(self.path.read_text())["batches"]
+
+    def save(self) -> None:
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({"batches": self.batches}, indent=2))
+
+    def requested_ids(self) -> set[int]:
+        """
+        Ids of the sentences that don't need to be requested again: the ones in
+        batches still running and the ones with a valid result.
+        """
+        ids = {record.id for record in read_results(self)}
+        for batch in self.batches:
+            if batch["status"] in FINAL_STATUSES:
+                continue
+            with open(self.work_dir / batch["requests"], encoding="utf-8") as file:
+                ids.update(int(json.loads(line)["custom_id"]) for line in file)
+        return ids
+
+
+def write_requests(
+    input_records: Iterable[InputRecord],
+    work_dir: Path,
+    state: BatchState,
+    max_requests: int = MAX_REQUESTS_PER_BATCH,
+    max_bytes: int = MAX_BYTES_PER_BATCH,
+) -> list[Path]:
+    """
+    Write the request files for the records, split so that no file has more
+    than `max_requests` lines nor `max_bytes` bytes.
+    """
+    paths: list[Path] = []
+    file = None
+    count = 0
+    size = 0
+    for input_record in input_records:
+        try:
+            request = build_batch_request(input_record)
+        except ValueError as e:
+            logger.warning(f"Skipping input sentence {input_record.id}: {e}")
+            continue
+        line = (json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8")
+        if file is None or count == max_requests or size + len(line) > max_bytes:
+            if file is not None:
+                file.close()
+            path = work_dir / f"requests-{len(state.batches) + len(paths)}.jsonl"
+            paths.append(path)
+            file = open(path, "wb")
+            count = 0
+            size = 0
+        file.write(line)
+        count += 1
+        size += len(line)
+    if file is not None:
+        file.close()
+    return paths
+
+
+def submit_batch(client: Any, requests_path: Path) -> str:
+    with open(requests_path, "rb") as file:
+        input_file = client.files.create(file=file, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=ENDPOINT,
+        completion_window=COMPLETION_WINDOW,
+    )
+    return batch.id
+
+
+def wait_for_batches(client: Any, state: BatchState, poll_interval: float) -> None:
+    """Poll the pending batches until all of them reach a final status."""
+    while True:
+        for batch in state.batches:
+            if batch["status"] in FINAL_STATUSES:
+                continue
+            remote = client.batches.retrieve(batch["id"])
+            batch["status"] = remote.status
+            if remote.status not in FINAL_STATUSES:
+                continue
+            if remote.status != "completed":
+                logger.warning(f"Batch {batch['id']} finished as {remote.status}")
+            # Expired and cancelled batches keep the results of the requests
+            # done in time. Without any successful request there's no output
+            # file, without any failed request no error file.
+            for key, file_id in (
+                ("results", remote.output_file_id),
+                ("errors", getattr(remote, "error_file_id", None)),
+            ):
+                if file_id is not None:
+                    path = state.work_dir / f"{key}-{batch['id']}.jsonl"
+                    client.files.content(file_id).write_to_file(path)
+                    batch[key] = path.name
+        state.save()
+        if all(batch["status"] in FINAL_STATUSES for batch in state.batches):
+            return
+        time.sleep(poll_interval)
+
+
+def read_batch_results(
+    state: BatchState, batch: dict[str, Any]
+) -> Iterator[AnalysedSentenceRecord]:
+    if "results" not in batch:
+        return
+    with open(state.work_dir / batch["results"], encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = parse_batch_result(line)
+            if record is not None:
+                yield record
+
+
+def parse_batch_error(line: str) -> tuple[int, str]:
+    """Id of the sentence and error of a line of a batch error file."""
+    data = json.loads(line)
+    error = data.get("error") or {}
+    if not error and data.get("response"):
+        status_code = data["response"].get("status_code")
+        body = data["response"].get("body") or {}
+        error = body.get("error") or {"message": f"status code {status_code}"}
+    return int(data["custom_id"]), error.get("message", "unknown error")
+
+
+def read_batch_errors(state: BatchState, batch: dict[str, Any]) -> dict[int, str]:
+    """Errors of the failed requests of a batch, by sentence id."""
+    if "errors" not in batch:
+        return {}
+    with open(state.work_dir / batch["errors"], encoding="utf-8") as file:
+        return dict(parse_batch_error(line) for line in file if line.strip())
+
+
+def report_failures(state: BatchState, input_ids: set[int]) -> int:
+    """
+    Log the sentences of the batches without a valid result, which a run with
+    the same work dir requests again. Returns their number.
+    """
+    failed = 0
+    for batch in state.batches:
+        errors = read_batch_errors(state, batch)
+        analysed = {record.id for record in read_batch_results(state, batch)}
+        with open(state.work_dir / batch["requests"], encoding="utf-8") as file:
+            ids = [int(json.loads(line)["custom_id"]) for line in file]
+        for sentence_id in ids:
+            if sentence_id in analysed or sentence_id not in input_ids:
+                continue
+            error = errors.get(sentence_id, f"no valid result, batch {batch['status']}")
+            logger.warning(f"Sentence {sentence_id} failed: {error}")
+            failed += 1
+    if failed:
+        logger.warning(
+            f"{failed} sentences failed, run again with the same work dir to "
+            "request them again"
+        )
+    return failed
+
+
+def read_results(state: BatchState) -> Iterator[AnalysedSentenceRecord]:
+    for batch in state.batches:
+        yield from read_batch_results(state, batch)
+
+
+def analyse_input_records_offline(
+    input_records: Iterable[InputRecord],
+    work_dir: Path,
+    client: Any = None,
+    poll_interval: float = 60.0,
+) -> Iterator[AnalysedSentenceRecord]:
+    """
+    Analyse input records through the Batch API. Sentences already requested by
+    a previous run using the same work dir are not submitted again.
+
+    Args:
+        input_records (Iterable[InputRecord]): Input records.
+        work_dir (Path): Directory keeping requests, results and batch state.
+        client (Any): OpenAI client, or a stand-in such as `LocalBatchClient`.
+        poll_interval (float): Seconds between checks of the batches status.
+
+    Returns:
+        Iterator[AnalysedSentenceRecord]: Analysed sentence records, by batch in
+        submission order and by id within a batch.
+    """
+    client = client or analyser.get_client().client
+    work_dir.mkdir(parents=True, exist_ok=True)
+    state = BatchState(work_dir)
+    requested = state.requested_ids()
+    input_ids: set[int] = set()
+
+    def pending_records() -> Iterator[InputRecord]:
+        for record in input_records:
+            input_ids.add(record.id)
+            if record.id not in requested:
+                yield record
+
+    for requests_path in write_requests(pending_records(), work_dir, state):
+        batch_id = submit_batch(client, requests_path)
+        state.batches.append(
+            {"id": batch_id, "requests": requests_path.name, "status": "validating"}
+        )
+        state.save()
+        logger.info(f"Submitted batch {batch_id} from {requests_path.name}")
+
+    wait_for_batches(client, state, poll_interval)
+    report_failures(state, input_ids)
+
+    for batch in state.batches:
+        records = sorted(read_batch_results(state, batch), key=lambda r: r.id)
+        yield from (record for record in records if record.id in input_ids)
+
+
+class LocalBatchClient:
+    """
+    Local stand-in for the Batch API of an OpenAI client, processing batches
+    synchronously with `respond`, which maps a request body to a response body.
+    By default requests are sent to the regular chat completions endpoint, which
+    also allows offline runs against servers that don't implement batches.
+    """
+
+    def __init__(
+        self, respond: Callable[[dict[str, Any]], dict[str, Any]] | None = None
+    ) -> None:
+        self.respond = respond or self.chat_completion
+        self.contents: dict[str, str] = {}
+        self.jobs: dict[str, SimpleNamespace] = {}
+        self.files = SimpleNamespace(create=self.create_file, content=self.content)
+        self.batches = SimpleNamespace(create=self.create_batch, retrieve=self.retrieve)
+
+    @staticmethod
+    def chat_completion(body: dict[str, Any]) -> dict[str, Any]:
+        completion = analyser.get_client().client.chat.completions.create(**body)
+        return completion.model_dump(mode="json")
+
+    def create_file(self, file: Any, purpose: str) -> SimpleNamespace:
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.contents[file_id] = file.read().decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    def create_content(self, lines: list[str]) -> str | None:
+        """Id of a file with the lines, None without lines like the Batch API."""
+        if not lines:
+            return None
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.contents[file_id] = "\n".join(lines) + "\n"
+        return file_id
+
+    def content(self, file_id: str) -> SimpleNamespace:
+        text = self.contents[file_id]
+        return SimpleNamespace(
+            text=text,
+            write_to_file=lambda path: Path(path).write_text(text, encoding="utf-8"),
+        )
+
+    def create_batch(
+        self, input_file_id: str, endpoint: str, completion_window: str
+    ) -> SimpleNamespace:
+        lines: list[str] = []
+        errors: list[str] = []
+        for line in self.contents[input_file_id].splitlines():
+            request = json.loads(line)
+            try:
+                response = {"status_code": 200, "body": self.respond(request["body"])}
+            except Exception as e:
+                error = {"code": type(e).__name__, "message": str(e)}
+                result = {"custom_id": request["custom_id"], "error": error}
+                errors.append(json.dumps(result, ensure_ascii=False))
+                continue
+            result = {"custom_id": request["custom_id"], "response": response}
+            lines.append(json.dumps(result, ensure_ascii=False))
+        job = SimpleNamespace(
+            id=f"batch-{uuid.uuid4().hex}",
+            status="completed",
+            output_file_id=self.create_content(lines),
+            error_file_id=self.create_content(errors),
+        )
+        self.jobs[job.id] = job
+        return job
+
+    def retrieve(self, batch_id: str) -> SimpleNamespace:
+        return self.jobs[batch_id]
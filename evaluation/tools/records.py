@@ -0,0 +1,13 @@
+from typing import NamedTuple
+
+from frazer.analyser import AnalysedSentence
+
+
+class InputRecord(NamedTuple):
+    id: int
+    sentence: str
+
+
+class AnalysedSentenceRecord(NamedTuple):
+    id: int
+    analysed_sentence: AnalysedSentence
@@ -0,0 +1,197 @@
+"""
+Rate-limit aware scheduling of LLM calls for batch analysis.
+
+The number of concurrent calls is adjusted AIMD-style: it grows by one slot
+per window of successful calls whose latency stays close to the observed
+baseline, and is halved on a rate limit (429) response. Calls failing with a
+rate limit or a transient error are retried with jittered exponential backoff,
+honouring the retry-after header when present. An optional tokens-per-minute
+budget delays calls that would exceed the quota.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import TypeVar
+
+import openai
+from instructor.exceptions import InstructorRetryException
+
+from frazer.analyser import STATIC_PROMPT, AnalysedSentence
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# Latency above this multiple of the baseline is treated as congestion.
+CONGESTION_FACTOR = 2.0
+# Weight of the latest observation in the latency moving average.
+LATENCY_SMOOTHING = 0.1
+
+TRANSIENT_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+def estimate_prompt_tokens() -> int:
+    """Rough number of tokens of the static part of an analysis request."""
+    schema = json.dumps(AnalysedSentence.model_json_schema())
+    return (len(STATIC_PROMPT) + len(schema)) // 4
+
+
+def unwrap_error(error: BaseException) -> BaseException:
+    """The API error behind the exceptions raised by instructor's retries."""
+    if isinstance(error, InstructorRetryException) and error.args:
+        cause = error.args[0]
+        if isinstance(cause, BaseException):
+            return cause
+    return error
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds to wait requested by the retry-after headers of an API error."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+class TokenBudget:
+    """Sliding one-minute window of the tokens used by the calls started."""
+
+    def __init__(self, tokens_per_minute: int) -> None:
+        self.tokens_per_minute = tokens_per_minute
+        self.used: deque[tuple[float, int]] = deque()
+        self.total = 0
+
+    def wait_time(self, tokens: int, now: float) -> float:
+        while self.used and now - self.used[0][0] >= 60:
+            self.total -= self.used.popleft()[1]
+        if not self.used or self.total + tokens <= self.tokens_per_minute:
+            return 0.0
+        # Wait until enough of the oldest calls leave the window.
+        excess = self.total + tokens - self.tokens_per_minute
+        for started, used in self.used:
+            excess -= used
+            if excess <= 0:
+                return started + 60 - now
+        return 60.0
+
+    def spend(self, tokens: int, now: float) -> None:
+        self.used.append((now, tokens))
+        self.total += tokens
+
+
+class AdaptiveScheduler:
+    """Gate and retry the calls of a batch run, see the module docstring."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        tpm_limit: int | None = None,
+        min_concurrency: int = 1,
+        max_attempts: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = TokenBudget(tpm_limit) if tpm_limit else None
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency: float | None = None
+        self.rate_limited = 0
+        self.retries = 0
+        self._condition = threading.Condition()
+
+    def _acquire(self, tokens: int) -> None:
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = self.paused_until - now
+                if self.budget is not None:
+                    wait = max(wait, self.budget.wait_time(tokens, now))
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+            if self.budget is not None:
+                self.budget.spend(tokens, now)
+
+    def _release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _on_success(self, latency: float) -> None:
+        with self._condition:
+            if self.latency is None:
+                self.latency = latency
+            congested = latency > CONGESTION_FACTOR * self.latency
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+            if congested:
+                self.limit = max(self.min_concurrency, self.limit * 0.9)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def _on_rate_limit(self, delay: float) -> None:
+        with self._condition:
+            self.rate_limited += 1
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            logger.info(f"Rate limited, concurrency lowered to {int(self.limit)}")
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def run(self, func: Callable[[], R], tokens: int = 0) -> R:
+        """
+        Run a call once a concurrency slot and the token budget allow it,
+        retrying it on rate limits and transient errors.
+        """
+        attempt = 0
+        while True:
+            self._acquire(tokens)
+            started = time.monotonic()
+            try:
+                result = func()
+            except Exception as e:
+                self._release()
+                error = unwrap_error(e)
+                attempt += 1
+                if (
+                    not isinstance(error, TRANSIENT_ERRORS)
+                    or attempt == self.max_attempts
+                ):
+                    raise
+                self.retries += 1
+                delay = retry_after(error) or self.backoff(attempt)
+                if isinstance(error, openai.RateLimitError):
+                    self._on_rate_limit(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            self._release()
+            self._on_success(time.monotonic() - started)
+            return result
@@ -1,11 +1,22 @@
-import logging
 import logging.config
+from functools import cache
 
-from dotenv import load_dotenv
+__version__ = "0.0.2-dev20250607"
 
-logging.config.fileConfig("logging.conf")
 
-load_dotenv()
+@cache
+def load_environment() -> None:
+    """Load the variables of the .env file, once."""
+    from dotenv import load_dotenv
 
+    load_dotenv()
 
-__version__ = "0.0.2-dev20250607"
+
+@cache
+def configure() -> None:
+    """
+    Configure logging and load the .env file. Called by the entry points
+    instead of on import, so that importing frazer stays cheap.
+    """
+    logging.config.fileConfig("logging.conf", disable_existing_loggers=False)
+    load_environment()
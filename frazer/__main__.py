@@ -1,8 +1,14 @@
+from pathlib import Path
+
 import click
 import yaml
 from termcolor import colored
 
-from frazer.analyser import analyse_sentence
+from frazer import configure
+from frazer.analyser import AnalysedSentence, analyse_sentence
+from frazer.cache import LRUCache, SQLiteCache, TieredCache
+from frazer.streaming import StreamReset, analyse_sentence_stream
+from frazer.text import analyse_text, analyse_text_stream
 
 
 def colorize_yaml(yaml_content: str) -> str:
@@ -17,15 +23,75 @@ def colorize_yaml(yaml_content: str) -> str:
     return colored_yaml
 
 
+def to_yaml(data: dict | list) -> str:
+    return yaml.dump(data, allow_unicode=True, indent=2)
+
+
+def echo_stream(sentence: str, sentence_cache: TieredCache | None) -> None:
+    """Print each analysed word as soon as it's available."""
+    click.echo(colorize_yaml("words:"), nl=False)
+    for event in analyse_sentence_stream(sentence, sentence_cache):
+        if isinstance(event, StreamReset):
+            click.echo(colorize_yaml("# analysis requested again\nwords:"), nl=False)
+        elif isinstance(event, AnalysedSentence):
+            summary = event.model_dump(mode="json", exclude={"words"})
+            click.echo(colorize_yaml(to_yaml(summary)))
+        else:
+            word = event.model_dump(mode="json")
+            click.echo(colorize_yaml(to_yaml([word])), nl=False)
+
+
+def echo_text_stream(text: str, sentence_cache: TieredCache | None) -> None:
+    """Print the analysis of each sentence of the text as soon as it's done."""
+    for pos, sentence in analyse_text_stream(text, sentence_cache):
+        result = {"index": pos, **sentence.model_dump(mode="json")}
+        click.echo(colorize_yaml(to_yaml([result])))
+
+
 @click.command()
 @click.argument("sentence")
-def analyse_cmd(sentence: str) -> None:
+@click.option(
+    "--cache",
+    "cache_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="SQLite file caching analysed sentences across runs.",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    default=False,
+    help="Print each word as soon as it's analysed.",
+)
+@click.option(
+    "--text",
+    is_flag=True,
+    default=False,
+    help="Split the input into sentences and analyse them concurrently.",
+)
+def analyse_cmd(
+    sentence: str, cache_path: Path | None, stream: bool, text: bool
+) -> None:
     """Analyse a given sentence using OpenAI API."""
 
+    sentence_cache = (
+        TieredCache(LRUCache(), SQLiteCache(cache_path)) if cache_path else None
+    )
     try:
-        analysed_sentence = analyse_sentence(sentence)
+        if text and stream:
+            echo_text_stream(sentence, sentence_cache)
+            return
+        if text:
+            sentences = analyse_text(sentence, sentence_cache)
+            result = [analysed.model_dump(mode="json") for analysed in sentences]
+            click.echo(colorize_yaml(to_yaml(result)))
+            return
+        if stream:
+            echo_stream(sentence, sentence_cache)
+            return
+        analysed_sentence = analyse_sentence(sentence, sentence_cache)
         result_dict = analysed_sentence.model_dump(mode="json")
-        yaml_result = yaml.dump(result_dict, allow_unicode=True, indent=2)
+        yaml_result = to_yaml(result_dict)
         colored_yaml = colorize_yaml(yaml_result)
         click.echo(colored_yaml)
 
@@ -34,4 +100,5 @@ def analyse_cmd(sentence: str) -> None:
 
 
 if __name__ == "__main__":
+    configure()
     analyse_cmd()
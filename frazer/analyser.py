@@ -1,9 +1,36 @@
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from dataclasses import dataclass
 from enum import Enum
-from typing import Literal
-
-import instructor
-from openai import OpenAI
-from pydantic import BaseModel, Field
+from functools import cache
+from typing import TYPE_CHECKING, Any, Literal
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from frazer import load_environment
+from frazer.backends import DEFAULT_MODEL, Backend, backend_from_env
+from frazer.cache import TieredCache
+from frazer.cascade import Cascade
+from frazer.clients import ClientSettings
+from frazer.hedging import Hedger
+from frazer.instrumentation import (
+    completion_errors,
+    instrument,
+    mark_cache_hit,
+    stage,
+)
+from frazer.lexicon import Lexicon
+from frazer.memo import WordMemo, tokenize
+from frazer.repair import repair_completion
+from frazer.usage import UsageStats
+
+if TYPE_CHECKING:
+    import instructor
+
+    from frazer.bundle import AnalysisBundle
 
 
 class Gender(str, Enum):
@@ -152,10 +179,15 @@ class Other(Word):
     pass
 
 
+AnalysedWord = Noun | Verb | Preposition | Adjective | Numeral | Other
+
+word_adapter: TypeAdapter[AnalysedWord] = TypeAdapter(AnalysedWord)
+
+
 class AnalysedSentence(BaseModel):
     text: str
     translation: str
-    words: list[Noun | Verb | Preposition | Adjective | Numeral | Other]
+    words: list[AnalysedWord]
     grammatically_correct: bool
     remarks: str | None = Field(
         description=(
@@ -166,42 +198,545 @@ class AnalysedSentence(BaseModel):
     )
 
 
-client = instructor.from_openai(OpenAI())
+MODEL = DEFAULT_MODEL
+
+
+# Settings of the HTTP clients, see `configure_clients`.
+client_settings = ClientSettings.from_env()
+# Backend serving the analyses, see `get_backend` and `use_backend`.
+backend: Backend | None = None
+# Token usage of the completions requested by the clients.
+usage_stats = UsageStats()
+# Hedging of the asynchronous requests, opt-in with `FRAZER_HEDGE`.
+hedger = Hedger.from_env()
+# Models analysing a sentence in turn, opt-in with `FRAZER_CASCADE`.
+cascade = Cascade.from_env()
+# Analyses built ahead of time, see `get_bundle` and `use_bundle`.
+bundle: "AnalysisBundle | None" = None
+bundle_loaded = False
+# Instructor clients of the backend, see `get_client` and `get_async_client`.
+shared_client: "instructor.Instructor | None" = None
+shared_async_client: "instructor.AsyncInstructor | None" = None
+clients_lock = threading.Lock()
 
-categories = ",".join(SyntacticCategory.__members__.keys())
+
+def get_backend() -> Backend:
+    """The backend in use, by default the one configured by the environment."""
+    global backend
+    if backend is None:
+        load_environment()
+        backend = backend_from_env()
+    return backend
+
+
+def create_client(is_async: bool = False) -> Any:
+    import instructor
+
+    current = get_backend()
+    openai_client = (
+        current.async_openai_client if is_async else current.openai_client
+    )(client_settings)
+    client = instructor.from_openai(openai_client, mode=current.instructor_mode())
+    client.on("completion:response", repair_completion)
+    instrument(client, usage_stats)
+    return client
+
+
+def get_client() -> "instructor.Instructor":
+    """
+    The instructor client of the backend, created on first use: importing
+    instructor and openai is a large share of the cold start of the API.
+    Threads racing to the first use share the same client.
+    """
+    global shared_client
+    if shared_client is None:
+        with clients_lock:
+            if shared_client is None:
+                shared_client = create_client()
+    return shared_client
+
+
+def get_async_client() -> "instructor.AsyncInstructor":
+    global shared_async_client
+    if shared_async_client is None:
+        with clients_lock:
+            if shared_async_client is None:
+                shared_async_client = create_client(is_async=True)
+    return shared_async_client
+
+
+def reset_clients() -> None:
+    """Drop the clients, created again on their next use."""
+    global shared_client, shared_async_client
+    with clients_lock:
+        shared_client = shared_async_client = None
+
+
+def configure_clients(
+    settings: ClientSettings | None = None, new_backend: Backend | None = None
+) -> None:
+    """
+    Use the given connection settings and/or backend, replacing the existing
+    clients.
+    """
+    global client_settings, backend
+    client_settings = settings or client_settings
+    backend = new_backend or backend
+    reset_clients()
+
+
+def use_backend(new_backend: Backend) -> None:
+    configure_clients(new_backend=new_backend)
+
+
+def use_cascade(models: list[str]) -> None:
+    """Analyse with the given models in turn, cheapest first."""
+    global cascade
+    cascade = Cascade(models)
+
+
+def get_cascade() -> Cascade:
+    return cascade
+
+
+def get_bundle() -> "AnalysisBundle | None":
+    """The bundle of precomputed analyses, opened on first use, if any."""
+    global bundle, bundle_loaded
+    if not bundle_loaded:
+        from frazer.bundle import bundle_from_env
+
+        load_environment()
+        bundle = bundle_from_env()
+        bundle_loaded = True
+    return bundle
+
+
+def use_bundle(new_bundle: "AnalysisBundle | None") -> None:
+    global bundle, bundle_loaded
+    bundle, bundle_loaded = new_bundle, True
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `analyser.client` and `analyser.aclient` working, lazily.
+    if name == "client":
+        return get_client()
+    if name == "aclient":
+        return get_async_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def analyse_sentence(input_sentence: str) -> AnalysedSentence:
+categories = ",".join(SyntacticCategory.__members__.keys())
+
+SYSTEM_PROMPT = "You're a Polish language teacher with the goal of explaining a sentence word by word."  # noqa: E501
+
+ANALYSIS_INSTRUCTIONS = (
+    "Choose a syntactical category for each word amonth the options: "
+    f"{categories}\n"
+    "Provide the sentence translation to English. "
+    "If a word is a verb, indicate the verb's aspect and what declension case it enforces (if any). "  # noqa: E501
+    "If a word is a noun, numeral or adjective, provide its declension case. "  # noqa: E501
+    "If the word is of a different syntatical function, label "
+    "the word as 'other' and provide its syntactical function. "
+    "Any remarks about the sentence that could be relevant to "
+    "the student: for example, point out a potential mispelling "
+    "or grammar mistake."
+)
+
+
+# Version of the static prompt: the instructions, the response schema and the
+# layout of the messages. Bump it with any change to them.
+PROMPT_VERSION = 3
+
+# The static part of the prompt comes first and is the same for every request,
+# so that the provider can serve it from its prompt cache. The sentence comes
+# last, in its own message.
+STATIC_PROMPT = (
+    f"{SYSTEM_PROMPT}\n"
+    "Do a syntatical analysis of the sentence given by the user. "
+    f"{ANALYSIS_INSTRUCTIONS}"
+)
+
+
+def build_messages(
+    input_clean: str,
+    only_words: list[str] | None = None,
+    indexed: bool | None = None,
+) -> list[dict[str, str]]:
+    """
+    Build the chat messages requesting the analysis of a sentence. When
+    `only_words` is given, the model is asked to analyse just those words. With
+    `indexed`, by default when the compact schema is enabled, the words of the
+    sentence are listed with the positions the compact schema refers to.
+    """
+    messages = [
+        {"role": "system", "content": STATIC_PROMPT},
+        {"role": "user", "content": input_clean},
+    ]
+    if indexed is None:
+        indexed = compact_schema_enabled()
+    if indexed:
+        listed = ", ".join(
+            f"{pos} '{token}'" for pos, token in enumerate(tokenize(input_clean))
+        )
+        instruction = (
+            f"The words of the sentence by position are {listed}. Give the "
+            "position of each word analysed, and its value only when it's "
+            "written differently."
+        )
+        messages.append({"role": "user", "content": instruction})
+    if only_words is not None:
+        if only_words:
+            listed = ", ".join(f"'{word}'" for word in only_words)
+            instruction = (
+                f"Include in the list of words only the words {listed}, in this "
+                "order. The other words of the sentence are already analysed."
+            )
+        else:
+            instruction = (
+                "All words of the sentence are already analysed, "
+                "so leave the list of words empty."
+            )
+        messages.append({"role": "user", "content": instruction})
+    return messages
+
+
+def clean_sentence(input_sentence: str) -> str:
     input_clean = input_sentence.strip()
     if not input_clean:
         raise ValueError("Sentence cannot be empty")
-    # noqa: E501
-    sentence: AnalysedSentence = client.chat.completions.create(
-        model="gpt-4o-mini",
-        response_model=AnalysedSentence,
-        temperature=0.0,
-        top_p=1,
-        messages=[
-            {
-                "role": "system",
-                "content": "You're a Polish language teacher with the goal of explaining a sentence word by word.",  # noqa: E501
-            },
-            {
-                "role": "user",
-                "content": (  # noqa: E501
-                    f"Do a syntatical analysis of the sentence '{input_clean}'. "
-                    "Choose a syntactical category for each word amonth the options: "
-                    f"{categories}\n"
-                    "Provide the sentence translation to English. "
-                    "If a word is a verb, indicate the verb's aspect and what declension case it enforces (if any). "  # noqa: E501
-                    "If a word is a noun, numeral or adjective, provide its declension case. "  # noqa: E501
-                    "If the word is of a different syntatical function, label "
-                    "the word as 'other' and provide its syntactical function. "
-                    "Any remarks about the sentence that could be relevant to "
-                    "the student: for example, point out a potential mispelling "
-                    "or grammar mistake."
-                ),
-            },
+    return input_clean
+
+
+def compact_schema_enabled() -> bool:
+    """
+    Whether the model fills in the compact schema of `frazer.wire` instead of
+    `AnalysedSentence`, enabled by the `FRAZER_COMPACT_SCHEMA` variable.
+    """
+    load_environment()
+    return os.environ.get("FRAZER_COMPACT_SCHEMA", "") not in ("", "0", "false")
+
+
+def response_schema() -> type[BaseModel]:
+    """Response model requested from the model."""
+    if compact_schema_enabled():
+        from frazer.wire import CompactSentence
+
+        return CompactSentence
+    return AnalysedSentence
+
+
+def validation_context(input_clean: str) -> dict[str, Any]:
+    """
+    Context of the response validation: the tokens of the sentence, which the
+    words of the compact schema refer to by position.
+    """
+    return {"tokens": tokenize(input_clean)}
+
+
+def to_analysed_sentence(response: BaseModel, input_clean: str) -> AnalysedSentence:
+    """The analysis given by a response of the `response_schema` model."""
+    if isinstance(response, AnalysedSentence):
+        return response
+    from frazer.wire import from_compact
+
+    return from_compact(response, input_clean)  # type: ignore[arg-type]
+
+
+def prompt_fingerprint() -> str:
+    """Hash of the prompt template and response schema used for the analysis."""
+    return schema_fingerprint(response_schema())
+
+
+@cache
+def schema_fingerprint(schema: type[BaseModel]) -> str:
+    payload = json.dumps(
+        [
+            PROMPT_VERSION,
+            build_messages("{sentence}", indexed=schema is not AnalysedSentence),
+            schema.model_json_schema(),
         ],
+        sort_keys=True,
     )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def sentence_cache_key(
+    input_clean: str, model: str | None = None, fingerprint: str | None = None
+) -> str:
+    """
+    Content-addressed key of an analysis: the normalized sentence, the model
+    (by default the one of the backend, or the models of the cascade) and the
+    fingerprint of the prompt (by default the one of `build_messages`).
+    """
+    normalized = unicodedata.normalize("NFC", " ".join(input_clean.split()))
+    model = model or cascade.name(get_backend().model)
+    fingerprint = fingerprint or prompt_fingerprint()
+    payload = "\x00".join([normalized, model, fingerprint])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def word_memo_namespace() -> str:
+    """
+    Namespace of the word analyses in the word memo: the model, or the models
+    of the cascade, and the prompt fingerprint, like `sentence_cache_key`.
+    """
+    return "\x00".join([cascade.name(get_backend().model), prompt_fingerprint()])
+
+
+def get_cached_sentence(
+    input_clean: str,
+    sentence_cache: TieredCache | None,
+    fingerprint: str | None = None,
+) -> AnalysedSentence | None:
+    """
+    The analysis of the sentence in the bundle of precomputed analyses or, if
+    it's not there, in the sentence cache, where analyses requested with
+    another prompt are kept under its `fingerprint`.
+    """
+    current_bundle = get_bundle()
+    if current_bundle is None and sentence_cache is None:
+        return None
+    cached = None
+    if current_bundle is not None:
+        cached = current_bundle.get(sentence_cache_key(input_clean))
+    if cached is None and sentence_cache is not None:
+        cached = sentence_cache.get(sentence_cache_key(input_clean, None, fingerprint))
+    if cached is None:
+        return None
+    return AnalysedSentence.model_validate_json(cached)
+
+
+def set_cached_sentence(
+    input_clean: str,
+    sentence: AnalysedSentence,
+    sentence_cache: TieredCache | None,
+    fingerprint: str | None = None,
+) -> None:
+    if sentence_cache is not None:
+        key = sentence_cache_key(input_clean, None, fingerprint)
+        sentence_cache.set(key, sentence.model_dump_json())
+
+
+def align_words(
+    tokens: list[str], words: list[AnalysedWord]
+) -> list[AnalysedWord | None]:
+    """Match the analysed words, in order, to the tokens of the sentence."""
+    aligned: list[AnalysedWord | None] = [None] * len(tokens)
+    cursor = 0
+    for word in words:
+        for pos in range(cursor, len(tokens)):
+            if tokens[pos].lower() == word.original_value.lower():
+                aligned[pos] = word
+                cursor = pos + 1
+                break
+    return aligned
+
+
+@dataclass
+class AnalysisPlan:
+    """
+    Request for the analysis of a sentence, with the words whose analysis is
+    already known from the word memo.
+    """
+
+    input_clean: str
+    tokens: list[str]
+    known_words: list[AnalysedWord | None]
+
+    @property
+    def pending_tokens(self) -> list[str]:
+        return [
+            token for token, word in zip(self.tokens, self.known_words) if word is None
+        ]
+
+    @property
+    def messages(self) -> list[dict[str, str]]:
+        if not any(self.known_words):
+            return build_messages(self.input_clean)
+        return build_messages(self.input_clean, only_words=self.pending_tokens)
+
+    def merge(self, sentence: AnalysedSentence) -> AnalysedSentence | None:
+        """
+        Interleave the known words with the ones analysed by the model. Returns
+        None when the model's words can't be matched to the pending tokens.
+        """
+        if not any(self.known_words):
+            return sentence
+        pending = list(sentence.words)
+        words = []
+        for token, known_word in zip(self.tokens, self.known_words):
+            if known_word is not None:
+                words.append(known_word)
+                continue
+            if not pending or pending[0].original_value.lower() != token.lower():
+                return None
+            words.append(pending.pop(0))
+        if pending:
+            return None
+        return sentence.model_copy(update={"words": words})
+
+
+def plan_analysis(
+    input_clean: str, word_memo: WordMemo | None, lexicon: Lexicon | None = None
+) -> AnalysisPlan:
+    """
+    Plan the analysis of a sentence, taking the words of the lexicon and the
+    ones known from the word memo instead of requesting them.
+    """
+    tokens = tokenize(input_clean)
+    known_words: list[AnalysedWord | None] = [None] * len(tokens)
+    if lexicon is not None:
+        for pos, token in enumerate(tokens):
+            entry = lexicon.tag(token)
+            if entry is not None:
+                known_words[pos] = word_adapter.validate_python(entry)
+    if word_memo is not None:
+        values = word_memo.lookup(tokens, word_memo_namespace())
+        for pos, (token, value) in enumerate(zip(tokens, values)):
+            if known_words[pos] is None and value is not None:
+                known_words[pos] = word_adapter.validate_json(value).model_copy(
+                    update={"original_value": token}
+                )
+    return AnalysisPlan(input_clean, tokens, known_words)
+
+
+def store_analysis(
+    plan: AnalysisPlan,
+    sentence: AnalysedSentence,
+    sentence_cache: TieredCache | None,
+    word_memo: WordMemo | None,
+) -> None:
+    set_cached_sentence(plan.input_clean, sentence, sentence_cache)
+    if word_memo is not None:
+        values = [
+            None if word is None else word.model_dump_json()
+            for word in align_words(plan.tokens, sentence.words)
+        ]
+        word_memo.remember(plan.tokens, values, word_memo_namespace())
+
+
+def request_analysis(
+    messages: list[dict[str, str]], input_clean: str, model: str | None = None
+) -> AnalysedSentence:
+    with completion_errors():
+        response = get_client().chat.completions.create(
+            model=model or get_backend().model,
+            response_model=response_schema(),
+            temperature=0.0,
+            top_p=1,
+            messages=messages,
+            context=validation_context(input_clean),
+        )
+    return to_analysed_sentence(response, input_clean)
+
+
+async def request_analysis_async(
+    messages: list[dict[str, str]], input_clean: str, model: str | None = None
+) -> AnalysedSentence:
+
+    async def create() -> Any:
+        # In the task of the call, where the hooks of its completions run
+        with completion_errors():
+            return await get_async_client().chat.completions.create(
+                model=model or get_backend().model,
+                response_model=response_schema(),
+                temperature=0.0,
+                top_p=1,
+                messages=messages,
+                context=validation_context(input_clean),
+            )
+
+    # Each call validates its response, so the first to return is valid
+    response = await hedger.run(create)
+    return to_analysed_sentence(response, input_clean)
+
+
+def request_plan(plan: AnalysisPlan, model: str | None = None) -> AnalysedSentence:
+    """
+    The analysis of a planned sentence, requested again in full when the
+    model's words can't be merged with the known ones.
+    """
+    sentence = plan.merge(request_analysis(plan.messages, plan.input_clean, model))
+    if sentence is None:
+        sentence = request_analysis(
+            build_messages(plan.input_clean), plan.input_clean, model
+        )
+    return sentence
+
+
+async def request_plan_async(
+    plan: AnalysisPlan, model: str | None = None
+) -> AnalysedSentence:
+    response = await request_analysis_async(plan.messages, plan.input_clean, model)
+    sentence = plan.merge(response)
+    if sentence is None:
+        sentence = await request_analysis_async(
+            build_messages(plan.input_clean), plan.input_clean, model
+        )
+    return sentence
+
+
+def request_cascade(plan: AnalysisPlan) -> AnalysedSentence:
+    """
+    The analysis of the first model of the cascade whose analysis passes the
+    consistency checks, or of the last one.
+    """
+    for tier, model in enumerate(cascade.tiers(get_backend().model)):
+        sentence = request_plan(plan, model)
+        if cascade.accept(tier, sentence, plan.tokens):
+            return sentence
+    raise AssertionError("The last tier of a cascade is always accepted")
+
+
+async def request_cascade_async(plan: AnalysisPlan) -> AnalysedSentence:
+    for tier, model in enumerate(cascade.tiers(get_backend().model)):
+        sentence = await request_plan_async(plan, model)
+        if cascade.accept(tier, sentence, plan.tokens):
+            return sentence
+    raise AssertionError("The last tier of a cascade is always accepted")
+
+
+def analyse_sentence(
+    input_sentence: str,
+    sentence_cache: TieredCache | None = None,
+    word_memo: WordMemo | None = None,
+    lexicon: Lexicon | None = None,
+) -> AnalysedSentence:
+    input_clean = clean_sentence(input_sentence)
+    with stage("cache_lookup"):
+        cached = get_cached_sentence(input_clean, sentence_cache)
+    if cached is not None:
+        mark_cache_hit()
+        return cached
+    with stage("plan"):
+        plan = plan_analysis(input_clean, word_memo, lexicon)
+    with stage("request"):
+        sentence = request_cascade(plan)
+    with stage("store"):
+        store_analysis(plan, sentence, sentence_cache, word_memo)
+    return sentence
+
+
+async def analyse_sentence_async(
+    input_sentence: str,
+    sentence_cache: TieredCache | None = None,
+    word_memo: WordMemo | None = None,
+    lexicon: Lexicon | None = None,
+) -> AnalysedSentence:
+    """
+    Same as `analyse_sentence`, but awaits the OpenAI round-trip instead of
+    blocking, so many analyses can be in flight on a single event loop.
+    """
+    input_clean = clean_sentence(input_sentence)
+    with stage("cache_lookup"):
+        cached = get_cached_sentence(input_clean, sentence_cache)
+    if cached is not None:
+        mark_cache_hit()
+        return cached
+    with stage("plan"):
+        plan = plan_analysis(input_clean, word_memo, lexicon)
+    with stage("request"):
+        sentence = await request_cascade_async(plan)
+    with stage("store"):
+        store_analysis(plan, sentence, sentence_cache, word_memo)
     return sentence
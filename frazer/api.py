@@ -1,15 +1,45 @@
 import logging
+import os
+from collections.abc import AsyncIterator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-from frazer.analyser import AnalysedSentence, analyse_sentence
+from frazer import configure
+from frazer.analyser import (
+    AnalysedSentence,
+    analyse_sentence_async,
+    clean_sentence,
+    get_backend,
+    get_bundle,
+    get_cascade,
+    hedger,
+    sentence_cache_key,
+    usage_stats,
+)
+from frazer.batching import analyse_sentences_async
+from frazer.cache import TieredCache
+from frazer.instrumentation import render_metrics, stage, track
+from frazer.lexicon import default_lexicon
+from frazer.memo import WordMemo
+from frazer.singleflight import SingleFlight
+from frazer.streaming import StreamReset, analyse_sentence_stream_async
+from frazer.text import analyse_text_async, analyse_text_stream_async
+
+configure()
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+sentence_cache = TieredCache.from_env()
+word_memo = WordMemo() if os.environ.get("FRAZER_WORD_MEMO") else None
+lexicon = default_lexicon() if os.environ.get("FRAZER_LEXICON") else None
+# Concurrent requests for the same sentence share a single analysis.
+in_flight: SingleFlight[AnalysedSentence] = SingleFlight()
+
 
 class InputPayload(BaseModel):
     sentence: str
@@ -19,6 +49,18 @@ class OutputPayload(BaseModel):
     sentence: AnalysedSentence
 
 
+class InputSentencesPayload(BaseModel):
+    sentences: list[str]
+
+
+class OutputSentencesPayload(BaseModel):
+    sentences: list[AnalysedSentence]
+
+
+class InputTextPayload(BaseModel):
+    text: str
+
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -32,9 +74,111 @@ app.add_middleware(
 @app.post("/sentence", response_model=OutputPayload)
 async def process_payload(payload: InputPayload):
     logger.info(f"Incoming sentence: {payload.sentence}")
-    sentence = analyse_sentence(payload.sentence)
-    response = OutputPayload(sentence=sentence)
-    return response
+    with track("sentence", get_backend().model):
+        sentence = await in_flight.do(
+            sentence_cache_key(clean_sentence(payload.sentence)),
+            lambda: analyse_sentence_async(
+                payload.sentence, sentence_cache, word_memo, lexicon
+            ),
+        )
+        with stage("serialize"):
+            content = OutputPayload(sentence=sentence).model_dump_json()
+    return Response(content, media_type="application/json")
+
+
+@app.post("/sentences", response_model=OutputSentencesPayload)
+async def process_sentences_payload(payload: InputSentencesPayload):
+    logger.info(f"Incoming batch of {len(payload.sentences)} sentences")
+    with track("sentences", get_backend().model):
+        sentences = await analyse_sentences_async(
+            payload.sentences, sentence_cache=sentence_cache
+        )
+        with stage("serialize"):
+            content = OutputSentencesPayload(sentences=sentences).model_dump_json()
+    return Response(content, media_type="application/json")
+
+
+@app.post("/sentence/stream")
+async def process_payload_stream(payload: InputPayload) -> StreamingResponse:
+    """
+    Stream the analysis as newline-delimited JSON: one `{"word": ...}` line per
+    word as soon as it's generated, then a final `{"sentence": ...}` line. A
+    `{"reset": true}` line means the words received so far are to be discarded,
+    the words of a new analysis follow.
+    """
+    logger.info(f"Incoming sentence to stream: {payload.sentence}")
+    events = analyse_sentence_stream_async(payload.sentence, sentence_cache)
+
+    async def lines() -> AsyncIterator[str]:
+        async for event in events:
+            if isinstance(event, StreamReset):
+                yield '{"reset": true}\n'
+                continue
+            key = "sentence" if isinstance(event, AnalysedSentence) else "word"
+            yield f'{{"{key}": {event.model_dump_json()}}}\n'
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/text", response_model=OutputSentencesPayload)
+async def process_text_payload(payload: InputTextPayload):
+    """Analyse the sentences of a text concurrently, in the order of the text."""
+    logger.info(f"Incoming text of {len(payload.text)} characters")
+    with track("text", get_backend().model):
+        sentences = await analyse_text_async(
+            payload.text, sentence_cache, word_memo, lexicon
+        )
+        with stage("serialize"):
+            content = OutputSentencesPayload(sentences=sentences).model_dump_json()
+    return Response(content, media_type="application/json")
+
+
+@app.post("/text/stream")
+async def process_text_payload_stream(payload: InputTextPayload) -> StreamingResponse:
+    """
+    Stream the analyses of the sentences of a text as newline-delimited JSON, as
+    soon as each one is done: `{"index": ..., "sentence": ...}` lines, where
+    `index` is the position of the sentence in the text.
+    """
+    logger.info(f"Incoming text to stream of {len(payload.text)} characters")
+    events = analyse_text_stream_async(payload.text, sentence_cache, word_memo, lexicon)
+
+    async def lines() -> AsyncIterator[str]:
+        async for pos, sentence in events:
+            yield f'{{"index": {pos}, "sentence": {sentence.model_dump_json()}}}\n'
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/cache/stats")
+async def cache_stats() -> dict[str, dict[str, float]]:
+    return collect_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    """Metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        render_metrics(usage_stats, get_backend().model, collect_stats()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+def collect_stats() -> dict[str, dict[str, float]]:
+    stats = {"sentences": sentence_cache.stats.as_dict()}
+    if word_memo is not None:
+        stats["words"] = word_memo.stats.as_dict()
+    stats["coalesced"] = in_flight.stats.as_dict()
+    stats["prompt"] = usage_stats.as_dict()
+    stats["hedging"] = hedger.stats.as_dict()
+    stats["cascade"] = get_cascade().stats.as_dict()
+    current_bundle = get_bundle()
+    if current_bundle is not None:
+        stats["bundle"] = {
+            "entries": len(current_bundle),
+            **current_bundle.stats.as_dict(),
+        }
+    return stats
 
 
 if __name__ == "__main__":
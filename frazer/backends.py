@@ -0,0 +1,329 @@
+"""
+Backends serving the analyses. All of them are reached through an OpenAI client,
+so that instructor, streaming and batching work the same with any of them:
+
+- `OpenAIBackend`: the OpenAI API, with strict structured outputs: the model's
+  decoding is constrained to the response schema.
+- `OpenAICompatibleBackend`: any server implementing the chat completions API
+  with tool calls, such as llama.cpp or vLLM, e.g. running a cheap local model.
+- `FakeBackend`: deterministic analyses generated in-process, without network
+  access, for load tests and throughput benchmarks.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any
+
+from frazer.clients import (
+    ClientSettings,
+    build_async_openai_client,
+    build_openai_client,
+)
+from frazer.memo import tokenize
+
+if TYPE_CHECKING:
+    import httpx
+    import instructor
+    from openai import AsyncOpenAI, OpenAI
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+class Backend(ABC):
+    """Model and API answering the analysis requests."""
+
+    name = "openai"
+    # Whether the API implements the Batch API used by offline runs.
+    supports_batches = True
+
+    def __init__(self, model: str = DEFAULT_MODEL, mode: str = "tool_call") -> None:
+        self.model = model
+        self.mode = mode
+
+    def instructor_mode(self) -> "instructor.Mode":
+        import instructor
+
+        return instructor.Mode(self.mode)
+
+    @abstractmethod
+    def openai_client(self, settings: ClientSettings) -> "OpenAI": ...
+
+    @abstractmethod
+    def async_openai_client(self, settings: ClientSettings) -> "AsyncOpenAI": ...
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(model={self.model!r})"
+
+
+class OpenAIBackend(Backend):
+    def __init__(self, model: str = DEFAULT_MODEL, mode: str = "tools_strict") -> None:
+        super().__init__(model, mode)
+
+    def openai_client(self, settings: ClientSettings) -> "OpenAI":
+        return build_openai_client(settings)
+
+    def async_openai_client(self, settings: ClientSettings) -> "AsyncOpenAI":
+        return build_async_openai_client(settings)
+
+
+class OpenAICompatibleBackend(Backend):
+    """
+    Server implementing the OpenAI chat completions API at `base_url`. Servers
+    without tool calling support can be used with `mode="json_mode"`, the ones
+    supporting strict tools, such as vLLM, with `mode="tools_strict"`.
+    """
+
+    name = "local"
+    supports_batches = False
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: str = "not-needed",
+        mode: str = "tool_call",
+    ) -> None:
+        super().__init__(model, mode)
+        self.base_url = base_url
+        self.api_key = api_key
+
+    def openai_client(self, settings: ClientSettings) -> "OpenAI":
+        return build_openai_client(
+            settings, base_url=self.base_url, api_key=self.api_key
+        )
+
+    def async_openai_client(self, settings: ClientSettings) -> "AsyncOpenAI":
+        return build_async_openai_client(
+            settings, base_url=self.base_url, api_key=self.api_key
+        )
+
+
+LISTED_SENTENCE_PATTERN = re.compile(r"^\d+\. (.*)$", re.M)
+ONLY_WORDS_PATTERN = re.compile(r"only the words (.*), in this order")
+
+
+def fake_sentence(input_clean: str, only_words: list[str] | None = None) -> dict:
+    """Deterministic analysis of a sentence, labelling every word as 'other'."""
+    words = only_words if only_words is not None else tokenize(input_clean)
+    return {
+        "text": input_clean,
+        "translation": input_clean,
+        "words": [
+            {
+                "original_value": word,
+                "root": word.lower(),
+                "original_value_translation": word.lower(),
+                "syntatic_category": "other",
+                "other_syntatic_category": "unknown",
+            }
+            for word in words
+        ],
+        "grammatically_correct": True,
+        "remarks": None,
+    }
+
+
+def fake_arguments(body: dict[str, Any]) -> tuple[str, str]:
+    """Tool name and arguments answering an analysis request."""
+    # The sentences are in the first user message, see `build_messages`
+    user_messages = [m["content"] for m in body["messages"] if m["role"] == "user"]
+    content = user_messages[0]
+    name = body["tools"][0]["function"]["name"]
+    if name == "AnalysedSentences":
+        sentences = [
+            fake_sentence(sentence)
+            for sentence in LISTED_SENTENCE_PATTERN.findall(content)
+        ]
+        return name, json.dumps({"sentences": sentences}, ensure_ascii=False)
+    input_clean = content
+    instruction = "\n".join(user_messages[1:])
+    only_words = None
+    if "leave the list of words empty" in instruction:
+        only_words = []
+    elif only_match := ONLY_WORDS_PATTERN.search(instruction):
+        only_words = re.findall(r"'([^']*)'", only_match.group(1))
+    sentence = fake_sentence(input_clean, only_words)
+    if name == "CompactSentence":
+        from frazer.analyser import AnalysedSentence
+        from frazer.wire import to_compact
+
+        compact = to_compact(AnalysedSentence.model_validate(sentence))
+        return name, compact.model_dump_json(exclude_none=True)
+    return name, json.dumps(sentence, ensure_ascii=False)
+
+
+def fake_completion(body: dict[str, Any], cached_tokens: int = 0) -> "httpx.Response":
+    import httpx
+
+    name, arguments = fake_arguments(body)
+    prompt_tokens = len(json.dumps(body)) // 4
+    completion_tokens = len(arguments) // 4
+    tool_call = {
+        "id": "call_fake",
+        "type": "function",
+        "function": {"name": name, "arguments": arguments},
+    }
+    if not body.get("stream"):
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": None,
+                            "tool_calls": [tool_call],
+                        },
+                        "finish_reason": "tool_calls",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                },
+            },
+        )
+    events = []
+    for start in range(0, len(arguments), 16):
+        function = {"arguments": arguments[start : start + 16]}
+        if start == 0:
+            function["name"] = name
+        delta = {
+            "tool_calls": [
+                {
+                    "index": 0,
+                    "id": "call_fake",
+                    "type": "function",
+                    "function": function,
+                }
+            ]
+        }
+        chunk = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        events.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+    events.append("data: [DONE]\n\n")
+    return httpx.Response(
+        200,
+        content="".join(events).encode("utf-8"),
+        headers={"content-type": "text/event-stream"},
+    )
+
+
+class FakeBackend(Backend):
+    """
+    Answers every request in-process with a deterministic analysis, after
+    `latency` seconds, so load tests measure everything but the model.
+    """
+
+    name = "fake"
+    supports_batches = False
+
+    def __init__(self, latency: float = 0.0, model: str = "fake") -> None:
+        super().__init__(model)
+        self.latency = latency
+        self.last_prompt = ""
+        # Requests are answered concurrently by the client threads
+        self._lock = threading.Lock()
+
+    def cached_tokens(self, body: dict[str, Any]) -> int:
+        """
+        Prompt tokens a provider would serve from its prompt cache: the prefix
+        shared with the previous request, from 1024 tokens in blocks of 128.
+        """
+        prompt = json.dumps([body.get("tools"), body["messages"]])
+        with self._lock:
+            last_prompt, self.last_prompt = self.last_prompt, prompt
+        shared = len(os.path.commonprefix([prompt, last_prompt])) // 4
+        return shared // 128 * 128 if shared >= 1024 else 0
+
+    def handle(self, request: "httpx.Request") -> "httpx.Response":
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.loads(request.content)
+        return fake_completion(body, self.cached_tokens(body))
+
+    async def handle_async(self, request: "httpx.Request") -> "httpx.Response":
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        body = json.loads(request.content)
+        return fake_completion(body, self.cached_tokens(body))
+
+    def openai_client(self, settings: ClientSettings) -> "OpenAI":
+        import httpx
+        from openai import OpenAI
+
+        return OpenAI(
+            api_key="fake",
+            max_retries=0,
+            http_client=httpx.Client(transport=httpx.MockTransport(self.handle)),
+        )
+
+    def async_openai_client(self, settings: ClientSettings) -> "AsyncOpenAI":
+        import httpx
+        from openai import AsyncOpenAI
+
+        transport = httpx.MockTransport(self.handle_async)
+        return AsyncOpenAI(
+            api_key="fake",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=transport),
+        )
+
+
+def create_backend(
+    name: str = "openai",
+    model: str | None = None,
+    base_url: str | None = None,
+    api_key: str | None = None,
+    strict: bool | None = None,
+) -> Backend:
+    """
+    Backend by name: `openai`, `local` (OpenAI-compatible server) or `fake`.
+    Strict structured outputs are used by default with the OpenAI API only.
+    """
+    if name == "openai":
+        mode = "tool_call" if strict is False else "tools_strict"
+        return OpenAIBackend(model or DEFAULT_MODEL, mode)
+    if name == "local":
+        if not base_url or not model:
+            raise ValueError("The local backend needs a base URL and a model")
+        mode = "tools_strict" if strict else "tool_call"
+        return OpenAICompatibleBackend(base_url, model, api_key or "not-needed", mode)
+    if name == "fake":
+        return FakeBackend(model=model or "fake")
+    raise ValueError(f"Unknown backend: {name}")
+
+
+def backend_from_env(
+    name: str | None = None, model: str | None = None, base_url: str | None = None
+) -> Backend:
+    """
+    Backend configured by the `FRAZER_BACKEND`, `FRAZER_MODEL`,
+    `FRAZER_BASE_URL`, `FRAZER_API_KEY` and `FRAZER_STRICT` environment
+    variables, the arguments given taking precedence over them.
+    """
+    strict = os.environ.get("FRAZER_STRICT")
+    return create_backend(
+        name or os.environ.get("FRAZER_BACKEND", "openai"),
+        model=model or os.environ.get("FRAZER_MODEL"),
+        base_url=base_url or os.environ.get("FRAZER_BASE_URL"),
+        api_key=os.environ.get("FRAZER_API_KEY"),
+        strict=None if strict is None else strict not in ("", "0", "false"),
+    )
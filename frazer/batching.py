@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import json
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from functools import cache
+from json import JSONDecodeError
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+from frazer import analyser
+from frazer.analyser import (
+    ANALYSIS_INSTRUCTIONS,
+    PROMPT_VERSION,
+    SYSTEM_PROMPT,
+    AnalysedSentence,
+    analyse_sentence,
+    analyse_sentence_async,
+    clean_sentence,
+    get_cached_sentence,
+    set_cached_sentence,
+)
+from frazer.cache import TieredCache
+from frazer.instrumentation import completion_errors
+from frazer.memo import tokenize
+from frazer.text import DEFAULT_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# Rough size of the generated analysis, used to pack sentences in batches.
+TOKENS_PER_WORD = 70
+TOKENS_PER_SENTENCE = 60
+
+DEFAULT_TOKEN_BUDGET = 6000
+DEFAULT_MAX_BATCH_SIZE = 20
+
+T = TypeVar("T")
+
+
+class AnalysedSentences(BaseModel):
+    sentences: list[AnalysedSentence | None]
+
+    @field_validator("sentences", mode="wrap")
+    @classmethod
+    def keep_invalid_as_none(cls, value: Any, handler: Any) -> list:
+        """
+        Validate each sentence on its own, so that one invalid analysis doesn't
+        invalidate the whole batch. Invalid analyses are replaced by None.
+        """
+        if not isinstance(value, list):
+            return handler(value)
+        sentences = []
+        for item in value:
+            try:
+                sentences.extend(handler([item]))
+            except ValidationError as e:
+                logger.debug(f"Invalid analysis in batch: {e}")
+                sentences.append(None)
+        return sentences
+
+
+def estimate_tokens(input_clean: str) -> int:
+    """Estimate the number of tokens generated for the analysis of a sentence."""
+    return TOKENS_PER_SENTENCE + TOKENS_PER_WORD * len(tokenize(input_clean))
+
+
+def plan_batches(
+    items: Iterable[T],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    key: Callable[[T], str] = str,
+) -> Iterator[list[T]]:
+    """
+    Lazily pack sentences, in order, into batches whose estimated output stays
+    within the token budget. A sentence exceeding the budget on its own gets its
+    own batch. `key` gives the sentence of an item.
+    """
+    batch: list[T] = []
+    batch_tokens = 0
+    for item in items:
+        tokens = estimate_tokens(key(item))
+        if batch and (
+            batch_tokens + tokens > token_budget or len(batch) >= max_batch_size
+        ):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+# Static prompt of batched requests, see `analyser.STATIC_PROMPT`.
+BATCH_STATIC_PROMPT = (
+    f"{SYSTEM_PROMPT}\n"
+    "Do a syntatical analysis of each of the sentences listed by the user, "
+    "answering with one analysis per sentence in the same order. "
+    f"{ANALYSIS_INSTRUCTIONS}"
+)
+
+
+def build_batch_messages(input_cleans: list[str]) -> list[dict[str, str]]:
+    listed = "\n".join(
+        f"{pos}. {input_clean}" for pos, input_clean in enumerate(input_cleans, 1)
+    )
+    return [
+        {"role": "system", "content": BATCH_STATIC_PROMPT},
+        {"role": "user", "content": listed},
+    ]
+
+
+@cache
+def batch_prompt_fingerprint() -> str:
+    """
+    Hash of the prompt template and response schema of batched requests, the
+    namespace of their analyses in the sentence cache.
+    """
+    payload = json.dumps(
+        [
+            PROMPT_VERSION,
+            build_batch_messages(["{sentence}"]),
+            AnalysedSentences.model_json_schema(),
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_invalid_batch(error: Exception) -> bool:
+    """
+    Whether a batch failed because its response didn't validate, or was cut
+    short, the failures that smaller batches can avoid. Other errors, like the
+    API's, would fail the halves alike.
+    """
+    from instructor.exceptions import (
+        IncompleteOutputException,
+        InstructorRetryException,
+    )
+
+    invalid = (ValidationError, JSONDecodeError, IncompleteOutputException)
+    if isinstance(error, InstructorRetryException):
+        return isinstance(error.args[0] if error.args else None, invalid)
+    return isinstance(error, invalid)
+
+
+def match_batch(
+    input_cleans: list[str], batch: AnalysedSentences
+) -> list[AnalysedSentence | None]:
+    """Results of a batch by sentence, None where the batch has no valid analysis."""
+    matched: list[AnalysedSentence | None] = []
+    for pos, input_clean in enumerate(input_cleans):
+        sentence = batch.sentences[pos] if pos < len(batch.sentences) else None
+        if sentence is not None and tokenize(sentence.text) != tokenize(input_clean):
+            sentence = None
+        matched.append(sentence)
+    return matched
+
+
+def analyse_batch(input_cleans: list[str]) -> list[AnalysedSentence]:
+    """
+    Analyse several sentences in a single request. A failed request is split in
+    halves, and sentences missing or invalid in a response are analysed on
+    their own.
+    """
+    if len(input_cleans) == 1:
+        return [analyse_sentence(input_cleans[0])]
+    try:
+        with completion_errors():
+            batch: AnalysedSentences = analyser.get_client().chat.completions.create(
+                model=analyser.get_backend().model,
+                response_model=AnalysedSentences,
+                temperature=0.0,
+                top_p=1,
+                messages=build_batch_messages(input_cleans),
+            )
+    except Exception as e:
+        if not is_invalid_batch(e):
+            raise
+        logger.warning(f"Batch of {len(input_cleans)} sentences failed: {e}")
+        half = len(input_cleans) // 2
+        return analyse_batch(input_cleans[:half]) + analyse_batch(input_cleans[half:])
+    return [
+        sentence or analyse_sentence(input_clean)
+        for input_clean, sentence in zip(input_cleans, match_batch(input_cleans, batch))
+    ]
+
+
+async def analyse_batch_async(input_cleans: list[str]) -> list[AnalysedSentence]:
+    """Same as `analyse_batch`, but without blocking the event loop."""
+    if len(input_cleans) == 1:
+        return [await analyse_sentence_async(input_cleans[0])]
+    try:
+        with completion_errors():
+            batch: AnalysedSentences = (
+                await analyser.get_async_client().chat.completions.create(
+                    model=analyser.get_backend().model,
+                    response_model=AnalysedSentences,
+                    temperature=0.0,
+                    top_p=1,
+                    messages=build_batch_messages(input_cleans),
+                )
+            )
+    except Exception as e:
+        if not is_invalid_batch(e):
+            raise
+        logger.warning(f"Batch of {len(input_cleans)} sentences failed: {e}")
+        half = len(input_cleans) // 2
+        left, right = await asyncio.gather(
+            analyse_batch_async(input_cleans[:half]),
+            analyse_batch_async(input_cleans[half:]),
+        )
+        return left + right
+
+    async def fallback(
+        input_clean: str, sentence: AnalysedSentence | None
+    ) -> AnalysedSentence:
+        return sentence or await analyse_sentence_async(input_clean)
+
+    matched = match_batch(input_cleans, batch)
+    return list(await asyncio.gather(*map(fallback, input_cleans, matched)))
+
+
+def analyse_sentences(
+    input_sentences: list[str],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    sentence_cache: TieredCache | None = None,
+) -> list[AnalysedSentence]:
+    """
+    Analyse a list of sentences packing them into as few requests as the token
+    budget allows. Results are returned in the order of the input.
+    """
+    input_cleans = [clean_sentence(sentence) for sentence in input_sentences]
+    fingerprint = batch_prompt_fingerprint()
+    results = {
+        input_clean: get_cached_sentence(input_clean, sentence_cache, fingerprint)
+        for input_clean in input_cleans
+    }
+    pending = [input_clean for input_clean, result in results.items() if result is None]
+    for batch in plan_batches(pending, token_budget):
+        for input_clean, sentence in zip(batch, analyse_batch(batch)):
+            results[input_clean] = sentence
+            set_cached_sentence(input_clean, sentence, sentence_cache, fingerprint)
+    return [results[input_clean] for input_clean in input_cleans]
+
+
+async def analyse_sentences_async(
+    input_sentences: list[str],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    sentence_cache: TieredCache | None = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> list[AnalysedSentence]:
+    """
+    Same as `analyse_sentences`, with up to `max_concurrency` batches requested
+    concurrently.
+    """
+    input_cleans = [clean_sentence(sentence) for sentence in input_sentences]
+    fingerprint = batch_prompt_fingerprint()
+    results = {
+        input_clean: get_cached_sentence(input_clean, sentence_cache, fingerprint)
+        for input_clean in input_cleans
+    }
+    pending = [input_clean for input_clean, result in results.items() if result is None]
+    limit = asyncio.Semaphore(max_concurrency)
+
+    async def analyse(batch: list[str]) -> list[AnalysedSentence]:
+        async with limit:
+            return await analyse_batch_async(batch)
+
+    batches = list(plan_batches(pending, token_budget))
+    analysed = await asyncio.gather(*map(analyse, batches))
+    for batch, sentences in zip(batches, analysed):
+        for input_clean, sentence in zip(batch, sentences):
+            results[input_clean] = sentence
+            set_cached_sentence(input_clean, sentence, sentence_cache, fingerprint)
+    return [results[input_clean] for input_clean in input_cleans]
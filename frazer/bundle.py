@@ -0,0 +1,226 @@
+"""
+Analyses computed ahead of time for a curated list of sentences, shipped in a
+single file with the Lambda package so that the most common sentences are
+answered without a request from the first invocation.
+
+The file is memory-mapped and only the pages read are loaded: a header, an
+index of `(digest, offset, length)` entries sorted by the digest of the
+sentence cache key, looked up by binary search, and the zlib-compressed JSON of
+the analyses.
+
+    python -m frazer.bundle --sentences evaluation/input_sentences.csv
+
+Keys include the model and the prompt fingerprint: a bundle built for another
+model or prompt version is simply never hit.
+"""
+
+import csv
+import logging
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import click
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUNDLE_PATH = Path(__file__).parent / "analyses.bundle"
+
+MAGIC = b"FRZB"
+VERSION = 1
+# Magic, version and number of entries.
+HEADER = struct.Struct("<4sII")
+# Digest of the key, offset and length of the compressed analysis.
+ENTRY = struct.Struct("<16sQI")
+DIGEST_SIZE = 16
+# Share of the curated sentences which must be analysed to write a bundle.
+DEFAULT_MIN_SHARE = 0.9
+
+
+def key_digest(key: str) -> bytes:
+    """Digest indexing a sentence cache key, itself a SHA-256 hex digest."""
+    return bytes.fromhex(key)[:DIGEST_SIZE]
+
+
+@dataclass
+class BundleStats:
+    hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> dict[str, float]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class AnalysisBundle:
+    """Read-only lookup of serialized analyses by sentence cache key."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} bundle")
+        self.stats = BundleStats()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _digest_at(self, pos: int) -> bytes:
+        start = HEADER.size + pos * ENTRY.size
+        return self._data[start : start + DIGEST_SIZE]
+
+    def get(self, key: str) -> str | None:
+        """The JSON of the analysis stored under the key, if any."""
+        digest = key_digest(key)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._digest_at(middle) < digest:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count or self._digest_at(low) != digest:
+            self.stats.misses += 1
+            return None
+        _, offset, length = ENTRY.unpack_from(
+            self._data, HEADER.size + low * ENTRY.size
+        )
+        self.stats.hits += 1
+        return zlib.decompress(self._data[offset : offset + length]).decode("utf-8")
+
+    def close(self) -> None:
+        self._data.close()
+
+
+def write_bundle(path: Path | str, entries: Iterable[tuple[str, str]]) -> int:
+    """
+    Write the `(key, JSON)` entries to a bundle file, the last value of a key
+    winning. Returns the number of entries written.
+    """
+    blobs = {
+        key_digest(key): zlib.compress(value.encode("utf-8"), 9)
+        for key, value in entries
+    }
+    digests = sorted(blobs)
+    offset = HEADER.size + len(digests) * ENTRY.size
+    index = []
+    for digest in digests:
+        index.append(ENTRY.pack(digest, offset, len(blobs[digest])))
+        offset += len(blobs[digest])
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(digests)))
+        file.writelines(index)
+        file.writelines(blobs[digest] for digest in digests)
+    return len(digests)
+
+
+def bundle_from_env() -> AnalysisBundle | None:
+    """
+    Bundle at `FRAZER_BUNDLE`, by default the one built next to the package,
+    if it exists. `FRAZER_BUNDLE=0` disables it.
+    """
+    path = os.environ.get("FRAZER_BUNDLE", str(DEFAULT_BUNDLE_PATH))
+    if path in ("", "0", "false") or not Path(path).is_file():
+        return None
+    return AnalysisBundle(path)
+
+
+def read_sentences(path: Path) -> list[str]:
+    """Sentences of a CSV file with a `sentence` column, or one per line."""
+    with path.open(encoding="utf-8") as file:
+        if path.suffix == ".csv":
+            sentences = [row["sentence"] for row in csv.DictReader(file)]
+        else:
+            sentences = file.read().splitlines()
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+
+def build_bundle(
+    sentences: list[str],
+    output: Path,
+    max_workers: int = 8,
+    min_share: float = DEFAULT_MIN_SHARE,
+) -> int:
+    """
+    Analyse the sentences with the configured backend and write their analyses
+    to a bundle. Sentences failing to be analysed are left out, but if less
+    than `min_share` of them are analysed, e.g. without access to the model,
+    a ValueError is raised and no bundle is written.
+    """
+    from frazer.analyser import analyse_sentence, clean_sentence, sentence_cache_key
+
+    def analyse(sentence: str) -> tuple[str, str] | None:
+        try:
+            analysed = analyse_sentence(sentence)
+        except Exception:
+            logger.exception("Error analysing sentence %r", sentence)
+            return None
+        return sentence_cache_key(clean_sentence(sentence)), analysed.model_dump_json()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        entries = [entry for entry in executor.map(analyse, sentences) if entry]
+    if not entries or len(entries) < min_share * len(sentences):
+        raise ValueError(
+            f"Only {len(entries)} of {len(sentences)} sentences analysed, "
+            f"less than the {min_share:.0%} required to write a bundle"
+        )
+    return write_bundle(output, entries)
+
+
+def command() -> "click.Command":
+    """
+    Command line of the bundle builder. click is only imported to run it, not
+    by the Lambda reading the bundle.
+    """
+    import click
+
+    @click.command()
+    @click.option(
+        "--sentences",
+        type=click.Path(exists=True, dir_okay=False, path_type=Path),
+        required=True,
+        help="Curated sentences: a CSV file with a 'sentence' column, or one per line.",
+    )
+    @click.option(
+        "--output",
+        type=click.Path(dir_okay=False, path_type=Path),
+        default=DEFAULT_BUNDLE_PATH,
+        show_default=True,
+        help="Bundle file to write.",
+    )
+    @click.option("--max-concurrency", default=8, show_default=True)
+    @click.option(
+        "--min-share",
+        default=DEFAULT_MIN_SHARE,
+        show_default=True,
+        help="Share of the sentences which must be analysed, or the command fails.",
+    )
+    def main(
+        sentences: Path, output: Path, max_concurrency: int, min_share: float
+    ) -> None:
+        """Pre-analyse curated sentences into a bundle shipped with the package."""
+        listed = read_sentences(sentences)
+        try:
+            written = build_bundle(listed, output, max_concurrency, min_share)
+        except ValueError as e:
+            raise click.ClickException(str(e)) from e
+        click.echo(f"{written} of {len(listed)} sentences bundled in {output}")
+
+    return main
+
+
+if __name__ == "__main__":
+    from frazer import configure
+
+    configure()
+    command()()
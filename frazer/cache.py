@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache evicting the least recently used entry once
+    `max_size` is reached. Entries older than `ttl` seconds are treated as missing.
+    """
+
+    def __init__(
+        self, max_size: int = DEFAULT_MAX_SIZE, ttl: float | None = DEFAULT_TTL
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if self.ttl is not None and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Durable key-value cache stored in a single SQLite table."""
+
+    def __init__(self, path: Path | str, ttl: float | None = DEFAULT_TTL) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl is not None and time.time() - created_at > self.ttl:
+                with self._conn:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at) "
+                "VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class TieredCache:
+    """
+    Two-tier cache: an in-process LRU in front of an optional SQLite store.
+    Disk hits are promoted to the memory tier.
+    """
+
+    def __init__(self, memory: LRUCache, disk: SQLiteCache | None = None) -> None:
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    @classmethod
+    def from_env(cls) -> "TieredCache":
+        """
+        Build a cache configured by the environment variables FRAZER_CACHE_SIZE,
+        FRAZER_CACHE_TTL (seconds) and FRAZER_CACHE_PATH (enables the disk tier).
+        """
+        max_size = int(os.environ.get("FRAZER_CACHE_SIZE", DEFAULT_MAX_SIZE))
+        ttl = float(os.environ.get("FRAZER_CACHE_TTL", DEFAULT_TTL))
+        path = os.environ.get("FRAZER_CACHE_PATH")
+        disk = SQLiteCache(path, ttl=ttl) if path else None
+        return cls(LRUCache(max_size=max_size, ttl=ttl), disk)
+
+    def get(self, key: str) -> str | None:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats.memory_hits += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.stats.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+        self.stats.misses += 1
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
@@ -0,0 +1,157 @@
+"""
+Model cascade: sentences are analysed by the cheapest model first, and their
+analysis is only requested again from a stronger model when it fails the local
+consistency checks, so most sentences take the price and latency of the
+cheapest model.
+"""
+
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from frazer.memo import tokenize
+
+if TYPE_CHECKING:
+    from frazer.analyser import AnalysedSentence, VerbConjugation
+
+# Values of `word_causing_declension` meaning that no word causes it.
+NO_WORD = {"", "-", "none", "n/a", "null"}
+# Moods not inflected for person, and moods without tenses.
+IMPERSONAL_MOODS = {"infinitive", "active_participle", "passive_participle"}
+TENSELESS_MOODS = {"infinitive", "imperative", *IMPERSONAL_MOODS}
+
+
+def conjugation_problems(conjugation: "VerbConjugation") -> list[str]:
+    """Combinations of person, number, tense and mood which can't occur."""
+    mood = conjugation.mood.value
+    problems = []
+    if conjugation.person is not None and conjugation.number is None:
+        problems.append("person without a number")
+    if mood in IMPERSONAL_MOODS and conjugation.person is not None:
+        problems.append(f"person in the {mood}")
+    if mood in TENSELESS_MOODS and conjugation.tense is not None:
+        problems.append(f"tense in the {mood}")
+    if mood == "infinitive" and (conjugation.number or conjugation.gender):
+        problems.append("number or gender in the infinitive")
+    if mood in ("indicative", "conditional") and conjugation.person is None:
+        problems.append(f"no person in the {mood}")
+    return problems
+
+
+def refers_to_sentence(value: str, tokens: list[str], roots: set[str]) -> bool:
+    """
+    Whether a word named by the model is in the sentence: one of its tokens or
+    their roots, or the stem of a token (models often name a noun by its stem).
+    """
+    if value.strip().lower() in NO_WORD:
+        return True
+    lowered = [token.lower() for token in tokens]
+    for word in tokenize(value.lower()):
+        if word not in roots and not any(token.startswith(word) for token in lowered):
+            return False
+    return True
+
+
+def consistency_problems(sentence: "AnalysedSentence", tokens: list[str]) -> list[str]:
+    """
+    Problems of an analysis found without a model: tokens of the sentence
+    without a word, declensions caused by a word not in the sentence and
+    impossible verb conjugations. An empty list if there are none.
+    """
+    problems = []
+    analysed = Counter(word.original_value.lower() for word in sentence.words)
+    for token in tokens:
+        if analysed[token.lower()] > 0:
+            analysed[token.lower()] -= 1
+        else:
+            problems.append(f"'{token}' not analysed")
+    roots = {word.root.lower() for word in sentence.words}
+    for word in sentence.words:
+        cause = getattr(word, "word_causing_declension", None)
+        if cause is not None and not refers_to_sentence(cause, tokens, roots):
+            problems.append(f"'{word.original_value}' declined by '{cause}'")
+        conjugation = getattr(word, "conjugation", None)
+        if conjugation is not None:
+            problems += [
+                f"'{word.original_value}': {problem}"
+                for problem in conjugation_problems(conjugation)
+            ]
+    return problems
+
+
+@dataclass
+class CascadeStats:
+    """Analyses requested from each tier, and the ones it answered."""
+
+    requests: list[int] = field(default_factory=list)
+    accepted: list[int] = field(default_factory=list)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def record(self, tier: int, accepted: bool) -> None:
+        with self._lock:
+            while len(self.requests) <= tier:
+                self.requests.append(0)
+                self.accepted.append(0)
+            self.requests[tier] += 1
+            self.accepted[tier] += accepted
+
+    def hit_rate(self, tier: int) -> float:
+        """Share of the analyses answered by the tier."""
+        total = self.requests[0] if self.requests else 0
+        return self.accepted[tier] / total if total else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        stats: dict[str, float] = {}
+        for tier, (requests, accepted) in enumerate(zip(self.requests, self.accepted)):
+            stats[f"tier{tier}_requests"] = requests
+            stats[f"tier{tier}_accepted"] = accepted
+            stats[f"tier{tier}_hit_rate"] = self.hit_rate(tier)
+        return stats
+
+
+class Cascade:
+    """
+    Models analysing a sentence in turn, cheapest first, until one gives an
+    analysis without consistency problems. The last one's is always kept.
+    A single model answers alone instead of the backend's, and without models
+    the backend's model does.
+    """
+
+    def __init__(self, models: list[str] | None = None) -> None:
+        self.models = models or []
+        self.stats = CascadeStats()
+
+    @classmethod
+    def from_env(cls) -> "Cascade":
+        """Cascade of the comma-separated models of `FRAZER_CASCADE`."""
+        return cls(parse_models(os.environ.get("FRAZER_CASCADE", "")))
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.models)
+
+    def tiers(self, default_model: str) -> list[str]:
+        return self.models if self.enabled else [default_model]
+
+    def name(self, default_model: str) -> str:
+        """Name of the cascade keying its analyses, like a model's."""
+        return ">".join(self.tiers(default_model))
+
+    def accept(
+        self, tier: int, sentence: "AnalysedSentence", tokens: list[str]
+    ) -> bool:
+        """Whether the analysis of a tier is kept, recorded in the stats."""
+        if not self.enabled:
+            return True
+        last = tier == len(self.models) - 1
+        accepted = last or not consistency_problems(sentence, tokens)
+        self.stats.record(tier, accepted)
+        return accepted
+
+
+def parse_models(value: str) -> list[str]:
+    return [model.strip() for model in value.split(",") if model.strip()]
@@ -0,0 +1,128 @@
+import logging
+import os
+from dataclasses import dataclass, replace
+from functools import cache
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ClientSettings:
+    """
+    Connection settings of the HTTP clients talking to the OpenAI API. HTTP/2
+    is used through the `h2` package, installed with `httpx[http2]`; in an
+    environment without it a warning is logged and the clients fall back to
+    HTTP/1.1.
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    http2: bool = True
+    max_retries: int = 2
+
+    @classmethod
+    def from_env(cls) -> "ClientSettings":
+        """
+        Settings from the `FRAZER_HTTP_MAX_CONNECTIONS`, `FRAZER_HTTP_KEEPALIVE`,
+        `FRAZER_HTTP_TIMEOUT` and `FRAZER_HTTP2` environment variables.
+        """
+        default = cls()
+        return cls(
+            max_connections=int(
+                os.environ.get("FRAZER_HTTP_MAX_CONNECTIONS", default.max_connections)
+            ),
+            max_keepalive_connections=int(
+                os.environ.get(
+                    "FRAZER_HTTP_KEEPALIVE", default.max_keepalive_connections
+                )
+            ),
+            read_timeout=float(
+                os.environ.get("FRAZER_HTTP_TIMEOUT", default.read_timeout)
+            ),
+            http2=os.environ.get("FRAZER_HTTP2", "1") not in ("0", "false", ""),
+        )
+
+    def sized_for(self, concurrency: int) -> "ClientSettings":
+        """Settings with a pool keeping a connection alive per concurrent call."""
+        return replace(
+            self,
+            max_connections=max(self.max_connections, concurrency),
+            max_keepalive_connections=concurrency,
+        )
+
+    @property
+    def use_http2(self) -> bool:
+        if not self.http2:
+            return False
+        if find_spec("h2") is None:
+            warn_http2_unavailable()
+            return False
+        return True
+
+    def limits(self) -> "httpx.Limits":
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout(self) -> "httpx.Timeout":
+        import httpx
+
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+
+@cache
+def warn_http2_unavailable() -> None:
+    logger.warning(
+        "HTTP/2 requested but the h2 package isn't installed, using HTTP/1.1: "
+        "install httpx[http2], or set FRAZER_HTTP2=0 to silence this warning"
+    )
+
+
+def build_openai_client(settings: ClientSettings, **kwargs: Any) -> "OpenAI":
+    """
+    OpenAI client with a connection pool following the settings. The client is
+    thread-safe, so a single one is shared by all threads.
+    """
+    from openai import DefaultHttpxClient, OpenAI
+
+    http_client = DefaultHttpxClient(
+        limits=settings.limits(),
+        timeout=settings.timeout(),
+        http2=settings.use_http2,
+    )
+    return OpenAI(
+        http_client=http_client,
+        timeout=settings.timeout(),
+        max_retries=settings.max_retries,
+        **kwargs,
+    )
+
+
+def build_async_openai_client(settings: ClientSettings, **kwargs: Any) -> "AsyncOpenAI":
+    """Same as `build_openai_client`, for the async client."""
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    http_client = DefaultAsyncHttpxClient(
+        limits=settings.limits(),
+        timeout=settings.timeout(),
+        http2=settings.use_http2,
+    )
+    return AsyncOpenAI(
+        http_client=http_client,
+        timeout=settings.timeout(),
+        max_retries=settings.max_retries,
+        **kwargs,
+    )
@@ -0,0 +1,113 @@
+"""
+Hedged requests: when a request takes longer than most recent ones, an
+identical one is started and whichever returns a valid analysis first is used,
+cancelling the other. This trims the tail latency caused by the occasional very
+slow completion, at the cost of the few requests duplicated, which are capped
+to a share of all the requests.
+"""
+
+import asyncio
+import os
+import statistics
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# Latencies observed before hedging, for the percentile to be meaningful.
+MIN_SAMPLES = 20
+
+
+@dataclass
+class HedgingStats:
+    requests: int = 0
+    hedged: int = 0
+    won: int = 0
+
+    def as_dict(self) -> dict[str, float]:
+        return {"requests": self.requests, "hedged": self.hedged, "won": self.won}
+
+
+class Hedger:
+    """
+    Starts a second request when the first hasn't returned after the
+    `percentile` of the latencies of the last `window` requests, as long as at
+    most `max_rate` of the requests have been hedged.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        percentile: float = 95,
+        max_rate: float = 0.05,
+        window: int = 500,
+    ) -> None:
+        self.enabled = enabled
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.stats = HedgingStats()
+
+    @classmethod
+    def from_env(cls) -> "Hedger":
+        """
+        Hedger enabled by the `FRAZER_HEDGE` environment variable, configured
+        by `FRAZER_HEDGE_PERCENTILE` and `FRAZER_HEDGE_MAX_RATE`.
+        """
+        default = cls()
+        return cls(
+            enabled=os.environ.get("FRAZER_HEDGE", "") not in ("", "0", "false"),
+            percentile=float(
+                os.environ.get("FRAZER_HEDGE_PERCENTILE", default.percentile)
+            ),
+            max_rate=float(os.environ.get("FRAZER_HEDGE_MAX_RATE", default.max_rate)),
+        )
+
+    def delay(self) -> float | None:
+        """Seconds after which a request is hedged, None if it can't be."""
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        if self.stats.hedged >= self.max_rate * self.stats.requests:
+            return None
+        cuts = statistics.quantiles(self.latencies, n=100, method="inclusive")
+        return cuts[min(int(self.percentile), 99) - 1]
+
+    async def timed(self, func: Callable[[], Awaitable[T]]) -> T:
+        started = asyncio.get_running_loop().time()
+        result = await func()
+        self.latencies.append(asyncio.get_running_loop().time() - started)
+        return result
+
+    async def run(self, func: Callable[[], Awaitable[T]]) -> T:
+        """The result of `func`, hedged by a second call if it's too slow."""
+        if not self.enabled:
+            return await func()
+        self.stats.requests += 1
+        delay = self.delay()
+        first = asyncio.ensure_future(self.timed(func))
+        second = None
+        pending = {first}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    self.stats.hedged += 1
+                    second = asyncio.ensure_future(self.timed(func))
+                    pending.add(second)
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                succeeded = [task for task in done if task.exception() is None]
+                # A failed call leaves the other one to answer, if any
+                if succeeded or not pending:
+                    winner = succeeded[0] if succeeded else done.pop()
+                    if winner is second:
+                        self.stats.won += 1
+                    return winner.result()
+        finally:
+            # Cancel the slower call, or both if the caller is cancelled
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,361 @@
+"""
+Instrumentation of the analyses: the time spent in each stage, the completions
+requested, instructor's validation retries and the responses repaired locally
+instead (see `frazer.repair`), logged as structured fields for each API request
+and exposed as metrics in the Prometheus text format.
+
+The stages measured are:
+
+- `cache_lookup`, `plan` and `store`: the sentence cache, the lexicon and the
+  word memo around the request.
+- `request`: the analysis request, including instructor's parsing, validation
+  and retries.
+- `completion`: the round-trip to the API alone, timed by instructor's hooks.
+- `serialize`: the encoding of the API response.
+- `total`: the whole API request.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from frazer.usage import UsageStats
+
+if TYPE_CHECKING:
+    import instructor
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Count of observations per bucket, as a Prometheus histogram."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        # The last count is the one of observations above every bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Observations up to each bucket bound, ending with `+Inf`."""
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        total = 0
+        cumulative = []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+
+@dataclass
+class RequestRecord:
+    """Measures of a single request, logged when it ends."""
+
+    timings: dict[str, float] = field(default_factory=dict)
+    usage: UsageStats = field(default_factory=UsageStats)
+    retries: int = 0
+    repairs: int = 0
+    cache_hit: bool = False
+
+    def fields(self, model: str | None = None) -> dict[str, Any]:
+        fields: dict[str, Any] = {
+            f"{name}_ms": round(seconds * 1000, 1)
+            for name, seconds in self.timings.items()
+        }
+        fields.update(
+            cache_hit=self.cache_hit,
+            completions=self.usage.requests,
+            retries=self.retries,
+            repairs=self.repairs,
+            prompt_tokens=self.usage.prompt_tokens,
+            cached_tokens=self.usage.cached_tokens,
+            completion_tokens=self.usage.completion_tokens,
+        )
+        cost = self.usage.cost(model) if model else None
+        if cost is not None:
+            fields["cost_usd"] = round(cost, 8)
+        return fields
+
+
+class Metrics:
+    """Process-wide metrics of the analyses, safe to update from any thread."""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, Histogram] = {}
+        self.requests: Counter[str] = Counter()
+        self.completions = 0
+        self.retries = 0
+        self.repairs = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages.setdefault(stage, Histogram()).observe(seconds)
+
+    def count_request(self, outcome: str) -> None:
+        with self._lock:
+            self.requests[outcome] += 1
+
+    def count_completion(self) -> None:
+        with self._lock:
+            self.completions += 1
+
+    def count_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def count_repair(self) -> None:
+        with self._lock:
+            self.repairs += 1
+
+    def count_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            "# HELP frazer_stage_seconds Time spent in each stage of the analyses.",
+            "# TYPE frazer_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self.stages.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append(
+                        f'frazer_stage_seconds_bucket{{stage="{stage}",le="{bound}"}}'
+                        f" {count}"
+                    )
+                lines.append(
+                    f'frazer_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}'
+                )
+                lines.append(
+                    f'frazer_stage_seconds_count{{stage="{stage}"}} {histogram.count}'
+                )
+            lines += [
+                "# HELP frazer_requests_total API requests by outcome.",
+                "# TYPE frazer_requests_total counter",
+            ]
+            for outcome, count in sorted(self.requests.items()):
+                lines.append(f'frazer_requests_total{{outcome="{outcome}"}} {count}')
+            lines += counter(
+                "frazer_completions_total", "Completions requested.", self.completions
+            )
+            lines += counter(
+                "frazer_validation_retries_total",
+                "Responses failing validation, asked again by instructor.",
+                self.retries,
+            )
+            lines += counter(
+                "frazer_repairs_total",
+                "Responses repaired locally instead of asked again.",
+                self.repairs,
+            )
+            lines += counter(
+                "frazer_completion_errors_total",
+                "Completion requests failing.",
+                self.errors,
+            )
+        return lines
+
+
+def counter(name: str, help: str, value: float) -> list[str]:
+    return [f"# HELP {name} {help}", f"# TYPE {name} counter", f"{name} {value}"]
+
+
+def gauge(name: str, help: str, value: float) -> list[str]:
+    return [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+
+# Endings of the keys of the stats which can go down: ratios and sizes.
+GAUGE_STATS = ("_rate", "_ratio", "entries")
+
+metrics = Metrics()
+# Record of the request being served in the current context, see `track`.
+current_record: ContextVar[RequestRecord | None] = ContextVar(
+    "current_record", default=None
+)
+# Start of the completion request in flight in the current context.
+completion_started: ContextVar[float | None] = ContextVar(
+    "completion_started", default=None
+)
+# Model the completion in flight in the current context is requested from,
+# which differs from the backend's in the tiers of a cascade.
+completion_model: ContextVar[str | None] = ContextVar("completion_model", default=None)
+
+
+def add_timing(name: str, seconds: float) -> None:
+    metrics.observe(name, seconds)
+    record = current_record.get()
+    if record is not None:
+        record.timings[name] = record.timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a stage, adding it to the metrics and to the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(name, time.perf_counter() - started)
+
+
+def mark_cache_hit() -> None:
+    record = current_record.get()
+    if record is not None:
+        record.cache_hit = True
+
+
+@contextmanager
+def track(name: str, model: str | None = None) -> Iterator[RequestRecord]:
+    """
+    Measure a request: its stages, completions and retries are gathered in a
+    record, logged as `key=value` fields when the request ends. The record is
+    also passed to the tasks started during the request, so the completions of
+    an analysis shared by concurrent requests count for the one starting it.
+    """
+    record = RequestRecord()
+    token = current_record.set(record)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield record
+        outcome = "cache_hit" if record.cache_hit else "analysed"
+    finally:
+        current_record.reset(token)
+        record.timings["total"] = time.perf_counter() - started
+        metrics.observe("total", record.timings["total"])
+        metrics.count_request(outcome)
+        fields = record.fields(model)
+        logger.info(
+            f"{name} outcome={outcome} "
+            + " ".join(f"{key}={value}" for key, value in fields.items()),
+            extra={"request": name, "outcome": outcome, **fields},
+        )
+
+
+def end_failed_completion() -> None:
+    """Count the completion in flight, if any, as failed."""
+    if completion_started.get() is not None:
+        completion_started.set(None)
+        metrics.count_error()
+
+
+@contextmanager
+def completion_errors() -> Iterator[None]:
+    """
+    Count the completion requested in the block as failed if the block raises.
+    instructor emits no hook when the API request of a completion fails: a
+    completion started without a response is a failed one, when instructor
+    tries again or when the error reaches this block.
+    """
+    try:
+        yield
+    except Exception:
+        end_failed_completion()
+        raise
+
+
+def on_completion_kwargs(*args: Any, **kwargs: Any) -> None:
+    end_failed_completion()
+    completion_started.set(time.perf_counter())
+    completion_model.set(kwargs.get("model"))
+
+
+def on_completion_response(completion: Any) -> None:
+    started = completion_started.get()
+    if started is not None:
+        add_timing("completion", time.perf_counter() - started)
+        completion_started.set(None)
+    metrics.count_completion()
+    record = current_record.get()
+    if record is not None:
+        record.usage.record(completion, completion_model.get())
+
+
+def on_completion_error(error: Exception) -> None:
+    end_failed_completion()
+
+
+def on_parse_error(error: Exception) -> None:
+    metrics.count_retry()
+    record = current_record.get()
+    if record is not None:
+        record.retries += 1
+
+
+def count_repair() -> None:
+    metrics.count_repair()
+    record = current_record.get()
+    if record is not None:
+        record.repairs += 1
+
+
+def instrument(
+    client: "instructor.Instructor | instructor.AsyncInstructor",
+    usage: UsageStats | None = None,
+) -> None:
+    """
+    Register the hooks timing the completions and counting the retries, and
+    adding the usage of each completion, with its model, to `usage`.
+    """
+    client.on("completion:kwargs", on_completion_kwargs)
+    client.on("completion:response", on_completion_response)
+    client.on("completion:error", on_completion_error)
+    client.on("parse:error", on_parse_error)
+    if usage is not None:
+        client.on(
+            "completion:response",
+            lambda completion: usage.record(completion, completion_model.get()),
+        )
+
+
+def render_metrics(
+    usage: UsageStats,
+    model: str | None = None,
+    stats: dict[str, dict[str, float]] | None = None,
+) -> str:
+    """
+    All the metrics in the Prometheus text format: the ones of the analyses,
+    the token usage and its estimated cost, and the `stats` given. Stats are
+    counts only growing, exported as counters, e.g. `{"sentences": {"misses":
+    3}}` as `frazer_sentences_misses_total 3`, but for ratios and sizes, see
+    `GAUGE_STATS`, exported as gauges.
+    """
+    lines = metrics.render()
+    for kind in ["prompt", "cached", "completion"]:
+        lines += counter(
+            f"frazer_{kind}_tokens_total",
+            f"{kind.capitalize()} tokens used.",
+            getattr(usage, f"{kind}_tokens"),
+        )
+    cost = usage.cost(model) if model else None
+    if cost is not None:
+        lines += counter(
+            "frazer_cost_usd_total", "Estimated cost of the tokens used.", cost
+        )
+    for group, values in (stats or {}).items():
+        for key, value in values.items():
+            if key.endswith(GAUGE_STATS):
+                lines += gauge(f"frazer_{group}_{key}", f"{key} of {group}.", value)
+            else:
+                lines += counter(
+                    f"frazer_{group}_{key}_total", f"{key} of {group}.", value
+                )
+    return "\n".join(lines) + "\n"
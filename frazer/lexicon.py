@@ -0,0 +1,41 @@
+import csv
+from functools import cache
+from pathlib import Path
+
+LEXICON_PATH = Path(__file__).parent / "lexicon.csv"
+
+
+class Lexicon:
+    """
+    Table of closed-class words (prepositions, conjunctions, particles and
+    personal pronouns) whose analysis doesn't depend on the sentence, so they
+    can be tagged locally instead of being generated by the model. Only forms
+    with a single reading are listed: ambiguous ones such as "to" or "co" are
+    left to the model.
+    """
+
+    def __init__(self, entries: dict[str, dict[str, str]]) -> None:
+        self.entries = entries
+
+    @classmethod
+    def from_csv(cls, path: Path = LEXICON_PATH) -> "Lexicon":
+        with path.open(encoding="utf-8") as file:
+            return cls({row["form"]: row for row in csv.DictReader(file)})
+
+    def tag(self, token: str) -> dict[str, str] | None:
+        """Word analysis of a token, as a dict, None if it isn't in the table."""
+        entry = self.entries.get(token.lower())
+        if entry is None:
+            return None
+        return {
+            "original_value": token,
+            "root": entry["root"],
+            "original_value_translation": entry["translation"],
+            "syntatic_category": entry["category"],
+        }
+
+
+@cache
+def default_lexicon() -> Lexicon:
+    """The lexicon bundled with frazer."""
+    return Lexicon.from_csv()
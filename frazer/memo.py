@@ -0,0 +1,47 @@
+import re
+
+from frazer.cache import CacheStats, LRUCache, TieredCache
+
+TOKEN_PATTERN = re.compile(r"\w+(?:-\w+)*")
+
+DEFAULT_MEMO_SIZE = 50_000
+
+
+def tokenize(sentence: str) -> list[str]:
+    """Split a sentence into its word tokens, dropping punctuation."""
+    return TOKEN_PATTERN.findall(sentence)
+
+
+def word_context_key(tokens: list[str], pos: int, namespace: str = "") -> str:
+    """Key a token on its surface form and its immediate neighbours."""
+    previous_token = tokens[pos - 1] if pos > 0 else ""
+    next_token = tokens[pos + 1] if pos + 1 < len(tokens) else ""
+    context = "|".join([previous_token, tokens[pos], next_token]).lower()
+    return f"{namespace}:{context}"
+
+
+class WordMemo:
+    """
+    Memo of serialized word analyses keyed on the word in its local context,
+    so words recurring across sentences don't have to be generated again.
+    """
+
+    def __init__(self, store: TieredCache | None = None) -> None:
+        self.store = store or TieredCache(LRUCache(max_size=DEFAULT_MEMO_SIZE))
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.store.stats
+
+    def lookup(self, tokens: list[str], namespace: str = "") -> list[str | None]:
+        return [
+            self.store.get(word_context_key(tokens, pos, namespace))
+            for pos in range(len(tokens))
+        ]
+
+    def remember(
+        self, tokens: list[str], values: list[str | None], namespace: str = ""
+    ) -> None:
+        for pos, value in enumerate(values):
+            if value is not None:
+                self.store.set(word_context_key(tokens, pos, namespace), value)
@@ -0,0 +1,151 @@
+"""
+Local repair of common deviations from the response schema, applied to the
+responses before instructor validates them so that they don't cost a re-ask of
+the whole request:
+
+- enumeration values in another case or with spaces, e.g. `"Noun"` or
+  `"active participle"`, and abbreviated categories such as `"adj"`;
+- the category under the correctly spelled `syntactic_category` key;
+- the conjugation of a verb given in the word instead of in `conjugation`;
+- the person of a verb out of range or written as text, e.g. `"3rd"`.
+"""
+
+import json
+import os
+import re
+from typing import Any
+
+from frazer import load_environment
+from frazer.instrumentation import count_repair
+
+ENUM_KEYS = ("syntatic_category", "aspect", "gender", "number", "subtype")
+CONJUGATION_KEYS = ("person", "number", "gender", "tense", "mood")
+CONJUGATION_ENUM_KEYS = ("number", "gender", "tense", "mood")
+RENAMED_KEYS = {
+    "syntactic_category": "syntatic_category",
+    "other_syntactic_category": "other_syntatic_category",
+}
+CATEGORY_ALIASES = {
+    "adj": "adjective",
+    "adv": "adverb",
+    "prep": "preposition",
+    "conj": "conjunction",
+    "interj": "interjection",
+    "num": "numeral",
+    "pron": "pronoun",
+}
+PERSONS = {"first": 1, "second": 2, "third": 3}
+PERSON_PATTERN = re.compile(r"^\s*([123])(?:st|nd|rd)?(?:\s*person)?\s*$")
+
+
+def repair_enabled() -> bool:
+    """Whether deviations are repaired, unless disabled by `FRAZER_REPAIR=0`."""
+    load_environment()
+    return os.environ.get("FRAZER_REPAIR", "1") not in ("0", "false")
+
+
+def normalize_enum(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    return re.sub(r"[\s-]+", "_", value.strip().lower())
+
+
+def normalize_person(value: Any) -> int | None:
+    if isinstance(value, str):
+        match = PERSON_PATTERN.match(value.lower())
+        if match:
+            value = int(match.group(1))
+        else:
+            value = PERSONS.get(value.strip().lower().split(" ")[0])
+    if isinstance(value, bool) or not isinstance(value, int):
+        return None
+    return value if 1 <= value <= 3 else None
+
+
+def repair_word(word: Any) -> Any:
+    """A copy of the word's data with the deviations repaired."""
+    if not isinstance(word, dict):
+        return word
+    word = {RENAMED_KEYS.get(key, key): value for key, value in word.items()}
+    for key in ENUM_KEYS:
+        if key in word:
+            word[key] = normalize_enum(word[key])
+    category = word.get("syntatic_category")
+    if category in CATEGORY_ALIASES:
+        word["syntatic_category"] = CATEGORY_ALIASES[category]
+    if word.get("syntatic_category") != "verb":
+        return word
+    conjugation = word.get("conjugation")
+    if isinstance(conjugation, dict):
+        conjugation = dict(conjugation)
+        # Number and gender are only moved to a missing conjugation, as nouns
+        # and adjectives have them too
+        moved = [key for key in ("person", "tense", "mood") if key not in conjugation]
+    else:
+        conjugation = {}
+        moved = list(CONJUGATION_KEYS)
+    for key in moved:
+        if key in word:
+            conjugation[key] = word.pop(key)
+    for key in CONJUGATION_ENUM_KEYS:
+        if key in conjugation:
+            conjugation[key] = normalize_enum(conjugation[key])
+    if "person" in conjugation:
+        conjugation["person"] = normalize_person(conjugation["person"])
+    if conjugation:
+        word["conjugation"] = conjugation
+    return word
+
+
+def repair_arguments(data: Any) -> Any:
+    """
+    A copy of the arguments filled in by the model, for any of the response
+    schemas, with the deviations of its words repaired.
+    """
+    if not isinstance(data, dict):
+        return data
+    data = dict(data)
+    if isinstance(data.get("words"), list):
+        data["words"] = [repair_word(word) for word in data["words"]]
+    if isinstance(data.get("sentences"), list):
+        data["sentences"] = [repair_arguments(item) for item in data["sentences"]]
+    if isinstance(data.get("w"), list):
+        from frazer.wire import repair_compact_word
+
+        data["w"] = [repair_compact_word(word) for word in data["w"]]
+    return data
+
+
+def repair_json(text: str) -> str | None:
+    """The JSON arguments repaired, None if they need no repair."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    repaired = repair_arguments(data)
+    if repaired == data:
+        return None
+    return json.dumps(repaired, ensure_ascii=False)
+
+
+def repair_completion(completion: Any) -> None:
+    """
+    Repair the response of a completion in place, as an instructor hook: hooks
+    run before the response is validated, so a repaired response is accepted
+    instead of asked again.
+    """
+    choices = getattr(completion, "choices", None)
+    if not choices or not repair_enabled():
+        return
+    message = choices[0].message
+    if message.tool_calls:
+        for tool_call in message.tool_calls:
+            repaired = repair_json(tool_call.function.arguments)
+            if repaired is not None:
+                tool_call.function.arguments = repaired
+                count_repair()
+    elif message.content:
+        repaired = repair_json(message.content)
+        if repaired is not None:
+            message.content = repaired
+            count_repair()
@@ -0,0 +1,50 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    shared: int = 0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "upstream": self.calls - self.shared,
+        }
+
+
+class SingleFlight(Generic[T]):
+    """
+    Deduplicates concurrent calls: while a call for a key is pending, further
+    calls for the same key wait for it and receive its result (or exception)
+    instead of starting their own. The call runs in its own task, so a caller
+    being cancelled doesn't cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self.pending: dict[str, asyncio.Task[T]] = {}
+        self.stats = SingleFlightStats()
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        self.stats.calls += 1
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self.pending[key] = task
+            task.add_done_callback(lambda _: self._done(key, task))
+        else:
+            self.stats.shared += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task[T]) -> None:
+        if self.pending.get(key) is task:
+            del self.pending[key]
+        # Mark the exception as retrieved in case every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
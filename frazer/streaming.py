@@ -0,0 +1,170 @@
+import types
+from collections.abc import AsyncIterator, Iterator
+from copy import copy
+from functools import cache
+from typing import Any, Literal, Union, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError, create_model
+
+from frazer import analyser
+from frazer.analyser import (
+    AnalysedSentence,
+    AnalysedWord,
+    build_messages,
+    clean_sentence,
+    get_cached_sentence,
+    set_cached_sentence,
+    word_adapter,
+)
+from frazer.cache import TieredCache
+from frazer.instrumentation import completion_errors
+
+
+class StreamReset(BaseModel):
+    """
+    The words streamed so far are to be discarded: the streamed response didn't
+    validate and the analysis was requested again, its words follow.
+    """
+
+    reset: Literal[True] = True
+
+
+StreamEvent = AnalysedWord | AnalysedSentence | StreamReset
+
+
+def _streamed_annotation(annotation: Any) -> Any:
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        # `X | None` can't be made partial, `Optional[X]` can.
+        return Union[tuple(_streamed_annotation(arg) for arg in get_args(annotation))]
+    if origin is not None and origin is not Literal:
+        return origin[tuple(_streamed_annotation(arg) for arg in get_args(annotation))]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return streamed_model(annotation)
+    return annotation
+
+
+@cache
+def streamed_model(model: type[BaseModel]) -> type[BaseModel]:
+    """
+    Subclass of a model which instructor can stream as partial objects: unions
+    are written with `Union`, and incomplete strings are left out so that enums
+    are never validated half generated.
+    """
+    from instructor.dsl.partial import PartialLiteralMixin
+
+    fields: dict[str, Any] = {}
+    for name, info in model.model_fields.items():
+        info = copy(info)
+        info.annotation = _streamed_annotation(info.annotation)
+        fields[name] = (info.annotation, info)
+    return create_model(
+        model.__name__,
+        __base__=(model, PartialLiteralMixin),
+        __module__=model.__module__,
+        **fields,
+    )
+
+
+class WordStream:
+    """
+    Words of the partial analyses streamed by instructor. A word is emitted as
+    soon as the model starts generating the next one, which means the word is
+    complete and can be validated.
+    """
+
+    def __init__(self) -> None:
+        self.emitted = 0
+        self.last: BaseModel | None = None
+
+    def feed(self, partial: BaseModel) -> list[AnalysedWord]:
+        self.last = partial
+        words = getattr(partial, "words", None) or []
+        complete_words = []
+        while len(words) > self.emitted + 1:
+            complete_words.append(
+                word_adapter.validate_python(
+                    words[self.emitted].model_dump(exclude_unset=True)
+                )
+            )
+            self.emitted += 1
+        return complete_words
+
+    def finish(self) -> AnalysedSentence:
+        """Validate the complete response, raising a ValidationError if it's not."""
+        data = self.last.model_dump(exclude_unset=True) if self.last else {}
+        return AnalysedSentence.model_validate(data)
+
+
+def stream_request_kwargs(input_clean: str) -> dict[str, Any]:
+    return dict(
+        response_model=streamed_model(AnalysedSentence),
+        model=analyser.get_backend().model,
+        temperature=0.0,
+        top_p=1,
+        messages=build_messages(input_clean, indexed=False),
+    )
+
+
+def analyse_sentence_stream(
+    input_sentence: str, sentence_cache: TieredCache | None = None
+) -> Iterator[StreamEvent]:
+    """
+    Analyse a sentence yielding each word as soon as it's generated, followed
+    by the complete analysed sentence. If the streamed response doesn't
+    validate, a `StreamReset` is yielded and the words of a new analysis follow.
+    """
+    input_clean = clean_sentence(input_sentence)
+    sentence = get_cached_sentence(input_clean, sentence_cache)
+    emitted = 0
+    if sentence is None:
+        words = WordStream()
+        try:
+            with completion_errors():
+                partials = analyser.get_client().chat.completions.create_partial(
+                    **stream_request_kwargs(input_clean)
+                )
+                for partial in partials:
+                    yield from words.feed(partial)
+            sentence = words.finish()
+            emitted = words.emitted
+        except ValidationError:
+            if words.emitted:
+                yield StreamReset()
+            sentence = analyser.request_analysis(
+                build_messages(input_clean), input_clean
+            )
+        set_cached_sentence(input_clean, sentence, sentence_cache)
+    yield from sentence.words[emitted:]
+    yield sentence
+
+
+async def analyse_sentence_stream_async(
+    input_sentence: str, sentence_cache: TieredCache | None = None
+) -> AsyncIterator[StreamEvent]:
+    """Same as `analyse_sentence_stream`, but without blocking the event loop."""
+    input_clean = clean_sentence(input_sentence)
+    sentence = get_cached_sentence(input_clean, sentence_cache)
+    emitted = 0
+    if sentence is None:
+        words = WordStream()
+        try:
+            with completion_errors():
+                partials = analyser.get_async_client().chat.completions.create_partial(
+                    **stream_request_kwargs(input_clean)
+                )
+                async for partial in partials:
+                    for word in words.feed(partial):
+                        yield word
+            sentence = words.finish()
+            emitted = words.emitted
+        except ValidationError:
+            if words.emitted:
+                yield StreamReset()
+            sentence = await analyser.request_analysis_async(
+                build_messages(input_clean), input_clean
+            )
+        set_cached_sentence(input_clean, sentence, sentence_cache)
+    for word in sentence.words[emitted:]:
+        yield word
+    yield sentence
@@ -0,0 +1,208 @@
+"""
+Analysis of texts longer than a sentence: the text is split into sentences,
+which are analysed concurrently, so a paragraph takes about as long as its
+longest sentence instead of the sum of all of them.
+"""
+
+import asyncio
+import re
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from frazer.analyser import (
+    AnalysedSentence,
+    analyse_sentence,
+    analyse_sentence_async,
+)
+from frazer.cache import TieredCache
+from frazer.lexicon import Lexicon
+from frazer.memo import WordMemo
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Abbreviations ending with a period which don't end a sentence: the words
+# following them, names included, belong to the same sentence.
+ABBREVIATIONS = {
+    "al",
+    "dr",
+    "inż",
+    "m.in",
+    "mgr",
+    "nr",
+    "np",
+    "płk",
+    "prof",
+    "św",
+    "tel",
+    "tj",
+    "tzn",
+    "tzw",
+    "ul",
+    "wg",
+    "zob",
+}
+# Abbreviations which also end sentences, being words as well or coming last
+# in the sentence: they end it when the next one starts with a capital letter.
+AMBIGUOUS_ABBREVIATIONS = {
+    "cdn",
+    "dn",
+    "godz",
+    "itd",
+    "itp",
+    "jw",
+    "min",
+    "mld",
+    "mln",
+    "ok",
+    "pkt",
+    "pl",
+    "przyp",
+    "r",
+    "str",
+    "tys",
+    "ww",
+}
+# Punctuation ending a sentence, with any closing quotes, and the spaces after.
+SENTENCE_END_PATTERN = re.compile(r"[.!?…]+[\"'”»)]*\s+")
+# Characters which can open a sentence besides capital letters and digits. Not
+# dashes, which follow the quotes of a dialogue in the same sentence.
+OPENING_CHARACTERS = "\"'„«("
+WORD_BEFORE_PATTERN = re.compile(r"([\w.]+)\.$")
+PARAGRAPH_BREAK_PATTERN = re.compile(r"\n\s*\n")
+
+
+def ends_sentence(text: str, following: str) -> bool:
+    """
+    Whether the text, finishing with punctuation followed by the opening of a
+    sentence, finishes a sentence: a period may end an abbreviation instead.
+    """
+    before = text.rstrip().rstrip("\"'”»)")
+    match = WORD_BEFORE_PATTERN.search(before)
+    if match is None:
+        return True
+    word = match.group(1)
+    # Initials, such as "J. Kowalski"
+    if len(word) == 1 and word.isupper():
+        return False
+    if word.lower() in AMBIGUOUS_ABBREVIATIONS:
+        return following.isupper()
+    return word.lower() not in ABBREVIATIONS
+
+
+def split_sentences(text: str) -> list[str]:
+    """
+    Split a text into its sentences, keeping their punctuation. Blank lines
+    always end a sentence, while the lines of a paragraph are joined, as
+    texts are often wrapped in the middle of a sentence. Periods after an
+    abbreviation or an initial don't end one.
+    """
+    sentences = []
+    for paragraph in PARAGRAPH_BREAK_PATTERN.split(text):
+        paragraph = " ".join(paragraph.split())
+        start = 0
+        for match in SENTENCE_END_PATTERN.finditer(paragraph):
+            following = paragraph[match.end() : match.end() + 1]
+            opens = following.isupper() or following.isdigit()
+            if not following or not (opens or following in OPENING_CHARACTERS):
+                continue
+            if ends_sentence(paragraph[: match.end()], following):
+                sentences.append(paragraph[start : match.end()].strip())
+                start = match.end()
+        sentences.append(paragraph[start:].strip())
+    return [sentence for sentence in sentences if sentence]
+
+
+def text_sentences(text: str) -> list[str]:
+    sentences = split_sentences(text)
+    if not sentences:
+        raise ValueError("Text cannot be empty")
+    return sentences
+
+
+def analyse_text(
+    text: str,
+    sentence_cache: TieredCache | None = None,
+    word_memo: WordMemo | None = None,
+    lexicon: Lexicon | None = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> list[AnalysedSentence]:
+    """Analyse the sentences of a text concurrently, returned in order."""
+    return [
+        sentence
+        for _, sentence in sorted(
+            analyse_text_stream(
+                text, sentence_cache, word_memo, lexicon, max_concurrency
+            ),
+            key=lambda item: item[0],
+        )
+    ]
+
+
+def analyse_text_stream(
+    text: str,
+    sentence_cache: TieredCache | None = None,
+    word_memo: WordMemo | None = None,
+    lexicon: Lexicon | None = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> Iterator[tuple[int, AnalysedSentence]]:
+    """
+    Analyse the sentences of a text concurrently, yielding each one with its
+    position in the text as soon as it's analysed.
+    """
+    sentences = text_sentences(text)
+    workers = min(max_concurrency, len(sentences))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                analyse_sentence, sentence, sentence_cache, word_memo, lexicon
+            ): pos
+            for pos, sentence in enumerate(sentences)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+async def analyse_text_async(
+    text: str,
+    sentence_cache: TieredCache | None = None,
+    word_memo: WordMemo | None = None,
+    lexicon: Lexicon | None = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> list[AnalysedSentence]:
+    """Same as `analyse_text`, without blocking the event loop."""
+    results = {
+        pos: sentence
+        async for pos, sentence in analyse_text_stream_async(
+            text, sentence_cache, word_memo, lexicon, max_concurrency
+        )
+    }
+    return [results[pos] for pos in range(len(results))]
+
+
+async def analyse_text_stream_async(
+    text: str,
+    sentence_cache: TieredCache | None = None,
+    word_memo: WordMemo | None = None,
+    lexicon: Lexicon | None = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> AsyncIterator[tuple[int, AnalysedSentence]]:
+    """Same as `analyse_text_stream`, without blocking the event loop."""
+    sentences = text_sentences(text)
+    limit = asyncio.Semaphore(max_concurrency)
+
+    async def analyse(pos: int, sentence: str) -> tuple[int, AnalysedSentence]:
+        async with limit:
+            return pos, await analyse_sentence_async(
+                sentence, sentence_cache, word_memo, lexicon
+            )
+
+    tasks = [
+        asyncio.ensure_future(analyse(pos, sentence))
+        for pos, sentence in enumerate(sentences)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
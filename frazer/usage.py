@@ -0,0 +1,100 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+# USD per million prompt, cached prompt and completion tokens.
+PRICES_PER_MILLION = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int
+) -> float | None:
+    """Cost in USD of the tokens at the model's list price, None if unknown."""
+    if model not in PRICES_PER_MILLION:
+        return None
+    prompt, cached, completion = PRICES_PER_MILLION[model]
+    return (
+        (prompt_tokens - cached_tokens) * prompt
+        + cached_tokens * cached
+        + completion_tokens * completion
+    ) / 1_000_000
+
+
+@dataclass
+class UsageStats:
+    """
+    Token usage reported by the API for the completions requested, including
+    the prompt tokens served from the provider's prompt cache.
+    """
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+    # Prompt, cached and completion tokens by the model they were requested
+    # from, when it's known.
+    models: dict[str, tuple[int, int, int]] = field(default_factory=dict)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @property
+    def cached_ratio(self) -> float:
+        """Share of the prompt tokens read from the prompt cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def record(self, completion: Any, model: str | None = None) -> None:
+        """
+        Add the usage of a chat completion, as an instructor hook, with the
+        model it was requested from if given.
+        """
+        usage = getattr(completion, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+            self.cached_tokens += cached_tokens
+            if model is not None:
+                prompt, cached, completion_tokens = self.models.get(model, (0, 0, 0))
+                self.models[model] = (
+                    prompt + usage.prompt_tokens,
+                    cached + cached_tokens,
+                    completion_tokens + usage.completion_tokens,
+                )
+
+    def cost(self, model: str) -> float | None:
+        """
+        Cost in USD of the tokens at the list price of the models they were
+        requested from, and of `model` for the ones of unknown model. None if
+        the price of any of them is unknown.
+        """
+        with self._lock:
+            parts = dict(self.models)
+            totals = (self.prompt_tokens, self.cached_tokens, self.completion_tokens)
+        rest = tuple(
+            total - sum(tokens[pos] for tokens in parts.values())
+            for pos, total in enumerate(totals)
+        )
+        if any(rest) or not parts:
+            known = parts.get(model, (0, 0, 0))
+            parts[model] = tuple(a + b for a, b in zip(known, rest))  # type: ignore[assignment]
+        costs = [estimate_cost(name, *tokens) for name, tokens in parts.items()]
+        if None in costs:
+            return None
+        return sum(costs)  # type: ignore[arg-type]
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_ratio": self.cached_ratio,
+        }
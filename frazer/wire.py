@@ -0,0 +1,256 @@
+"""
+Compact schema filled in by the model instead of `AnalysedSentence`.
+
+Keys are one or two letters, enumerations are short codes and words refer to
+the sentence by position instead of repeating it, which cuts both the tool
+definition sent with each request and the generated tokens. `from_compact` and
+`to_compact` convert between both schemas without losing information.
+"""
+
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field, ValidationInfo, model_validator
+
+from frazer.analyser import (
+    Adjective,
+    AnalysedSentence,
+    AnalysedWord,
+    Noun,
+    Numeral,
+    Verb,
+    align_words,
+    word_adapter,
+)
+from frazer.memo import tokenize
+from frazer.repair import normalize_enum, normalize_person
+
+CATEGORY_CODES = {
+    "noun": "n",
+    "pronoun": "pn",
+    "verb": "v",
+    "adjective": "adj",
+    "adverb": "adv",
+    "preposition": "prep",
+    "conjunction": "conj",
+    "interjection": "int",
+    "particle": "part",
+    "numeral": "num",
+    "other": "o",
+}
+GENDER_CODES = {"masculine": "m", "feminine": "f", "neuter": "n"}
+NUMBER_CODES = {"singular": "sg", "plural": "pl"}
+TENSE_CODES = {"present": "pres", "past": "past", "future": "fut"}
+MOOD_CODES = {
+    "indicative": "ind",
+    "conditional": "cond",
+    "imperative": "imp",
+    "infinitive": "inf",
+    "active_participle": "actp",
+    "passive_participle": "pasp",
+}
+ASPECT_CODES = {"perfective": "pf", "imperfective": "ipf"}
+SUBTYPE_CODES = {
+    "cardinal": "card",
+    "ordinal": "ord",
+    "collective": "coll",
+    "fractional": "frac",
+    "multiplicative": "mult",
+    "indefinite": "indef",
+}
+
+CategoryCode = Literal[
+    "n", "pn", "v", "adj", "adv", "prep", "conj", "int", "part", "num", "o"
+]
+GenderCode = Literal["m", "f", "n"]
+NumberCode = Literal["sg", "pl"]
+TenseCode = Literal["pres", "past", "fut"]
+MoodCode = Literal["ind", "cond", "imp", "inf", "actp", "pasp"]
+AspectCode = Literal["pf", "ipf"]
+SubtypeCode = Literal["card", "ord", "coll", "frac", "mult", "indef"]
+
+
+class CompactWord(BaseModel):
+    i: int = Field(description="position of the word in the listed words")
+    v: str | None = Field(
+        description="the word, only if not written as in the sentence", default=None
+    )
+    r: str = Field(description="root")
+    t: str = Field(description="translation")
+    c: CategoryCode = Field(description="syntactic category")
+    o: str | None = Field(description="function if c is o", default=None)
+    a: AspectCode | None = Field(description="verb aspect", default=None)
+    p: int | None = Field(description="verb person", ge=1, le=3, default=None)
+    nb: NumberCode | None = Field(description="number", default=None)
+    g: GenderCode | None = Field(description="gender", default=None)
+    tn: TenseCode | None = Field(description="verb tense", default=None)
+    md: MoodCode | None = Field(description="verb mood", default=None)
+    ob: str | None = Field(description="object of the verb", default=None)
+    dc: str | None = Field(description="declension case", default=None)
+    wc: str | None = Field(description="word causing the declension", default=None)
+    st: SubtypeCode | None = Field(description="numeral subtype", default=None)
+
+
+class CompactSentence(BaseModel):
+    """Analysis of a sentence, word by word."""
+
+    tr: str = Field(description="translation to English")
+    w: list[CompactWord] = Field(description="words")
+    ok: bool = Field(description="grammatically correct")
+    rm: str | None = Field(description="remarks for the student", default=None)
+
+    @model_validator(mode="after")
+    def check_positions(self, info: ValidationInfo) -> "CompactSentence":
+        """
+        Words given by position must refer to the tokens of the sentence, when
+        they're in the validation context, in order, so that instructor asks
+        again for a response pointing elsewhere.
+        """
+        tokens = (info.context or {}).get("tokens")
+        if tokens is None:
+            return self
+        previous = -1
+        for word in self.w:
+            if word.v is not None:
+                continue
+            if not 0 <= word.i < len(tokens):
+                raise ValueError(
+                    f"Word position {word.i} out of the sentence, whose words "
+                    f"are at positions 0 to {len(tokens) - 1}"
+                )
+            if word.i <= previous:
+                raise ValueError(
+                    f"Word position {word.i} comes after position {previous}, "
+                    "words must follow the order of the sentence"
+                )
+            previous = word.i
+        return self
+
+
+# Code fields of `CompactWord` with their codes.
+CODE_FIELDS = {
+    "c": CATEGORY_CODES,
+    "a": ASPECT_CODES,
+    "nb": NUMBER_CODES,
+    "g": GENDER_CODES,
+    "tn": TENSE_CODES,
+    "md": MOOD_CODES,
+    "st": SUBTYPE_CODES,
+}
+
+
+def repair_compact_word(word: Any) -> Any:
+    """
+    A copy of the word's data with codes in another case, or given as the full
+    value instead, and an invalid person repaired.
+    """
+    if not isinstance(word, dict):
+        return word
+    word = dict(word)
+    for key, codes in CODE_FIELDS.items():
+        if isinstance(word.get(key), str):
+            value = normalize_enum(word[key])
+            word[key] = codes.get(value, value)
+    if word.get("p") is not None:
+        word["p"] = normalize_person(word["p"])
+    return word
+
+
+def decode(codes: dict[str, str], code: str | None) -> str | None:
+    if code is None:
+        return None
+    return next(value for value, value_code in codes.items() if value_code == code)
+
+
+def encode(codes: dict[str, str], value: Any) -> str | None:
+    if value is None:
+        return None
+    return codes[getattr(value, "value", value)]
+
+
+def word_from_compact(word: CompactWord, tokens: list[str]) -> AnalysedWord:
+    if word.v is None and not 0 <= word.i < len(tokens):
+        raise ValueError(f"Word position {word.i} out of the sentence")
+    category = decode(CATEGORY_CODES, word.c)
+    data: dict[str, Any] = {
+        "original_value": word.v if word.v is not None else tokens[word.i],
+        "root": word.r,
+        "original_value_translation": word.t,
+        "syntatic_category": category,
+        "other_syntatic_category": word.o,
+    }
+    if category == "verb":
+        data["aspect"] = decode(ASPECT_CODES, word.a)
+        data["conjugation"] = {
+            "person": word.p,
+            "number": decode(NUMBER_CODES, word.nb),
+            "gender": decode(GENDER_CODES, word.g),
+            "tense": decode(TENSE_CODES, word.tn),
+            "mood": decode(MOOD_CODES, word.md),
+        }
+        data["object"] = word.ob
+    elif category in ("noun", "adjective", "numeral"):
+        data["declension_case"] = word.dc
+        data["word_causing_declension"] = word.wc
+        data["gender"] = decode(GENDER_CODES, word.g)
+        data["number"] = decode(NUMBER_CODES, word.nb)
+        data["subtype"] = decode(SUBTYPE_CODES, word.st)
+    return word_adapter.validate_python(data)
+
+
+def from_compact(compact: CompactSentence, text: str) -> AnalysedSentence:
+    """The analysis of `text` given in the compact schema."""
+    tokens = tokenize(text)
+    return AnalysedSentence(
+        text=text,
+        translation=compact.tr,
+        words=[word_from_compact(word, tokens) for word in compact.w],
+        grammatically_correct=compact.ok,
+        remarks=compact.rm,
+    )
+
+
+def word_to_compact(word: AnalysedWord, pos: int | None, tokens: list[str]) -> dict:
+    data: dict[str, Any] = {
+        "i": pos if pos is not None else -1,
+        "r": word.root,
+        "t": word.original_value_translation,
+        "c": encode(CATEGORY_CODES, word.syntatic_category),
+        "o": word.other_syntatic_category,
+    }
+    if pos is None or tokens[pos] != word.original_value:
+        data["v"] = word.original_value
+    if isinstance(word, Verb):
+        data.update(
+            a=encode(ASPECT_CODES, word.aspect),
+            p=word.conjugation.person,
+            nb=encode(NUMBER_CODES, word.conjugation.number),
+            g=encode(GENDER_CODES, word.conjugation.gender),
+            tn=encode(TENSE_CODES, word.conjugation.tense),
+            md=encode(MOOD_CODES, word.conjugation.mood),
+            ob=word.object,
+        )
+    if isinstance(word, (Noun, Adjective, Numeral)):
+        data.update(dc=word.declension_case, wc=word.word_causing_declension)
+    if isinstance(word, (Noun, Adjective)):
+        data.update(
+            g=encode(GENDER_CODES, word.gender), nb=encode(NUMBER_CODES, word.number)
+        )
+    if isinstance(word, Numeral):
+        data["st"] = encode(SUBTYPE_CODES, word.subtype)
+    return data
+
+
+def to_compact(sentence: AnalysedSentence) -> CompactSentence:
+    """The compact form of an analysis, inverse of `from_compact`."""
+    tokens = tokenize(sentence.text)
+    aligned = align_words(tokens, sentence.words)
+    positions = {id(word): pos for pos, word in enumerate(aligned) if word is not None}
+    return CompactSentence(
+        tr=sentence.translation,
+        w=[
+            word_to_compact(word, positions.get(id(word)), tokens)
+            for word in sentence.words
+        ],
+        ok=sentence.grammatically_correct,
+        rm=sentence.remarks,
+    )
@@ -0,0 +1,22 @@
+from collections.abc import Iterator
+
+import pytest
+
+from frazer import analyser
+from frazer.backends import FakeBackend
+
+
+@pytest.fixture
+def fake_backend(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeBackend]:
+    """
+    Analyses answered in-process by a fake backend, without a bundle of
+    precomputed analyses. Tests needing another backend replace it with
+    `analyser.use_backend`.
+    """
+    monkeypatch.setattr(analyser, "backend", None)
+    monkeypatch.setattr(analyser, "bundle", None)
+    monkeypatch.setattr(analyser, "bundle_loaded", True)
+    backend = FakeBackend()
+    analyser.use_backend(backend)
+    yield backend
+    analyser.reset_clients()
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from frazer.analyser import (
@@ -11,7 +13,44 @@ from frazer.analyser import (
     Verb,
     VerbConjugation,
     analyse_sentence,
+    analyse_sentence_async,
 )
+from frazer.cache import LRUCache, TieredCache
+
+
+def mock_analysed_sentence() -> AnalysedSentence:
+    return AnalysedSentence(
+        text="Czytam książkę.",
+        translation="I am reading a book.",
+        words=[
+            Verb(
+                original_value="czytam",
+                root="czytać",
+                original_value_translation="I read",
+                aspect="imperfective",
+                conjugation=VerbConjugation(
+                    person=1,
+                    number=Number.singular,
+                    tense=Tense.present,
+                    mood=Mood.indicative,
+                    gender=Gender.masculine,
+                ),
+                object="książkę",
+                syntatic_category=SyntacticCategory.verb,
+            ),
+            Noun(
+                original_value="książkę",
+                root="książka",
+                original_value_translation="book",
+                declension_case="accusative",
+                word_causing_declension="czytać",
+                syntatic_category=SyntacticCategory.noun,
+                gender=Gender.feminine,
+                number=Number.singular,
+            ),
+        ],
+        grammatically_correct=True,
+    )
 
 
 @pytest.fixture
@@ -19,42 +58,21 @@ def mock_openai_client(monkeypatch: pytest.MonkeyPatch) -> None:
     """Mock OpenAI client for testing."""
 
     def mock_create(*args, **kwargs):
-        return AnalysedSentence(
-            text="Czytam książkę.",
-            translation="I am reading a book.",
-            words=[
-                Verb(
-                    original_value="czytam",
-                    root="czytać",
-                    original_value_translation="I read",
-                    aspect="imperfective",
-                    conjugation=VerbConjugation(
-                        person=1,
-                        number=Number.singular,
-                        tense=Tense.present,
-                        mood=Mood.indicative,
-                        gender=Gender.masculine,
-                    ),
-                    object="książkę",
-                    syntatic_category=SyntacticCategory.verb,
-                ),
-                Noun(
-                    original_value="książkę",
-                    root="książka",
-                    original_value_translation="book",
-                    declension_case="accusative",
-                    word_causing_declension="czytać",
-                    syntatic_category=SyntacticCategory.noun,
-                    gender=Gender.feminine,
-                    number=Number.singular,
-                ),
-            ],
-            grammatically_correct=True,
-        )
+        return mock_analysed_sentence()
 
     monkeypatch.setattr("frazer.analyser.client.chat.completions.create", mock_create)
 
 
+@pytest.fixture
+def mock_async_openai_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Mock async OpenAI client for testing."""
+
+    async def mock_create(*args, **kwargs):
+        return mock_analysed_sentence()
+
+    monkeypatch.setattr("frazer.analyser.aclient.chat.completions.create", mock_create)
+
+
 def test_simple_sentence_analysis(mock_openai_client: None) -> None:
     sentence = analyse_sentence("Czytam książkę.")
 
@@ -82,6 +100,26 @@ def test_sentence_structure(mock_openai_client: None) -> None:
     assert noun.word_causing_declension == "czytać"
 
 
+def test_cached_sentence_skips_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def mock_create(*args, **kwargs):
+        calls.append(kwargs)
+        return mock_analysed_sentence()
+
+    monkeypatch.setattr("frazer.analyser.client.chat.completions.create", mock_create)
+    sentence_cache = TieredCache(LRUCache())
+
+    first = analyse_sentence("Czytam książkę.", sentence_cache)
+    second = analyse_sentence("  Czytam   książkę. ", sentence_cache)
+
+    assert len(calls) == 1
+    assert second == first
+    assert isinstance(second.words[0], Verb)
+    assert isinstance(second.words[1], Noun)
+    assert sentence_cache.stats.hits == 1
+
+
 @pytest.mark.parametrize(
     "invalid_input",
     [
@@ -92,3 +130,16 @@ def test_sentence_structure(mock_openai_client: None) -> None:
 def test_invalid_input(invalid_input: str) -> None:
     with pytest.raises(ValueError):
         analyse_sentence(invalid_input)
+
+
+def test_async_sentence_analysis(mock_async_openai_client: None) -> None:
+    sentence = asyncio.run(analyse_sentence_async("Czytam książkę."))
+
+    assert isinstance(sentence, AnalysedSentence)
+    assert len(sentence.words) == 2
+    assert isinstance(sentence.words[0], Verb)
+
+
+def test_async_invalid_input() -> None:
+    with pytest.raises(ValueError):
+        asyncio.run(analyse_sentence_async("  "))
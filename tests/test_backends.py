@@ -0,0 +1,122 @@
+import asyncio
+import csv
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from evaluation.tools import batch_analyse as batch_analyse_module
+from evaluation.tools.batch_analyse import batch_analyse
+from frazer import analyser
+from frazer.analyser import AnalysedSentence, analyse_sentence, analyse_sentence_async
+from frazer.backends import (
+    Backend,
+    FakeBackend,
+    OpenAICompatibleBackend,
+    create_backend,
+)
+from frazer.batching import analyse_sentences
+from frazer.memo import WordMemo
+from frazer.streaming import analyse_sentence_stream
+
+
+def test_fake_backend_analyses_every_word(fake_backend: FakeBackend) -> None:
+    sentence = analyse_sentence("Kot pije wodę.")
+
+    assert sentence.text == "Kot pije wodę."
+    assert [word.original_value for word in sentence.words] == ["Kot", "pije", "wodę"]
+    async_sentence = asyncio.run(analyse_sentence_async("Kot pije wodę."))
+    assert async_sentence.model_dump() == sentence.model_dump()
+
+
+def test_fake_backend_serves_batches_memo_and_streams(
+    fake_backend: FakeBackend,
+) -> None:
+    sentences = analyse_sentences(["Kot pije wodę.", "Pies je kość."])
+    assert [sentence.text for sentence in sentences] == [
+        "Kot pije wodę.",
+        "Pies je kość.",
+    ]
+
+    word_memo = WordMemo()
+    analyse_sentence("Kot pije wodę.", word_memo=word_memo)
+    sentence = analyse_sentence("Kot pije mleko.", word_memo=word_memo)
+    assert [word.original_value for word in sentence.words] == ["Kot", "pije", "mleko"]
+
+    events = list(analyse_sentence_stream("Pies je kość."))
+    assert len(events) == 4
+    assert isinstance(events[-1], AnalysedSentence)
+
+
+def test_batch_analyse_runs_offline_on_the_fake_backend(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(analyser, "backend", None)
+    monkeypatch.setattr(analyser, "client_settings", analyser.client_settings)
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("id,sentence\n1,Kot pije wodę.\n2,Pada deszcz.\n")
+
+    for mode in ["online", "offline"]:
+        output_path = tmp_path / f"{mode}.csv"
+        batch_analyse(input_path, output_path, mode=mode, backend=FakeBackend())
+        with output_path.open() as file:
+            rows = list(csv.DictReader(file))
+        assert [row["original_value"] for row in rows] == [
+            "Kot",
+            "pije",
+            "wodę",
+            "Pada",
+            "deszcz",
+        ]
+        if mode == "online":
+            # Online runs are retried by the scheduler alone
+            assert analyser.client_settings.max_retries == 0
+    analyser.reset_clients()
+
+
+def test_create_backend() -> None:
+    backend = create_backend("local", model="qwen", base_url="http://localhost:8080")
+
+    assert isinstance(backend, OpenAICompatibleBackend)
+    assert not backend.supports_batches
+    with pytest.raises(ValueError):
+        create_backend("local")
+    with pytest.raises(TypeError):
+        Backend()
+    assert create_backend("fake", model="gpt-x").model == "gpt-x"
+
+
+def test_backend_options_override_the_environment(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    backends: list[Backend | None] = []
+    monkeypatch.setattr(
+        batch_analyse_module,
+        "batch_analyse",
+        lambda **kwargs: backends.append(kwargs["backend"]),
+    )
+    monkeypatch.setenv("FRAZER_BACKEND", "fake")
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("id,sentence\n1,Kot pije wodę.\n")
+    args = ["--input", str(input_path), "--output", str(tmp_path / "output.csv")]
+    runner = CliRunner()
+
+    result = runner.invoke(batch_analyse_module.main, [*args, "--model", "gpt-x"])
+    assert result.exit_code == 0
+    assert isinstance(backends[0], FakeBackend)
+    assert backends[0].model == "gpt-x"
+
+    result = runner.invoke(
+        batch_analyse_module.main, [*args, "--base-url", "http://localhost:8080"]
+    )
+    assert result.exit_code == 2
+    assert "only used by the local backend" in result.output
+
+
+def test_strict_structured_outputs() -> None:
+    assert create_backend("openai").instructor_mode().value == "tools_strict"
+    assert create_backend("openai", strict=False).instructor_mode().value == (
+        "tool_call"
+    )
+    local = create_backend("local", model="qwen", base_url="http://localhost:8080")
+    assert local.instructor_mode().value == "tool_call"
@@ -0,0 +1,111 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import click
+import pandas as pd
+import pytest
+
+from evaluation.tools.batch_analyse import (
+    OUTPUT_COLUMNS,
+    batch_analyse,
+    map_bounded,
+    save_analysed_sentences,
+)
+from evaluation.tools.metrics import (
+    EVALUTION_DIMENSIONS,
+    compare_datasets,
+    diff_dataframes,
+    read_dataset,
+)
+from evaluation.tools.records import AnalysedSentenceRecord
+from frazer.analyser import AnalysedSentence
+
+
+def test_map_bounded_keeps_order_and_bounds_consumption() -> None:
+    consumed = []
+
+    def items() -> Iterator[int]:
+        for item in range(100):
+            consumed.append(item)
+            yield item
+
+    results = map_bounded(lambda item: item * 2, items(), max_workers=2, window=4)
+
+    assert next(results) == 0
+    assert len(consumed) <= 5
+    assert list(results) == [item * 2 for item in range(1, 100)]
+
+
+def analysed_records() -> list[AnalysedSentenceRecord]:
+    words = [
+        {
+            "original_value": "Kot",
+            "root": "kot",
+            "original_value_translation": "cat",
+            "syntatic_category": "noun",
+            "declension_case": "nominative",
+            "word_causing_declension": "pije",
+            "gender": "masculine",
+            "number": "singular",
+        },
+        {
+            "original_value": "pije",
+            "root": "pić",
+            "original_value_translation": "drinks",
+            "syntatic_category": "verb",
+            "aspect": "imperfective",
+            "conjugation": {"person": 3, "number": "singular", "mood": "indicative"},
+        },
+        {
+            "original_value": "no",
+            "root": "no",
+            "original_value_translation": "well",
+            "syntatic_category": "other",
+            "other_syntatic_category": "particle",
+        },
+    ]
+    sentence = AnalysedSentence.model_validate(
+        {
+            "text": "Kot pije no",
+            "translation": "The cat drinks, well",
+            "words": words,
+            "grammatically_correct": True,
+        }
+    )
+    return [AnalysedSentenceRecord(1, sentence), AnalysedSentenceRecord(2, sentence)]
+
+
+def test_parquet_output_matches_csv(tmp_path: Path) -> None:
+    pytest.importorskip("pyarrow")
+    csv_path = tmp_path / "analysed.csv"
+    parquet_path = tmp_path / "analysed.parquet"
+
+    save_analysed_sentences(analysed_records(), csv_path)
+    save_analysed_sentences(analysed_records(), parquet_path, format="parquet")
+
+    csv_df = read_dataset(csv_path)
+    parquet_df = read_dataset(parquet_path)
+    assert list(parquet_df.columns) == OUTPUT_COLUMNS
+    assert isinstance(parquet_df["syntactic_category"].dtype, pd.CategoricalDtype)
+    assert parquet_df["conjugation"].iloc[1] == "3person_singular_indicative"
+    assert parquet_df.astype(object).equals(
+        csv_df.astype(object).where(csv_df.notna(), None)
+    )
+    metrics = compare_datasets(csv_df, parquet_df)
+    assert all(metric["f1"] == 1.0 for metric in metrics.values())
+    diff = diff_dataframes(csv_df, parquet_df)
+    assert diff[EVALUTION_DIMENSIONS].isna().all().all()
+
+
+def test_offline_runs_reject_online_options(tmp_path: Path) -> None:
+    input_path = tmp_path / "input.csv"
+    input_path.write_text("id,sentence\n1,Kot pije wodę.\n")
+
+    with pytest.raises(click.UsageError, match="--word-memo, --resume"):
+        batch_analyse(
+            input_path,
+            tmp_path / "output.csv",
+            mode="offline",
+            word_memo=True,
+            resume=True,
+        )
@@ -0,0 +1,136 @@
+import asyncio
+
+import openai
+import pytest
+from instructor.exceptions import InstructorRetryException
+from pydantic import ValidationError
+
+from frazer import batching
+from frazer.analyser import AnalysedSentence, analyse_sentence, sentence_cache_key
+from frazer.backends import FakeBackend
+from frazer.batching import (
+    AnalysedSentences,
+    analyse_sentences,
+    analyse_sentences_async,
+    plan_batches,
+)
+from frazer.cache import LRUCache, TieredCache
+
+
+def analysis(text: str) -> dict:
+    return {
+        "text": text,
+        "translation": "translation",
+        "words": [],
+        "grammatically_correct": True,
+    }
+
+
+def test_plan_batches_respects_token_budget() -> None:
+    sentences = ["Kot pije wodę.", "Maria zjadła zupę.", "Pada deszcz."]
+
+    assert list(plan_batches(sentences, token_budget=10_000)) == [sentences]
+    assert list(plan_batches(sentences, token_budget=300)) == [
+        ["Kot pije wodę."],
+        ["Maria zjadła zupę."],
+        ["Pada deszcz."],
+    ]
+    assert list(plan_batches(sentences, max_batch_size=2)) == [
+        sentences[:2],
+        sentences[2:],
+    ]
+
+
+def test_invalid_element_is_analysed_alone(monkeypatch: pytest.MonkeyPatch) -> None:
+    requests = []
+
+    def mock_create(*args, response_model, **kwargs):
+        requests.append(response_model)
+        if response_model is AnalysedSentences:
+            invalid = analysis("Maria zjadła zupę.") | {"words": [{"root": "?"}]}
+            return AnalysedSentences.model_validate(
+                {"sentences": [analysis("Kot pije wodę."), invalid]}
+            )
+        return AnalysedSentence.model_validate(analysis("Maria zjadła zupę."))
+
+    monkeypatch.setattr("frazer.analyser.client.chat.completions.create", mock_create)
+
+    sentences = analyse_sentences(["Kot pije wodę.", "Maria zjadła zupę."])
+
+    assert requests == [AnalysedSentences, AnalysedSentence]
+    assert [sentence.text for sentence in sentences] == [
+        "Kot pije wodę.",
+        "Maria zjadła zupę.",
+    ]
+
+
+def test_only_invalid_batches_are_split(monkeypatch: pytest.MonkeyPatch) -> None:
+    requests = []
+
+    def mock_create(*args, response_model, messages, **kwargs):
+        requests.append(response_model)
+        if response_model is AnalysedSentences:
+            try:
+                AnalysedSentence.model_validate({})
+            except ValidationError as e:
+                raise InstructorRetryException(e, n_attempts=3, total_usage=0) from e
+        return AnalysedSentence.model_validate(analysis(messages[-1]["content"]))
+
+    monkeypatch.setattr("frazer.analyser.client.chat.completions.create", mock_create)
+
+    sentences = analyse_sentences(["Kot pije wodę.", "Pada deszcz."])
+
+    assert requests == [AnalysedSentences, AnalysedSentence, AnalysedSentence]
+    assert [sentence.text for sentence in sentences] == [
+        "Kot pije wodę.",
+        "Pada deszcz.",
+    ]
+
+    def failing_create(*args, **kwargs):
+        requests.append(None)
+        raise openai.APIConnectionError(request=None)
+
+    requests.clear()
+    monkeypatch.setattr(
+        "frazer.analyser.client.chat.completions.create", failing_create
+    )
+    with pytest.raises(openai.APIConnectionError):
+        analyse_sentences(["Kot pije wodę.", "Pada deszcz."])
+    assert requests == [None]
+
+
+def test_batches_are_requested_within_the_concurrency_limit(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    running = 0
+    peak = 0
+
+    async def mock_analyse_batch_async(input_cleans: list[str]) -> list:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [AnalysedSentence.model_validate(analysis(s)) for s in input_cleans]
+
+    monkeypatch.setattr(batching, "analyse_batch_async", mock_analyse_batch_async)
+    sentences = [f"Kot pije wodę {pos}." for pos in range(10)]
+
+    analysed = asyncio.run(
+        analyse_sentences_async(sentences, token_budget=1, max_concurrency=3)
+    )
+
+    assert [sentence.text for sentence in analysed] == sentences
+    assert peak == 3
+
+
+def test_batched_analyses_are_cached_apart(fake_backend: FakeBackend) -> None:
+    sentence_cache = TieredCache(LRUCache())
+
+    analyse_sentences(["Kot pije wodę.", "Pada deszcz."], sentence_cache=sentence_cache)
+
+    assert sentence_cache.get(sentence_cache_key("Kot pije wodę.")) is None
+    analyse_sentence("Kot pije wodę.", sentence_cache)
+    assert sentence_cache.stats.hits == 0
+    analyse_sentences(["Kot pije wodę.", "Pada deszcz."], sentence_cache=sentence_cache)
+    assert sentence_cache.stats.hits == 2
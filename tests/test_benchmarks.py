@@ -0,0 +1,32 @@
+from benchmarks.suite import compare, summarize
+
+
+def test_summarize() -> None:
+    latencies = [i / 1000 for i in range(1, 101)]
+    result = summarize(latencies, elapsed=2.0, items=100, peak=4096)
+    assert result["p50_ms"] == 50.5
+    assert result["p99_ms"] == 99.01
+    assert result["throughput_per_s"] == 50
+    assert result["peak_memory_kb"] == 4
+
+
+def test_summarize_single_run() -> None:
+    result = summarize([0.25], elapsed=0.25, items=10, peak=0)
+    assert result["p50_ms"] == result["p99_ms"] == 250
+
+
+def test_compare(capsys) -> None:
+    previous = {
+        "commit": "abc1234",
+        "benchmarks": {"api": {"p50_ms": 100, "throughput_per_s": 10}},
+    }
+    current = {
+        "benchmarks": {
+            "api": {"p50_ms": 50, "throughput_per_s": 20},
+            "new": {"p50_ms": 1, "throughput_per_s": 1},
+        }
+    }
+    compare(previous, current)
+    assert capsys.readouterr().out == (
+        "api: p50 -50%, throughput +100% since abc1234\n"
+    )
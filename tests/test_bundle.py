@@ -0,0 +1,89 @@
+import hashlib
+from pathlib import Path
+
+import httpx
+import pytest
+from click.testing import CliRunner
+
+from frazer import analyser
+from frazer.analyser import analyse_sentence, sentence_cache_key
+from frazer.backends import FakeBackend
+from frazer.bundle import (
+    AnalysisBundle,
+    build_bundle,
+    command,
+    read_sentences,
+    write_bundle,
+)
+
+
+def test_lookup_by_binary_search(tmp_path: Path) -> None:
+    entries = {
+        hashlib.sha256(str(pos).encode()).hexdigest(): f'{{"pos": {pos}}}'
+        for pos in range(1000)
+    }
+    path = tmp_path / "analyses.bundle"
+
+    assert write_bundle(path, entries.items()) == 1000
+
+    bundle = AnalysisBundle(path)
+    assert len(bundle) == 1000
+    assert all(bundle.get(key) == value for key, value in entries.items())
+    assert bundle.get(hashlib.sha256(b"missing").hexdigest()) is None
+    assert bundle.stats.as_dict() == {"hits": 1000, "misses": 1}
+
+
+def test_empty_and_invalid_bundles(tmp_path: Path) -> None:
+    write_bundle(tmp_path / "empty.bundle", [])
+    (tmp_path / "invalid.bundle").write_bytes(b"not a bundle")
+
+    assert AnalysisBundle(tmp_path / "empty.bundle").get("00" * 32) is None
+    with pytest.raises(ValueError):
+        AnalysisBundle(tmp_path / "invalid.bundle")
+
+
+def test_bundled_sentences_are_answered_without_requests(
+    tmp_path: Path, fake_backend: FakeBackend
+) -> None:
+    sentences_path = tmp_path / "sentences.txt"
+    sentences_path.write_text("Kot pije wodę.\n\nPada deszcz.\n")
+    bundle_path = tmp_path / "analyses.bundle"
+
+    sentences = read_sentences(sentences_path)
+    assert build_bundle(sentences, bundle_path) == 2
+
+    bundle = AnalysisBundle(bundle_path)
+    analyser.use_bundle(bundle)
+    requests = analyser.usage_stats.requests
+    sentence = analyse_sentence("  Kot pije wodę.")
+
+    assert [word.original_value for word in sentence.words] == ["Kot", "pije", "wodę"]
+    assert analyser.usage_stats.requests == requests
+    assert bundle.get(sentence_cache_key("Pada deszcz.")) is not None
+    # Keyed on the model, like the sentence cache
+    fake_backend.model = "other"
+    assert bundle.get(sentence_cache_key("Pada deszcz.")) is None
+
+
+class UnauthorizedBackend(FakeBackend):
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(401, json={"error": {"message": "No API key"}})
+
+
+def test_bundles_missing_most_sentences_fail(
+    tmp_path: Path, fake_backend: FakeBackend
+) -> None:
+    sentences_path = tmp_path / "sentences.txt"
+    sentences_path.write_text("Kot pije wodę.\nPada deszcz.\n")
+    bundle_path = tmp_path / "analyses.bundle"
+    analyser.use_backend(UnauthorizedBackend())
+
+    with pytest.raises(ValueError):
+        build_bundle(read_sentences(sentences_path), bundle_path)
+    result = CliRunner().invoke(
+        command(), ["--sentences", str(sentences_path), "--output", str(bundle_path)]
+    )
+
+    assert result.exit_code != 0
+    assert "Only 0 of 2 sentences analysed" in result.output
+    assert not bundle_path.exists()
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+
+from frazer.cache import LRUCache, SQLiteCache, TieredCache
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache = LRUCache(max_size=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_lru_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr("frazer.cache.time.time", lambda: now)
+    cache = LRUCache(ttl=10)
+    cache.set("a", "1")
+
+    now += 11
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_persists(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite"
+    cache = SQLiteCache(path)
+    cache.set("a", "1")
+    cache.close()
+
+    assert SQLiteCache(path).get("a") == "1"
+
+
+def test_tiered_cache_counts_hits_and_misses(tmp_path: Path) -> None:
+    disk = SQLiteCache(tmp_path / "cache.sqlite")
+    disk.set("a", "1")
+    cache = TieredCache(LRUCache(), disk)
+
+    assert cache.get("a") == "1"
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+
+    assert cache.stats.disk_hits == 1
+    assert cache.stats.memory_hits == 1
+    assert cache.stats.misses == 1
@@ -0,0 +1,181 @@
+import asyncio
+import json
+from typing import Any
+
+import httpx
+import pytest
+
+from frazer import analyser
+from frazer.analyser import AnalysedSentence, analyse_sentence, analyse_sentence_async
+from frazer.backends import FakeBackend
+from frazer.cascade import Cascade, consistency_problems
+from frazer.instrumentation import track
+from frazer.memo import tokenize
+from frazer.usage import UsageStats, estimate_cost
+
+SENTENCE = "Kot pije wodę."
+
+
+def analysis(**changes: Any) -> AnalysedSentence:
+    words = [
+        {
+            "original_value": "Kot",
+            "root": "kot",
+            "original_value_translation": "cat",
+            "syntatic_category": "noun",
+            "declension_case": "nominative",
+            "word_causing_declension": "none",
+            "gender": "masculine",
+            "number": "singular",
+        },
+        {
+            "original_value": "pije",
+            "root": "pić",
+            "original_value_translation": "drinks",
+            "syntatic_category": "verb",
+            "aspect": "imperfective",
+            "conjugation": {
+                "person": 3,
+                "number": "singular",
+                "tense": "present",
+                "mood": "indicative",
+            },
+        },
+        {
+            "original_value": "wodę",
+            "root": "woda",
+            "original_value_translation": "water",
+            "syntatic_category": "noun",
+            "declension_case": "accusative",
+            "word_causing_declension": "pić",
+            "gender": "feminine",
+            "number": "singular",
+        },
+    ]
+    for pos, word_changes in changes.get("words", {}).items():
+        words[pos] = {**words[pos], **word_changes}
+    return AnalysedSentence.model_validate(
+        {
+            "text": SENTENCE,
+            "translation": "The cat drinks water.",
+            "words": words,
+            "grammatically_correct": True,
+        }
+    )
+
+
+def test_consistent_analysis() -> None:
+    assert consistency_problems(analysis(), tokenize(SENTENCE)) == []
+
+
+@pytest.mark.parametrize(
+    "words, problem",
+    [
+        ({2: {"original_value": "woda"}}, "'wodę' not analysed"),
+        ({2: {"word_causing_declension": "je"}}, "'wodę' declined by 'je'"),
+        (
+            {1: {"conjugation": {"person": 3, "mood": "indicative"}}},
+            "'pije': person without a number",
+        ),
+        (
+            {1: {"conjugation": {"number": "singular", "mood": "infinitive"}}},
+            "'pije': number or gender in the infinitive",
+        ),
+        (
+            {1: {"conjugation": {"tense": "present", "mood": "imperative"}}},
+            "'pije': tense in the imperative",
+        ),
+    ],
+)
+def test_inconsistent_analysis(words: dict, problem: str) -> None:
+    assert problem in consistency_problems(analysis(words=words), tokenize(SENTENCE))
+
+
+class SloppyBackend(FakeBackend):
+    """Fake backend whose `small` model leaves out the last word."""
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        response = super().handle(request)
+        if json.loads(request.content)["model"] != "small":
+            return response
+        body = response.json()
+        function = body["choices"][0]["message"]["tool_calls"][0]["function"]
+        arguments = json.loads(function["arguments"])
+        arguments["words"] = arguments["words"][:-1]
+        function["arguments"] = json.dumps(arguments)
+        return httpx.Response(200, json=body)
+
+    async def handle_async(self, request: httpx.Request) -> httpx.Response:
+        return self.handle(request)
+
+
+@pytest.fixture
+def cascade(monkeypatch: pytest.MonkeyPatch, fake_backend: FakeBackend) -> Cascade:
+    monkeypatch.setattr(analyser, "cascade", analyser.cascade)
+    analyser.use_backend(SloppyBackend())
+    analyser.use_cascade(["small", "large"])
+    return analyser.get_cascade()
+
+
+def test_inconsistent_analyses_are_escalated(cascade: Cascade) -> None:
+    sentence = analyse_sentence(SENTENCE)
+    async_sentence = asyncio.run(analyse_sentence_async("Pies je kość."))
+
+    assert [word.original_value for word in sentence.words] == ["Kot", "pije", "wodę"]
+    assert len(async_sentence.words) == 3
+    assert cascade.stats.as_dict() == {
+        "tier0_requests": 2,
+        "tier0_accepted": 0,
+        "tier0_hit_rate": 0.0,
+        "tier1_requests": 2,
+        "tier1_accepted": 2,
+        "tier1_hit_rate": 1.0,
+    }
+
+
+def test_consistent_analyses_stay_on_the_first_tier(cascade: Cascade) -> None:
+    analyser.use_cascade(["large", "small"])
+
+    analyse_sentence(SENTENCE)
+
+    assert analyser.get_cascade().stats.as_dict() == {
+        "tier0_requests": 1,
+        "tier0_accepted": 1,
+        "tier0_hit_rate": 1.0,
+    }
+    assert cascade.name("fake") == "small>large"
+    assert Cascade().name("fake") == "fake"
+
+
+def test_a_single_model_replaces_the_backend_model(cascade: Cascade) -> None:
+    analyser.use_cascade(["small"])
+
+    sentence = analyse_sentence(SENTENCE)
+
+    # Answered by the sloppy model, the only tier, instead of the backend's
+    assert len(sentence.words) == 2
+    assert analyser.get_cascade().name("fake") == "small"
+
+
+def test_tiers_are_priced_at_their_model(
+    monkeypatch: pytest.MonkeyPatch, cascade: Cascade
+) -> None:
+    monkeypatch.setattr(analyser, "usage_stats", UsageStats())
+    analyser.reset_clients()
+    analyser.use_cascade(["small", "gpt-4o"])
+
+    with track("sentence", "gpt-4o-mini") as record:
+        analyse_sentence(SENTENCE)
+
+    assert set(record.usage.models) == {"small", "gpt-4o"}
+    # The price of the first tier's model is unknown, not the backend's
+    assert "cost_usd" not in record.fields("gpt-4o-mini")
+    analyser.use_cascade(["gpt-4o"])
+
+    with track("sentence", "gpt-4o-mini") as record:
+        analyse_sentence(SENTENCE)
+
+    expected = estimate_cost("gpt-4o", *record.usage.models["gpt-4o"])
+    assert expected is not None
+    assert record.fields("gpt-4o-mini")["cost_usd"] == round(expected, 8)
+    assert analyser.usage_stats.cost("gpt-4o-mini") is None
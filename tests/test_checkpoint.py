@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from evaluation.tools.checkpoint import CheckpointJournal
+from evaluation.tools.records import AnalysedSentenceRecord, InputRecord
+from frazer.analyser import AnalysedSentence
+
+RECORD = InputRecord(1, "Kot pije wodę.")
+ANALYSED = AnalysedSentenceRecord(
+    id=1,
+    analysed_sentence=AnalysedSentence(
+        text="Kot pije wodę.",
+        translation="The cat drinks water.",
+        words=[],
+        grammatically_correct=True,
+    ),
+)
+
+
+def test_resumed_journal_returns_completed_analyses(tmp_path: Path) -> None:
+    path = tmp_path / "journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.append(RECORD, ANALYSED)
+    journal.close()
+    with path.open("ab") as file:
+        file.write(b'{"id": 2, "hash"')
+
+    resumed = CheckpointJournal(path, resume=True)
+
+    assert resumed.get(RECORD) == ANALYSED
+    assert resumed.get(InputRecord(1, "Pies pije wodę.")) is None
+    assert resumed.get(InputRecord(2, "Pada deszcz.")) is None
+    resumed.append(InputRecord(2, "Pada deszcz."), ANALYSED._replace(id=2))
+    assert resumed.get(InputRecord(2, "Pada deszcz.")) is not None
+
+
+def test_journal_starts_over_without_resume(tmp_path: Path) -> None:
+    path = tmp_path / "journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.append(RECORD, ANALYSED)
+    journal.close()
+
+    assert CheckpointJournal(path).get(RECORD) is None
@@ -0,0 +1,95 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from typing import Any
+
+import pytest
+
+from frazer import analyser
+from frazer.clients import (
+    ClientSettings,
+    build_openai_client,
+    warn_http2_unavailable,
+)
+
+
+def test_settings_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("FRAZER_HTTP_MAX_CONNECTIONS", "16")
+    monkeypatch.setenv("FRAZER_HTTP_TIMEOUT", "30")
+    monkeypatch.setenv("FRAZER_HTTP2", "0")
+
+    settings = ClientSettings.from_env()
+
+    assert settings.max_connections == 16
+    assert settings.read_timeout == 30.0
+    assert not settings.use_http2
+    assert settings.sized_for(32).max_keepalive_connections == 32
+    assert settings.sized_for(32).max_connections == 32
+
+
+def test_http2_is_used_by_default() -> None:
+    assert ClientSettings().use_http2
+
+
+def test_missing_http2_support_is_logged(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(
+        "frazer.clients.find_spec",
+        lambda name: None if name == "h2" else find_spec(name),
+    )
+    warn_http2_unavailable.cache_clear()
+
+    with caplog.at_level(logging.WARNING):
+        assert not ClientSettings(http2=True).use_http2
+        assert not ClientSettings(http2=True).use_http2
+
+    assert caplog.text.count("h2 package isn't installed") == 1
+    warn_http2_unavailable.cache_clear()
+
+
+def test_client_uses_the_pool_settings() -> None:
+    settings = ClientSettings(max_connections=8, connect_timeout=2.0, http2=False)
+
+    client = build_openai_client(settings, api_key="test")
+
+    pool = client._client._transport._pool
+    assert pool._max_connections == 8
+    assert client.timeout.connect == 2.0
+
+
+def test_configure_clients_replaces_the_shared_client(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(analyser, "client_settings", analyser.client_settings)
+    previous = analyser.get_client()
+    assert analyser.get_client() is previous
+
+    analyser.configure_clients(ClientSettings(max_connections=4))
+
+    assert analyser.get_client() is not previous
+    assert analyser.get_client().client.max_retries == 2
+    analyser.reset_clients()
+
+
+def test_threads_racing_to_the_first_use_share_the_client(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    create_client = analyser.create_client
+    created = []
+
+    def slow_create_client(is_async: bool = False) -> Any:
+        time.sleep(0.05)
+        created.append(is_async)
+        return create_client(is_async)
+
+    monkeypatch.setattr(analyser, "create_client", slow_create_client)
+    analyser.reset_clients()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: analyser.get_client(), range(8)))
+
+    assert created == [False]
+    assert all(client is clients[0] for client in clients)
+    analyser.reset_clients()
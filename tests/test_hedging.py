@@ -0,0 +1,87 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from frazer.hedging import MIN_SAMPLES, Hedger
+
+
+def warmed_up(**kwargs: float) -> Hedger:
+    hedger = Hedger(enabled=True, **kwargs)
+    hedger.latencies.extend([0.01] * MIN_SAMPLES)
+    return hedger
+
+
+def calls(*outcomes: float | Exception) -> Callable[[], Awaitable[str]]:
+    """Successive calls taking the given seconds, or raising."""
+    remaining = list(enumerate(outcomes))
+
+    async def call() -> str:
+        pos, outcome = remaining.pop(0)
+        if isinstance(outcome, Exception):
+            await asyncio.sleep(0.03)
+            raise outcome
+        await asyncio.sleep(outcome)
+        return f"call {pos}"
+
+    return call
+
+
+def test_slow_request_is_hedged() -> None:
+    hedger = warmed_up(max_rate=1)
+
+    result = asyncio.run(hedger.run(calls(1.0, 0.01)))
+
+    assert result == "call 1"
+    assert hedger.stats.as_dict() == {"requests": 1, "hedged": 1, "won": 1}
+
+
+def test_fast_request_is_not_hedged() -> None:
+    hedger = warmed_up(max_rate=1)
+
+    assert asyncio.run(hedger.run(calls(0.001))) == "call 0"
+    assert hedger.stats.hedged == 0
+
+
+def test_hedge_rate_is_capped() -> None:
+    hedger = warmed_up(max_rate=0.5)
+
+    async def main() -> None:
+        for _ in range(4):
+            await hedger.run(calls(0.2, 0.01))
+
+    asyncio.run(main())
+
+    assert hedger.stats.requests == 4
+    assert hedger.stats.hedged == 2
+
+
+def test_failed_request_leaves_the_other_to_answer() -> None:
+    hedger = warmed_up(max_rate=1)
+
+    assert asyncio.run(hedger.run(calls(RuntimeError(), 0.05))) == "call 1"
+    assert hedger.stats.won == 1
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(hedger.run(calls(RuntimeError(), RuntimeError())))
+
+
+def test_no_hedging_without_enough_latencies() -> None:
+    disabled = Hedger(max_rate=1)
+    disabled.latencies.extend([0.01] * MIN_SAMPLES)
+    cold = Hedger(enabled=True, max_rate=1)
+
+    assert asyncio.run(disabled.run(calls(0.05))) == "call 0"
+    assert asyncio.run(cold.run(calls(0.05))) == "call 0"
+    assert disabled.stats.requests == cold.stats.hedged == 0
+
+
+def test_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("FRAZER_HEDGE", "1")
+    monkeypatch.setenv("FRAZER_HEDGE_PERCENTILE", "99")
+
+    hedger = Hedger.from_env()
+
+    assert hedger.enabled
+    assert hedger.percentile == 99
+    assert hedger.max_rate == 0.05
@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from instructor.exceptions import InstructorRetryException
+
+from frazer import analyser, backends
+from frazer.analyser import analyse_sentence, analyse_sentence_async
+from frazer.backends import FakeBackend
+from frazer.cache import LRUCache, TieredCache
+from frazer.instrumentation import (
+    Histogram,
+    completion_started,
+    metrics,
+    render_metrics,
+    track,
+)
+from frazer.usage import UsageStats, estimate_cost
+
+
+def test_histogram_buckets() -> None:
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+def test_request_stages_and_usage_are_recorded(fake_backend: FakeBackend) -> None:
+    analyser.use_backend(FakeBackend(model="gpt-4o-mini"))
+    cache = TieredCache(LRUCache())
+    with track("sentence", "gpt-4o-mini") as record:
+        analyse_sentence("Kot pije wodę.", cache)
+
+    assert {"cache_lookup", "plan", "request", "completion", "store", "total"} <= set(
+        record.timings
+    )
+    assert record.timings["completion"] <= record.timings["request"]
+    fields = record.fields("gpt-4o-mini")
+    assert fields["completions"] == 1
+    assert fields["prompt_tokens"] > 0
+    assert fields["cost_usd"] > 0
+    assert not fields["cache_hit"]
+
+    with track("sentence") as record:
+        analyse_sentence("Kot pije wodę.", cache)
+    assert record.cache_hit
+    assert record.usage.requests == 0
+
+
+def test_validation_retries_are_counted(
+    fake_backend: FakeBackend, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fake_arguments = backends.fake_arguments
+    calls = []
+
+    def invalid_once(body: dict) -> tuple[str, str]:
+        calls.append(body)
+        name, arguments = fake_arguments(body)
+        if len(calls) == 1:
+            return name, json.dumps({"text": "Kot pije wodę."})
+        return name, arguments
+
+    monkeypatch.setattr(backends, "fake_arguments", invalid_once)
+    retries = metrics.retries
+    with track("sentence") as record:
+        analyse_sentence("Kot pije wodę.")
+
+    assert record.retries == 1
+    assert record.usage.requests == 2
+    assert metrics.retries == retries + 1
+
+
+class FailingBackend(FakeBackend):
+    """Fake backend answering every request with a server error."""
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(500, json={"error": {"message": "Server error"}})
+
+    async def handle_async(self, request: httpx.Request) -> httpx.Response:
+        return self.handle(request)
+
+
+def test_failed_completions_are_counted(fake_backend: FakeBackend) -> None:
+    analyser.use_backend(FailingBackend())
+    errors = metrics.errors
+
+    with pytest.raises(InstructorRetryException) as error:
+        analyse_sentence("Kot pije wodę.")
+    with pytest.raises(InstructorRetryException):
+        asyncio.run(analyse_sentence_async("Kot pije wodę."))
+
+    # Every attempt of instructor failed
+    assert metrics.errors == errors + 2 * error.value.n_attempts
+    assert completion_started.get() is None
+    assert "frazer_completion_errors_total" in render_metrics(UsageStats())
+
+
+def test_failed_requests_are_counted() -> None:
+    errors = metrics.requests["error"]
+    with pytest.raises(ValueError):
+        with track("sentence"):
+            raise ValueError("failed")
+    assert metrics.requests["error"] == errors + 1
+
+
+def test_estimate_cost() -> None:
+    assert estimate_cost("gpt-4o-mini", 2_000_000, 1_000_000, 1_000_000) == (
+        pytest.approx(0.15 + 0.075 + 0.60)
+    )
+    assert estimate_cost("unknown", 1, 0, 1) is None
+
+
+def test_render_metrics() -> None:
+    usage = UsageStats(requests=1, prompt_tokens=100, completion_tokens=10)
+    stats = {"sentences": {"misses": 3, "hit_rate": 0.25}, "bundle": {"entries": 7}}
+    text = render_metrics(usage, "gpt-4o-mini", stats)
+
+    assert "# TYPE frazer_stage_seconds histogram" in text
+    assert "frazer_prompt_tokens_total 100\n" in text
+    assert "frazer_completion_tokens_total 10\n" in text
+    assert "frazer_cost_usd_total" in text
+    assert "# TYPE frazer_sentences_misses_total counter" in text
+    assert "frazer_sentences_misses_total 3\n" in text
+    assert "# TYPE frazer_sentences_hit_rate gauge" in text
+    assert "frazer_bundle_entries 7\n" in text
+
+
+def test_metrics_endpoint(fake_backend: FakeBackend) -> None:
+    from frazer.api import app
+
+    async def main() -> tuple[httpx.Response, httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            analysed = await c.post("/sentence", json={"sentence": "Pada deszcz."})
+            return analysed, await c.get("/metrics")
+
+    analysed, response = asyncio.run(main())
+    assert analysed.json()["sentence"]["text"] == "Pada deszcz."
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'frazer_stage_seconds_count{stage="serialize"}' in response.text
+    assert "frazer_requests_total" in response.text
@@ -0,0 +1,48 @@
+import pytest
+
+from frazer.analyser import AnalysedSentence, Other, Preposition, analyse_sentence
+from frazer.lexicon import default_lexicon
+
+KOT = Other(
+    original_value="Kot",
+    root="kot",
+    original_value_translation="cat",
+    syntatic_category="noun",
+)
+
+
+def test_lexicon_tags_closed_class_words() -> None:
+    lexicon = default_lexicon()
+
+    assert lexicon.tag("W") == {
+        "original_value": "W",
+        "root": "w",
+        "original_value_translation": "in",
+        "syntatic_category": "preposition",
+    }
+    assert lexicon.tag("się")["syntatic_category"] == "pronoun"
+    assert lexicon.tag("kot") is None
+    # Adverbs, pronouns or other prepositions depending on the sentence
+    assert all(lexicon.tag(word) is None for word in ["o", "obok", "około", "nie"])
+
+
+def test_lexicon_words_are_not_requested(monkeypatch: pytest.MonkeyPatch) -> None:
+    requests = []
+
+    def mock_create(*args, **kwargs):
+        requests.append(kwargs["messages"])
+        return AnalysedSentence(
+            text="Kot też w",
+            translation="The cat also in",
+            words=[KOT],
+            grammatically_correct=True,
+        )
+
+    monkeypatch.setattr("frazer.analyser.client.chat.completions.create", mock_create)
+
+    sentence = analyse_sentence("Kot też w", lexicon=default_lexicon())
+
+    assert "only the words 'Kot'" in requests[0][-1]["content"]
+    assert [word.original_value for word in sentence.words] == ["Kot", "też", "w"]
+    assert isinstance(sentence.words[2], Preposition)
+    assert sentence.words[1].syntatic_category == "particle"
@@ -0,0 +1,114 @@
+import pytest
+
+from frazer import analyser
+from frazer.analyser import (
+    AnalysedSentence,
+    Noun,
+    Other,
+    Preposition,
+    SyntacticCategory,
+    analyse_sentence,
+)
+from frazer.backends import FakeBackend
+from frazer.memo import WordMemo, tokenize, word_context_key
+
+KOT = Noun(
+    original_value="Kot",
+    root="kot",
+    original_value_translation="cat",
+    syntatic_category=SyntacticCategory.noun,
+    declension_case="nominative",
+    word_causing_declension="jest",
+    gender="masculine",
+    number="singular",
+)
+JEST = Other(
+    original_value="jest",
+    root="być",
+    original_value_translation="is",
+    syntatic_category=SyntacticCategory.other,
+)
+W = Preposition(
+    original_value="w",
+    root="w",
+    original_value_translation="in",
+    syntatic_category=SyntacticCategory.preposition,
+)
+DOMU = Noun(
+    original_value="domu",
+    root="dom",
+    original_value_translation="home",
+    syntatic_category=SyntacticCategory.noun,
+    declension_case="genitive",
+    word_causing_declension="w",
+    gender="masculine",
+    number="singular",
+)
+
+
+def test_tokenize_drops_punctuation() -> None:
+    assert tokenize("Kot jest w domu, prawda?") == [
+        "Kot",
+        "jest",
+        "w",
+        "domu",
+        "prawda",
+    ]
+
+
+def test_context_key_uses_neighbours() -> None:
+    tokens = ["Kot", "jest", "w", "domu"]
+    assert word_context_key(tokens, 0) == ":|kot|jest"
+    assert word_context_key(tokens, 3) == ":w|domu|"
+
+
+def test_memo_requests_only_unknown_words(monkeypatch: pytest.MonkeyPatch) -> None:
+    responses = [
+        AnalysedSentence(
+            text="Kot jest w",
+            translation="The cat is in",
+            words=[KOT, JEST, W],
+            grammatically_correct=False,
+        ),
+        AnalysedSentence(
+            text="Kot jest w domu",
+            translation="The cat is at home",
+            words=[W, DOMU],
+            grammatically_correct=True,
+        ),
+    ]
+    requests = []
+
+    def mock_create(*args, **kwargs):
+        requests.append(kwargs["messages"])
+        return responses[len(requests) - 1]
+
+    monkeypatch.setattr("frazer.analyser.client.chat.completions.create", mock_create)
+    word_memo = WordMemo()
+
+    analyse_sentence("Kot jest w", word_memo=word_memo)
+    sentence = analyse_sentence("Kot jest w domu", word_memo=word_memo)
+
+    assert len(requests) == 2
+    assert "only the words 'w', 'domu'" in requests[1][-1]["content"]
+    assert [word.original_value for word in sentence.words] == [
+        "Kot",
+        "jest",
+        "w",
+        "domu",
+    ]
+    assert sentence.translation == "The cat is at home"
+    assert word_memo.stats.hits == 2
+
+
+def test_memo_is_namespaced_by_model(fake_backend: FakeBackend) -> None:
+    word_memo = WordMemo()
+    analyse_sentence("Kot pije wodę.", word_memo=word_memo)
+
+    analyser.use_backend(FakeBackend(model="other"))
+    analyse_sentence("Kot pije wodę.", word_memo=word_memo)
+    assert word_memo.stats.hits == 0
+
+    analyser.use_backend(fake_backend)
+    analyse_sentence("Kot pije wodę.", word_memo=word_memo)
+    assert word_memo.stats.hits == 3
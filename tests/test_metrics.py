@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluation.tools.metrics import (
+    EVALUTION_DIMENSIONS,
+    compare_datasets,
+    diff_dataframes,
+)
+
+classification_report = pytest.importorskip("sklearn.metrics").classification_report
+
+
+@pytest.fixture
+def datasets() -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    labels = np.array(["a", "b", "c", None], dtype=object)
+    baseline = pd.DataFrame(
+        {column: rng.choice(labels, 200) for column in EVALUTION_DIMENSIONS}
+    )
+    new = baseline.copy()
+    for column in EVALUTION_DIMENSIONS:
+        errors = rng.random(200) < 0.3
+        new.loc[errors, column] = rng.choice(labels, errors.sum())
+    # A label only predicted, and a dimension never filled in
+    new.loc[0, "root"] = "z"
+    baseline["subtype"] = None
+    new["subtype"] = None
+    return baseline, new
+
+
+def test_metrics_match_classification_report(
+    datasets: tuple[pd.DataFrame, pd.DataFrame],
+) -> None:
+    baseline, new = datasets
+
+    metrics = compare_datasets(baseline, new)
+
+    for column in EVALUTION_DIMENSIONS:
+        report = classification_report(
+            baseline[column].fillna("N/A"),
+            new[column].fillna("N/A"),
+            output_dict=True,
+            zero_division=0,
+        )["weighted avg"]
+        assert metrics[column]["precision"] == pytest.approx(report["precision"])
+        assert metrics[column]["recall"] == pytest.approx(report["recall"])
+        assert metrics[column]["f1"] == pytest.approx(report["f1-score"])
+        assert metrics[column]["support"] == report["support"]
+    assert metrics["subtype"]["f1"] == 1.0
+
+
+def test_diff_keeps_only_the_changed_values(
+    datasets: tuple[pd.DataFrame, pd.DataFrame],
+) -> None:
+    baseline, new = datasets
+
+    diff = diff_dataframes(baseline, new)
+
+    for column in EVALUTION_DIMENSIONS:
+        for pos in range(len(new)):
+            if baseline.at[pos, column] == new.at[pos, column]:
+                assert pd.isna(diff.at[pos, column])
+            else:
+                assert diff.at[pos, column] == new.at[pos, column] or (
+                    pd.isna(new.at[pos, column])
+                )
+
+
+def test_row_count_mismatch(datasets: tuple[pd.DataFrame, pd.DataFrame]) -> None:
+    baseline, new = datasets
+
+    with pytest.raises(AssertionError):
+        compare_datasets(baseline, new.iloc[:-1])
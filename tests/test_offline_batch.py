@@ -0,0 +1,181 @@
+import json
+import logging
+from pathlib import Path
+
+import pytest
+
+from evaluation.tools.offline_batch import (
+    BatchState,
+    LocalBatchClient,
+    analyse_input_records_offline,
+    write_requests,
+)
+from evaluation.tools.records import InputRecord
+from frazer import analyser
+from frazer.backends import FakeBackend, OpenAICompatibleBackend
+
+
+def completion(message: dict) -> dict:
+    return {
+        "id": "chatcmpl-batch",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": None, **message},
+                "finish_reason": "stop",
+            }
+        ],
+    }
+
+
+def respond(body: dict) -> dict:
+    sentence = body["messages"][1]["content"]
+    arguments = {
+        "text": sentence,
+        "translation": "translation",
+        "words": [],
+        "grammatically_correct": True,
+    }
+    tool_call = {
+        "id": "call",
+        "type": "function",
+        "function": {"name": "AnalysedSentence", "arguments": json.dumps(arguments)},
+    }
+    return completion({"tool_calls": [tool_call]})
+
+
+def test_offline_batch_round_trip(tmp_path: Path) -> None:
+    records = [InputRecord(1, "Kot pije wodę."), InputRecord(2, "Pada deszcz.")]
+
+    analysed = list(
+        analyse_input_records_offline(
+            records, tmp_path, client=LocalBatchClient(respond), poll_interval=0
+        )
+    )
+
+    assert [record.id for record in analysed] == [1, 2]
+    assert analysed[1].analysed_sentence.text == "Pada deszcz."
+
+
+def test_offline_batch_resumes_by_id(tmp_path: Path) -> None:
+    records = [InputRecord(1, "Kot pije wodę."), InputRecord(2, "Pada deszcz.")]
+    list(
+        analyse_input_records_offline(
+            records[:1], tmp_path, client=LocalBatchClient(respond), poll_interval=0
+        )
+    )
+    submitted = []
+
+    def respond_and_record(body: dict) -> dict:
+        submitted.append(body)
+        return respond(body)
+
+    analysed = list(
+        analyse_input_records_offline(
+            records,
+            tmp_path,
+            client=LocalBatchClient(respond_and_record),
+            poll_interval=0,
+        )
+    )
+
+    assert len(submitted) == 1
+    assert "Pada deszcz." in submitted[0]["messages"][-1]["content"]
+    assert [record.id for record in analysed] == [1, 2]
+
+
+def test_invalid_results_are_skipped(tmp_path: Path) -> None:
+    def respond_invalid(body: dict) -> dict:
+        return completion({"content": "I can't help with that."})
+
+    analysed = list(
+        analyse_input_records_offline(
+            [InputRecord(1, "Kot pije wodę.")],
+            tmp_path,
+            client=LocalBatchClient(respond_invalid),
+            poll_interval=0,
+        )
+    )
+
+    assert analysed == []
+
+
+def test_request_files_are_split_by_size(tmp_path: Path) -> None:
+    records = [InputRecord(pos, f"Kot pije wodę {pos}.") for pos in range(10)]
+    state = BatchState(tmp_path)
+    paths = write_requests(records, tmp_path, state, max_bytes=1)
+    line_size = paths[0].stat().st_size
+
+    paths = write_requests(records, tmp_path, state, max_bytes=3 * line_size + 10)
+
+    assert [len(path.read_text().splitlines()) for path in paths] == [3, 3, 3, 1]
+    assert all(path.stat().st_size <= 3 * line_size + 10 for path in paths)
+    assert len(write_requests(records, tmp_path, state, max_requests=5)) == 2
+
+
+def test_failed_requests_are_reported_and_retried(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    records = [InputRecord(1, "Kot pije wodę."), InputRecord(2, "Pada deszcz.")]
+
+    def respond_failing(body: dict) -> dict:
+        raise RuntimeError("server error")
+
+    with caplog.at_level(logging.WARNING):
+        analysed = list(
+            analyse_input_records_offline(
+                records,
+                tmp_path,
+                client=LocalBatchClient(respond_failing),
+                poll_interval=0,
+            )
+        )
+
+    assert analysed == []
+    assert "Sentence 2 failed: server error" in caplog.text
+    analysed = list(
+        analyse_input_records_offline(
+            records, tmp_path, client=LocalBatchClient(respond), poll_interval=0
+        )
+    )
+    assert [record.id for record in analysed] == [1, 2]
+
+
+def test_results_are_parsed_in_the_backend_mode(
+    tmp_path: Path, fake_backend: FakeBackend
+) -> None:
+    analyser.use_backend(
+        OpenAICompatibleBackend("http://localhost:8080", "qwen", mode="json_mode")
+    )
+    word = {
+        "original_value": "Pada",
+        "root": "padać",
+        "original_value_translation": "falls",
+        "syntactic_category": "verb",
+        "aspect": "imperfective",
+        "conjugation": {"person": 3, "number": "singular", "mood": "indicative"},
+    }
+
+    def respond_in_content(body: dict) -> dict:
+        arguments = {
+            "text": "Pada.",
+            "translation": "It rains.",
+            "words": [word],
+            "grammatically_correct": True,
+        }
+        return completion({"content": json.dumps(arguments)})
+
+    analysed = list(
+        analyse_input_records_offline(
+            [InputRecord(1, "Pada.")],
+            tmp_path,
+            client=LocalBatchClient(respond_in_content),
+            poll_interval=0,
+        )
+    )
+
+    # Repaired like online responses: the category under another key
+    assert analysed[0].analysed_sentence.words[0].syntatic_category == "verb"
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from frazer import backends
+from frazer.analyser import Noun, Verb, analyse_sentence
+from frazer.backends import FakeBackend
+from frazer.instrumentation import metrics, track
+from frazer.repair import normalize_person, repair_arguments, repair_word
+from frazer.wire import CompactSentence
+
+VERB = {
+    "original_value": "pije",
+    "root": "pić",
+    "original_value_translation": "drinks",
+    "syntatic_category": "verb",
+    "aspect": "imperfective",
+    "conjugation": {"person": 3, "number": "singular", "mood": "indicative"},
+}
+NOUN = {
+    "original_value": "wodę",
+    "root": "woda",
+    "original_value_translation": "water",
+    "syntatic_category": "noun",
+    "declension_case": "accusative",
+    "word_causing_declension": "pije",
+    "gender": "feminine",
+    "number": "singular",
+}
+
+
+@pytest.fixture
+def respond(monkeypatch: pytest.MonkeyPatch, fake_backend: FakeBackend) -> list[dict]:
+    """Words answered by the fake backend to the analysis of `Kot pije wodę.`"""
+    words: list[dict] = []
+
+    def fake_arguments(body: dict) -> tuple[str, str]:
+        sentence = {
+            "text": "Kot pije wodę.",
+            "translation": "The cat drinks water.",
+            "words": words,
+            "grammatically_correct": True,
+        }
+        return "AnalysedSentence", json.dumps(sentence)
+
+    monkeypatch.setattr(backends, "fake_arguments", fake_arguments)
+    return words
+
+
+def test_valid_words_are_left_as_they_are() -> None:
+    assert repair_word(VERB) == VERB
+    assert repair_word(NOUN) == NOUN
+    assert repair_arguments({"words": [VERB, NOUN]}) == {"words": [VERB, NOUN]}
+
+
+def test_deviations_are_repaired_without_retries(respond: list[dict]) -> None:
+    conjugation = VERB["conjugation"] | {"mood": "Active Participle"}
+    respond.append(VERB | {"syntatic_category": "Verb", "conjugation": conjugation})
+    respond.append(
+        {
+            ("syntactic_category" if key == "syntatic_category" else key): value
+            for key, value in NOUN.items()
+        }
+        | {"gender": "FEMININE"}
+    )
+    repairs = metrics.repairs
+
+    with track("sentence") as record:
+        sentence = analyse_sentence("Kot pije wodę.")
+
+    verb, noun = sentence.words
+    assert isinstance(verb, Verb)
+    assert verb.conjugation.mood.value == "active_participle"
+    assert isinstance(noun, Noun)
+    assert record.retries == 0
+    assert record.repairs == 1
+    assert metrics.repairs == repairs + 1
+
+
+def test_misplaced_conjugation() -> None:
+    verb = {key: value for key, value in VERB.items() if key != "conjugation"}
+    verb |= {"person": "3rd", "number": "singular", "mood": "indicative"}
+
+    assert repair_word(verb) == VERB
+
+
+def test_person_out_of_range_keeps_the_verb(respond: list[dict]) -> None:
+    respond.append(VERB | {"conjugation": VERB["conjugation"] | {"person": 4}})
+
+    word = analyse_sentence("Kot pije wodę.").words[0]
+
+    assert isinstance(word, Verb)
+    assert word.conjugation.person is None
+
+
+@pytest.mark.parametrize(
+    "value, person",
+    [(2, 2), ("1", 1), ("third person", 3), ("2nd", 2), (0, None), ("x", None)],
+)
+def test_normalize_person(value: object, person: int | None) -> None:
+    assert normalize_person(value) == person
+
+
+def test_repair_can_be_disabled(
+    respond: list[dict], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("FRAZER_REPAIR", "0")
+    respond.append(VERB | {"conjugation": VERB["conjugation"] | {"person": 4}})
+
+    assert not isinstance(analyse_sentence("Kot pije wodę.").words[0], Verb)
+
+
+def test_compact_codes_are_repaired() -> None:
+    arguments = repair_arguments(
+        {
+            "tr": "The cat drinks water.",
+            "ok": True,
+            "w": [
+                {"i": 1, "r": "pić", "t": "drinks", "c": "Verb", "p": 7, "md": "IND"},
+                {"i": 2, "r": "woda", "t": "water", "c": "N", "g": "feminine"},
+            ],
+        }
+    )
+    compact = CompactSentence.model_validate(arguments)
+
+    assert [word.c for word in compact.w] == ["v", "n"]
+    assert compact.w[0].p is None
+    assert compact.w[0].md == "ind"
+    assert compact.w[1].g == "f"
@@ -0,0 +1,51 @@
+import httpx
+import openai
+import pytest
+
+from evaluation.tools.scheduler import AdaptiveScheduler, TokenBudget
+
+
+def rate_limit_error() -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after-ms": "1"}, request=request)
+    return openai.RateLimitError("Rate limited", response=response, body=None)
+
+
+def test_rate_limit_is_retried_and_halves_concurrency() -> None:
+    scheduler = AdaptiveScheduler(max_concurrency=8)
+    calls = []
+
+    def call() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise rate_limit_error()
+        return "ok"
+
+    assert scheduler.run(call) == "ok"
+    assert scheduler.rate_limited == 2
+    assert scheduler.retries == 2
+    assert 2 <= scheduler.limit < 3
+
+
+def test_other_errors_are_not_retried() -> None:
+    scheduler = AdaptiveScheduler(max_concurrency=2)
+    calls = []
+
+    def call() -> None:
+        calls.append(1)
+        raise ValueError("invalid")
+
+    with pytest.raises(ValueError):
+        scheduler.run(call)
+    assert len(calls) == 1
+    assert scheduler.in_flight == 0
+
+
+def test_token_budget_waits_for_the_window_to_free_up() -> None:
+    budget = TokenBudget(tokens_per_minute=1000)
+    budget.spend(600, now=0.0)
+    budget.spend(300, now=10.0)
+
+    assert budget.wait_time(100, now=20.0) == 0.0
+    assert budget.wait_time(200, now=20.0) == 40.0
+    assert budget.wait_time(500, now=65.0) == 0.0
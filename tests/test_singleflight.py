@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from frazer.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result() -> None:
+    calls = []
+
+    async def analyse() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main() -> list[str]:
+        flight: SingleFlight[str] = SingleFlight()
+        results = await asyncio.gather(*(flight.do("a", analyse) for _ in range(5)))
+        assert flight.stats.shared == 4
+        assert not flight.pending
+        # A later call starts a new analysis
+        results.append(await flight.do("a", analyse))
+        return results
+
+    assert asyncio.run(main()) == ["result"] * 6
+    assert len(calls) == 2
+
+
+def test_errors_reach_every_caller() -> None:
+    async def fail() -> str:
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def main() -> list:
+        flight: SingleFlight[str] = SingleFlight()
+        return await asyncio.gather(
+            flight.do("a", fail), flight.do("a", fail), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_the_others() -> None:
+    async def analyse() -> str:
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def main() -> str:
+        flight: SingleFlight[str] = SingleFlight()
+        first = asyncio.create_task(flight.do("a", analyse))
+        second = asyncio.create_task(flight.do("a", analyse))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "result"
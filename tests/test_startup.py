@@ -0,0 +1,21 @@
+import subprocess
+import sys
+
+
+def test_importing_the_api_defers_the_openai_client() -> None:
+    code = (
+        "import sys; import frazer.api; "
+        "print(sorted({'instructor', 'openai'} & set(sys.modules)))"
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert process.stdout.strip() == "[]"
+
+
+def test_reading_the_bundle_leaves_out_the_command_line() -> None:
+    code = "import sys; import frazer.bundle; print('click' in sys.modules)"
+    process = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert process.stdout.strip() == "False"
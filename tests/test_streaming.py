@@ -0,0 +1,173 @@
+import asyncio
+import json
+import time
+from collections.abc import Iterator
+from typing import Any
+
+import httpx
+import pytest
+
+from frazer import analyser
+from frazer.analyser import AnalysedSentence, Noun, Verb
+from frazer.backends import FakeBackend
+from frazer.streaming import (
+    StreamReset,
+    analyse_sentence_stream,
+    analyse_sentence_stream_async,
+)
+
+ANALYSIS = {
+    "text": "Czytam książkę.",
+    "translation": "I am reading a book.",
+    "words": [
+        {
+            "original_value": "czytam",
+            "root": "czytać",
+            "original_value_translation": "I read",
+            "syntatic_category": "verb",
+            "aspect": "imperfective",
+            "conjugation": {"person": 1, "number": "singular", "mood": "indicative"},
+        },
+        {
+            "original_value": "książkę",
+            "root": "książka",
+            "original_value_translation": "book",
+            "syntatic_category": "noun",
+            "declension_case": "accusative",
+            "word_causing_declension": "czytać",
+            "gender": "feminine",
+            "number": "singular",
+        },
+    ],
+    "grammatically_correct": True,
+}
+
+
+class ScriptedBackend(FakeBackend):
+    """
+    Answers with `ANALYSIS`, in a tool call or in the message content depending
+    on the mode. Streamed responses are generated lazily, chunk by chunk, and
+    with `invalid_stream` their last word doesn't validate.
+    """
+
+    def __init__(self, mode: str = "tool_call", invalid_stream: bool = False) -> None:
+        super().__init__()
+        self.mode = mode
+        self.invalid_stream = invalid_stream
+        self.consumed: list[str] = []
+
+    def message(self, arguments: str) -> dict[str, Any]:
+        if self.mode == "json_mode":
+            return {"content": arguments}
+        function = {"name": "AnalysedSentence", "arguments": arguments}
+        return {
+            "tool_calls": [
+                {"index": 0, "id": "call", "type": "function", "function": function}
+            ]
+        }
+
+    def chunks(self, arguments: str) -> Iterator[bytes]:
+        second_word = arguments.index('{"original_value": "książkę"') + 5
+        for part in (arguments[:second_word], arguments[second_word:]):
+            self.consumed.append(part)
+            delta = self.message(part)
+            chunk = {
+                "id": "chatcmpl-scripted",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": "fake",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        analysis = json.loads(json.dumps(ANALYSIS))
+        if not json.loads(request.content).get("stream"):
+            message = {
+                "role": "assistant",
+                "content": None,
+                **self.message(json.dumps(analysis)),
+            }
+            return httpx.Response(
+                200,
+                json={
+                    "id": "chatcmpl-scripted",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "fake",
+                    "choices": [
+                        {"index": 0, "message": message, "finish_reason": "stop"}
+                    ],
+                },
+            )
+        if self.invalid_stream:
+            analysis["words"][-1]["root"] = None
+        arguments = json.dumps(analysis, ensure_ascii=False)
+        return httpx.Response(
+            200,
+            content=self.chunks(arguments),
+            headers={"content-type": "text/event-stream"},
+        )
+
+    async def handle_async(self, request: httpx.Request) -> httpx.Response:
+        response = self.handle(request)
+        if not json.loads(request.content).get("stream"):
+            return response
+        return httpx.Response(
+            200, content=b"".join(response.iter_bytes()), headers=response.headers
+        )
+
+
+@pytest.mark.parametrize("mode", ["tool_call", "json_mode"])
+def test_words_are_streamed_before_completion(
+    fake_backend: FakeBackend, mode: str
+) -> None:
+    backend = ScriptedBackend(mode)
+    analyser.use_backend(backend)
+    events = analyse_sentence_stream("Czytam książkę.")
+
+    first = next(events)
+    assert isinstance(first, Verb)
+    assert len(backend.consumed) == 1
+
+    rest = list(events)
+    assert isinstance(rest[0], Noun)
+    assert isinstance(rest[1], AnalysedSentence)
+    assert rest[1].translation == "I am reading a book."
+    assert len(rest) == 2
+
+
+def test_invalid_streams_are_reset(fake_backend: FakeBackend) -> None:
+    analyser.use_backend(ScriptedBackend(invalid_stream=True))
+
+    events = list(analyse_sentence_stream("Czytam książkę."))
+
+    assert [type(event).__name__ for event in events] == [
+        "Verb",
+        "StreamReset",
+        "Verb",
+        "Noun",
+        "AnalysedSentence",
+    ]
+    assert isinstance(events[1], StreamReset)
+    assert events[-1].words[1].root == "książka"
+
+
+def test_invalid_streams_are_reset_async(fake_backend: FakeBackend) -> None:
+    analyser.use_backend(ScriptedBackend(mode="json_mode", invalid_stream=True))
+
+    async def collect() -> list:
+        return [
+            event async for event in analyse_sentence_stream_async("Czytam książkę.")
+        ]
+
+    events = asyncio.run(collect())
+
+    assert [type(event).__name__ for event in events] == [
+        "Verb",
+        "StreamReset",
+        "Verb",
+        "Noun",
+        "AnalysedSentence",
+    ]
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from frazer import analyser
+from frazer.backends import FakeBackend
+from frazer.text import (
+    analyse_text,
+    analyse_text_async,
+    analyse_text_stream_async,
+    split_sentences,
+)
+
+# Sequential analyses of the text would take 4 times as long
+LATENCY = 0.5
+TEXT = "Kot pije wodę. Pies śpi! Czy pada deszcz?\nDzień dobry"
+
+
+@pytest.fixture
+def slow_backend(fake_backend: FakeBackend) -> None:
+    fake_backend.latency = LATENCY
+    # Leave the imports of the first analysis out of the timings
+    analyser.get_client()
+    analyser.get_async_client()
+
+
+@pytest.mark.parametrize(
+    "text, sentences",
+    [
+        (TEXT, ["Kot pije wodę.", "Pies śpi!", "Czy pada deszcz?", "Dzień dobry"]),
+        ("Mam m.in. kota, psa itp. w domu.", ["Mam m.in. kota, psa itp. w domu."]),
+        (
+            "Przyszedł dr Nowak. J. Kowalski też.",
+            ["Przyszedł dr Nowak.", "J. Kowalski też."],
+        ),
+        ("Czekaj... Już idę. 3 koty śpią.", ["Czekaj...", "Już idę.", "3 koty śpią."]),
+        ("„Chodź!” – powiedział.", ["„Chodź!” – powiedział."]),
+        ("  \n\n", []),
+        (
+            "Pomogłem im. Byli bardzo wdzięczni.",
+            ["Pomogłem im.", "Byli bardzo wdzięczni."],
+        ),
+        (
+            "Wszystko jest ok. Idziemy do domu.",
+            ["Wszystko jest ok.", "Idziemy do domu."],
+        ),
+        ("Mam ok. 5 kotów, str. 3.", ["Mam ok. 5 kotów, str. 3."]),
+        ("Kupiłem chleb,\nmasło i mleko.", ["Kupiłem chleb, masło i mleko."]),
+        ("Tytuł\n\nKot pije.\nPies je.", ["Tytuł", "Kot pije.", "Pies je."]),
+    ],
+)
+def test_split_sentences(text: str, sentences: list[str]) -> None:
+    assert split_sentences(text) == sentences
+
+
+def test_sentences_are_analysed_concurrently_in_order(slow_backend: None) -> None:
+    started = time.perf_counter()
+    sentences = analyse_text(TEXT)
+
+    assert time.perf_counter() - started < 3 * LATENCY
+    assert [sentence.text for sentence in sentences] == split_sentences(TEXT)
+    with pytest.raises(ValueError):
+        analyse_text(" ")
+
+
+def test_async_text_analysis(slow_backend: None) -> None:
+    async def main() -> tuple[list, list, float]:
+        streamed = [item async for item in analyse_text_stream_async(TEXT)]
+        started = time.perf_counter()
+        sentences = await analyse_text_async(TEXT)
+        return streamed, sentences, time.perf_counter() - started
+
+    streamed, sentences, elapsed = asyncio.run(main())
+
+    assert elapsed < 3 * LATENCY
+    assert sorted(pos for pos, _ in streamed) == [0, 1, 2, 3]
+    assert [sentence.text for sentence in sentences] == split_sentences(TEXT)
+
+
+def test_text_endpoints(slow_backend: None) -> None:
+    from frazer.api import app
+
+    async def main() -> tuple[httpx.Response, httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            analysed = await c.post("/text", json={"text": TEXT})
+            streamed = await c.post("/text/stream", json={"text": TEXT})
+            return analysed, streamed
+
+    analysed, streamed = asyncio.run(main())
+
+    texts = [sentence["text"] for sentence in analysed.json()["sentences"]]
+    assert texts == split_sentences(TEXT)
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+    assert {line["sentence"]["text"] for line in lines} == set(texts)
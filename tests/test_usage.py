@@ -0,0 +1,29 @@
+import pytest
+
+from frazer import analyser
+from frazer.analyser import analyse_sentence, build_messages
+from frazer.backends import FakeBackend
+from frazer.usage import UsageStats
+
+
+def test_sentence_comes_after_the_static_prompt() -> None:
+    first = build_messages("Kot pije wodę.")
+    second = build_messages("Pada deszcz.", only_words=["deszcz"])
+
+    assert first[0] == second[0]
+    assert first[1] == {"role": "user", "content": "Kot pije wodę."}
+    assert "'deszcz'" in second[-1]["content"]
+
+
+def test_cached_tokens_are_reported(
+    monkeypatch: pytest.MonkeyPatch, fake_backend: FakeBackend
+) -> None:
+    usage_stats = UsageStats()
+    monkeypatch.setattr(analyser, "usage_stats", usage_stats)
+
+    analyse_sentence("Kot pije wodę.")
+    analyse_sentence("Pada deszcz.")
+
+    assert usage_stats.requests == 2
+    assert usage_stats.cached_tokens >= 1024
+    assert 0.3 < usage_stats.cached_ratio < 0.5
@@ -0,0 +1,135 @@
+import json
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from frazer import analyser
+from frazer.analyser import (
+    AnalysedSentence,
+    Numeral,
+    Other,
+    analyse_sentence,
+    prompt_fingerprint,
+)
+from frazer.backends import FakeBackend
+from frazer.wire import CompactSentence, from_compact, to_compact
+from tests.test_analyzer import mock_analysed_sentence
+
+
+def test_compact_schema_round_trips() -> None:
+    sentence = mock_analysed_sentence().model_copy(
+        update={
+            "text": "Czytam dwie książki, ok?",
+            "words": [
+                *mock_analysed_sentence().words,
+                Numeral(
+                    original_value="dwie",
+                    root="dwa",
+                    original_value_translation="two",
+                    syntatic_category="numeral",
+                    declension_case="accusative",
+                    word_causing_declension="czytać",
+                    subtype="cardinal",
+                ),
+                Other(
+                    original_value="OK",
+                    root="ok",
+                    original_value_translation="okay",
+                    syntatic_category="other",
+                    other_syntatic_category="interjection",
+                ),
+            ],
+        }
+    )
+
+    compact = to_compact(sentence)
+
+    assert compact.w[0].i == 0 and compact.w[0].v == "czytam"
+    assert compact.w[2].i == 1 and compact.w[2].v is None
+    assert from_compact(compact, sentence.text) == sentence
+    assert (
+        len(compact.model_dump_json(exclude_none=True))
+        < len(sentence.model_dump_json()) / 2
+    )
+
+
+def test_compact_schema_is_smaller() -> None:
+    compact = json.dumps(CompactSentence.model_json_schema())
+    public = json.dumps(AnalysedSentence.model_json_schema())
+
+    assert len(compact) < len(public) / 2
+
+
+def test_out_of_range_position_is_rejected() -> None:
+    data = {
+        "tr": "Hi",
+        "w": [{"i": 3, "r": "cześć", "t": "hi", "c": "int"}],
+        "ok": True,
+    }
+    compact = CompactSentence.model_validate(data)
+
+    with pytest.raises(ValueError):
+        from_compact(compact, "Cześć!")
+    with pytest.raises(ValidationError, match="out of the sentence"):
+        CompactSentence.model_validate(data, context={"tokens": ["Cześć"]})
+
+
+def test_positions_out_of_order_are_rejected() -> None:
+    data = {
+        "tr": "The cat drinks.",
+        "w": [
+            {"i": 1, "r": "pić", "t": "drinks", "c": "v"},
+            {"i": 0, "r": "kot", "t": "cat", "c": "n"},
+        ],
+        "ok": True,
+    }
+
+    with pytest.raises(ValidationError, match="order of the sentence"):
+        CompactSentence.model_validate(data, context={"tokens": ["Kot", "pije"]})
+
+
+class MisplacedBackend(FakeBackend):
+    """Refers the first word of its first response to a position out of range."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.prompts: list[list[dict]] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.prompts.append(json.loads(request.content)["messages"])
+        response = super().handle(request)
+        if len(self.prompts) > 1:
+            return response
+        body = response.json()
+        function = body["choices"][0]["message"]["tool_calls"][0]["function"]
+        arguments = json.loads(function["arguments"])
+        arguments["w"][0]["i"] = 42
+        function["arguments"] = json.dumps(arguments)
+        return httpx.Response(200, json=body)
+
+
+def test_analysis_through_the_compact_schema(
+    monkeypatch: pytest.MonkeyPatch, fake_backend: FakeBackend
+) -> None:
+    public_fingerprint = prompt_fingerprint()
+    monkeypatch.setenv("FRAZER_COMPACT_SCHEMA", "1")
+
+    sentence = analyse_sentence("Kot pije wodę.")
+
+    assert [word.original_value for word in sentence.words] == ["Kot", "pije", "wodę"]
+    assert prompt_fingerprint() != public_fingerprint
+
+
+def test_misplaced_words_are_asked_again(
+    monkeypatch: pytest.MonkeyPatch, fake_backend: FakeBackend
+) -> None:
+    monkeypatch.setenv("FRAZER_COMPACT_SCHEMA", "1")
+    backend = MisplacedBackend()
+    analyser.use_backend(backend)
+
+    sentence = analyse_sentence("Kot pije wodę.")
+
+    assert [word.original_value for word in sentence.words] == ["Kot", "pije", "wodę"]
+    assert len(backend.prompts) == 2
+    assert "0 'Kot', 1 'pije', 2 'wodę'" in backend.prompts[0][2]["content"]